@@ -34,7 +34,7 @@ if sys.platform == 'win32':
 from .tool_manager import ToolManager
 from utils.colors import Colors
 from utils.format import print_separator
-from utils.helpers import print_welcome_tip, print_command_suggestions, suggest_command, strip_ansi
+from utils.helpers import print_welcome_tip, print_command_suggestions, suggest_command, strip_ansi, visible_width
 from utils.logger import clear_logs, get_log_files
 
 
@@ -905,15 +905,18 @@ def _show_logs_menu(manager):
                 continue
             
             # Parse nhiều số (hỗ trợ cả space và comma)
+            # (re.split đã bỏ khoảng trắng, int() tự kiểm tra chữ số trong cùng một lượt)
+            # Dùng set để bỏ số trùng (vd: "d 1 1") trong một lượt, rồi sắp xếp lại
             numbers_str = re.split(r'[,\s]+', rest)
-            numbers = []
+            numbers = set()
             for num_str in numbers_str:
-                if num_str.strip():
-                    try:
-                        num = int(num_str.strip())
-                        numbers.append(num)
-                    except ValueError:
-                        print(Colors.error(f"❌ Số không hợp lệ: {num_str}"))
+                if not num_str:
+                    continue
+                try:
+                    numbers.add(int(num_str))
+                except ValueError:
+                    print(Colors.error(f"❌ Số không hợp lệ: {num_str}"))
+            numbers = sorted(numbers)
             
             if not numbers:
                 print()
@@ -1417,7 +1420,10 @@ def _show_theme_menu():
                 name_color = Colors.info
             
             # Hiển thị màu sắc preview
-            color_preview = f"{Colors.colorize('█', theme_colors.primary)}{Colors.colorize('█', theme_colors.success)}{Colors.colorize('█', theme_colors.warning)}{Colors.colorize('█', theme_colors.error)}"
+            color_preview = ''.join(
+                Colors.colorize('█', theme_colors.ansi(name))
+                for name in ('primary', 'success', 'warning', 'error')
+            )
             
             print(f"   {marker} {Colors.warning(str(idx))}. {name_color(Colors.bold(theme_name))} {color_preview}")
             
@@ -1625,11 +1631,13 @@ def _show_marketplace_menu(manager, tools):
                         ])
                     rich_ui.print_table("KẾT QUẢ TÌM KIẾM", headers, rows)
                 else:
-                    # Fallback: in danh sách đơn giản
+                    # Fallback: in danh sách đơn giản (ghép lại rồi ghi một lần)
+                    lines = []
                     for idx, tool in enumerate(results[:20], 1):
-                        print(f"   {idx}. {Colors.bold(tool.get('name', 'N/A'))}")
-                        print(f"      {Colors.muted(tool.get('description', ''))}")
-                        print()
+                        lines.append(f"   {idx}. {Colors.bold(tool.get('name', 'N/A'))}")
+                        lines.append(f"      {Colors.muted(tool.get('description', ''))}")
+                        lines.append("")
+                    sys.stdout.write("\n".join(lines) + "\n")
                 
                 # Cho phép cài đặt
                 if results:
@@ -1679,11 +1687,13 @@ def _show_marketplace_menu(manager, tools):
                         ])
                     rich_ui.print_table("TOOLS CÓ SẴN", headers, rows)
                 else:
-                    # Fallback
+                    # Fallback (ghép lại rồi ghi một lần)
+                    lines = []
                     for idx, tool in enumerate(available_tools[:30], 1):
-                        print(f"   {idx}. {Colors.bold(tool.get('name', 'N/A'))} (v{tool.get('version', 'N/A')})")
-                        print(f"      {Colors.muted(tool.get('description', ''))}")
-                        print()
+                        lines.append(f"   {idx}. {Colors.bold(tool.get('name', 'N/A'))} (v{tool.get('version', 'N/A')})")
+                        lines.append(f"      {Colors.muted(tool.get('description', ''))}")
+                        lines.append("")
+                    sys.stdout.write("\n".join(lines) + "\n")
             else:
                 print(Colors.error("❌ Không thể tải danh sách tools"))
             
@@ -1693,19 +1703,39 @@ def _show_marketplace_menu(manager, tools):
         elif choice == '3':
             # Cài đặt tool
             print()
-            tool_id = input(f"{Colors.primary('Nhập ID tool cần cài')} (hoặc Enter để hủy): ").strip()
-            if not tool_id:
+            raw_ids = input(f"{Colors.primary('Nhập ID tool cần cài')} (nhiều ID cách nhau bởi dấu cách/phẩy, Enter để hủy): ").strip()
+            # dict.fromkeys: bỏ ID trùng (vd: 'foo foo'), giữ thứ tự nhập
+            tool_ids = list(dict.fromkeys(t for t in re.split(r'[\s,]+', raw_ids) if t))
+            if not tool_ids:
                 continue
             
             registry = marketplace.fetch_registry()
             if registry:
-                tool_info = marketplace.get_tool_info(tool_id, registry)
-                if tool_info:
-                    marketplace.install_tool(tool_info, overwrite=False)
+                tool_infos = []
+                for tool_id in tool_ids:
+                    tool_info = marketplace.get_tool_info(tool_id, registry)
+                    if tool_info:
+                        tool_infos.append(tool_info)
+                    else:
+                        print(Colors.error(f"❌ Không tìm thấy tool: {tool_id}"))
+                
+                if len(tool_infos) == 1:
+                    marketplace.install_tool(tool_infos[0], overwrite=False)
+                elif tool_infos:
+                    # Hỏi ghi đè một lần ở đây; các worker của install_many không gọi input()
+                    overwrite = False
+                    existing = [t['id'] for t in tool_infos if marketplace.get_tool_install_dir(t).exists()]
+                    if existing:
+                        print(Colors.warning(f"⚠️  Đã tồn tại: {', '.join(existing)}"))
+                        confirm = input(Colors.warning("   Bạn có muốn ghi đè? (yes/no): ")).strip().lower()
+                        overwrite = confirm in ['yes', 'y', 'có', 'c']
+                    results = marketplace.install_many(tool_infos, overwrite=overwrite)
+                    installed_count = sum(1 for _, ok in results if ok)
+                    print(Colors.success(f"✅ Đã cài {installed_count}/{len(results)} tool(s)"))
+                
+                if tool_infos:
                     # Refresh tools list
                     tools = manager.get_tool_list()
-                else:
-                    print(Colors.error(f"❌ Không tìm thấy tool: {tool_id}"))
             else:
                 print(Colors.error("❌ Không thể tải registry"))
             
@@ -1741,10 +1771,12 @@ def _show_marketplace_menu(manager, tools):
                         ])
                     rich_ui.print_table("TOOLS ĐÃ CÀI", headers, rows)
                 else:
+                    lines = []
                     for idx, tool in enumerate(installed, 1):
-                        print(f"   {idx}. {Colors.bold(tool.get('name', 'N/A'))} ({tool.get('id', 'N/A')})")
-                        print(f"      Version: {tool.get('version', 'N/A')} | Cài đặt: {tool.get('installed_at', 'N/A')}")
-                        print()
+                        lines.append(f"   {idx}. {Colors.bold(tool.get('name', 'N/A'))} ({tool.get('id', 'N/A')})")
+                        lines.append(f"      Version: {tool.get('version', 'N/A')} | Cài đặt: {tool.get('installed_at', 'N/A')}")
+                        lines.append("")
+                    sys.stdout.write("\n".join(lines) + "\n")
             else:
                 print(Colors.info("ℹ️  Chưa cài tool nào từ marketplace"))
             
@@ -1759,11 +1791,9 @@ def _show_marketplace_menu(manager, tools):
             if registry:
                 installed = marketplace.list_installed_tools()
                 if installed:
-                    updated_count = 0
-                    for tool in installed:
-                        tool_id = tool.get('id')
-                        if marketplace.update_tool(tool_id, registry):
-                            updated_count += 1
+                    # Các tool cần cập nhật được tải song song
+                    results = marketplace.update_all(registry)
+                    updated_count = sum(1 for _, ok in results if ok)
                     
                     if updated_count == 0:
                         print(Colors.info("ℹ️  Tất cả tools đã ở phiên bản mới nhất"))
@@ -2453,23 +2483,23 @@ def main():
                 if suggestions:
                     if len(suggestions) == 1:
                         suggest_msg = f"💡 Có phải bạn muốn: {Colors.bold(suggestions[0])}?"
-                        suggest_plain = strip_ansi(suggest_msg)
-                        suggest_padding = (65 - len(suggest_plain)) // 2
-                        print(Colors.error("     │") + " " * suggest_padding + Colors.info(suggest_msg) + " " * (63 - len(suggest_plain) - suggest_padding) + Colors.error("│"))
+                        suggest_width = visible_width(suggest_msg)
+                        suggest_padding = (65 - suggest_width) // 2
+                        print(Colors.error("     │") + " " * suggest_padding + Colors.info(suggest_msg) + " " * (63 - suggest_width - suggest_padding) + Colors.error("│"))
                     else:
                         suggest_title = f"💡 Gợi ý ({len(suggestions)}):"
                         suggest_title_padding = (65 - len(suggest_title)) // 2
                         print(Colors.error("     │") + " " * suggest_title_padding + Colors.info(suggest_title) + " " * (63 - len(suggest_title) - suggest_title_padding) + Colors.error("│"))
                         
                         suggestions_text = ", ".join([Colors.bold(s) for s in suggestions])
-                        suggestions_plain = strip_ansi(suggestions_text)
-                        suggestions_padding = (65 - len(suggestions_plain)) // 2
-                        print(Colors.error("     │") + " " * suggestions_padding + suggestions_text + " " * (63 - len(suggestions_plain) - suggestions_padding) + Colors.error("│"))
+                        suggestions_width = visible_width(suggestions_text)
+                        suggestions_padding = (65 - suggestions_width) // 2
+                        print(Colors.error("     │") + " " * suggestions_padding + suggestions_text + " " * (63 - suggestions_width - suggestions_padding) + Colors.error("│"))
                 else:
                     help_msg = "💡 Nhập 'h' hoặc 'help' để xem hướng dẫn"
-                    help_plain = strip_ansi(help_msg)
-                    help_padding = (65 - len(help_plain)) // 2
-                    print(Colors.error("     │") + " " * help_padding + Colors.info(help_msg) + " " * (63 - len(help_plain) - help_padding) + Colors.error("│"))
+                    help_width = visible_width(help_msg)
+                    help_padding = (65 - help_width) // 2
+                    print(Colors.error("     │") + " " * help_padding + Colors.info(help_msg) + " " * (63 - help_width - help_padding) + Colors.error("│"))
                 
                 print(Colors.error("     │") + " " * 64 + Colors.error("│"))
                 print(Colors.error("     └─" + "─" * 63 + "┘"))
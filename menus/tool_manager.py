@@ -12,14 +12,42 @@ import sys
 import subprocess
 import json
 from pathlib import Path
-from typing import List, Dict, Optional
-from utils.colors import Colors
+from typing import List, Dict, NamedTuple, Optional
+from utils.colors import Colors, is_color_enabled
 from utils.format import print_header, print_separator
 from utils.categories import group_tools_by_category, get_category_info
 from utils.helpers import highlight_keyword, strip_ansi
 from utils.logger import log_error_to_file
 
 
+# Các path đã thêm vào sys.path (tra set O(1) thay vì quét list sys.path
+# mỗi lần xem hướng dẫn tool)
+_sys_path_added: set = set()
+
+
+def _add_sys_path(path: str):
+    """Thêm path vào đầu sys.path (mỗi path chỉ thêm 1 lần)"""
+    if path not in _sys_path_added:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+        _sys_path_added.add(path)
+
+
+class ToolPaths(NamedTuple):
+    """
+    Các đường dẫn của 1 tool, tính 1 lần khi tìm thấy thư mục tool
+    
+    Giải thích:
+    - Tuple bất biến, không có dict mỗi instance như khi trả về dict
+    - Các Path được ghép sẵn, caller không phải ghép lại bằng "/" mỗi lần dùng
+    """
+    tool_dir: Path        # tools/py/<name>, tools/sh/<name> hoặc tools/<name>
+    tool_file: Path       # <tool_dir>/<tool>
+    tool_type: str        # 'py' hoặc 'sh' (theo thư mục chứa)
+    metadata_file: Path   # <tool_dir>/tool_info.json
+    doc_file: Path        # <tool_dir>/doc.py
+
+
 class ToolManager:
     """
     Class quản lý tools
@@ -43,6 +71,7 @@ class ToolManager:
         self.tool_names = {}
         self.tool_tags = {}
         self.tool_types = {}  # Cache loại tool: 'py' hoặc 'sh'
+        self._tool_paths_cache: Dict[str, ToolPaths] = {}  # Cache đường dẫn của tool đã tìm thấy
         
         # Cache tool list để tránh scan lại nhiều lần
         self._cached_tool_list = None
@@ -62,6 +91,11 @@ class ToolManager:
         # Danh sách tools theo đúng thứ tự hiển thị (được cập nhật mỗi khi hiển thị menu)
         self.displayed_tools_order = []
         
+        # Cache output của display_menu: menu được in lại sau mỗi lệnh,
+        # nếu dữ liệu không đổi thì ghi lại chuỗi đã render thay vì dựng lại
+        self._menu_render_key = None
+        self._menu_render_cache = None
+        
         # Tools ưu tiên hiển thị lên đầu danh sách
         # Mục đích: Các tools hay dùng nhất hoặc quan trọng nhất sẽ hiển thị trước
         # Lý do: Dễ dàng truy cập nhanh các tools thường xuyên sử dụng
@@ -140,35 +174,67 @@ class ToolManager:
         except Exception as e:
             print(f"⚠️  Lỗi lưu config: {e}")
     
-    def _get_tool_metadata_file(self, tool: str) -> Path:
+    def _locate_tool_paths(self, tool: str) -> Optional[ToolPaths]:
         """
-        Tìm file tool_info.json cho tool
+        Tìm thư mục chứa tool và các đường dẫn liên quan (có cache)
         
         Args:
             tool: Tên file tool (vd: backup-folder.py)
         
         Returns:
-            Path: Đường dẫn đến tool_info.json hoặc None
+            ToolPaths: Các đường dẫn của tool, None nếu không tìm thấy thư mục
+        
+        Giải thích:
+        - Mỗi lần tìm phải thử lần lượt 3 vị trí (mỗi vị trí 1 lần stat)
+        - Chỉ cache kết quả tìm thấy: tool mới cài (marketplace, import)
+          vẫn được phát hiện ở lần gọi sau
         """
+        cached = self._tool_paths_cache.get(tool)
+        if cached is not None:
+            return cached
+        
         tool_name = tool.replace('.py', '')
+        for candidate, tool_type in (
+            (self.tool_dir / "py" / tool_name, 'py'),
+            (self.tool_dir / "sh" / tool_name, 'sh'),
+            (self.tool_dir / tool_name, 'py')  # Cấu trúc cũ
+        ):
+            if candidate.is_dir():
+                paths = ToolPaths(
+                    tool_dir=candidate,
+                    tool_file=candidate / tool,
+                    tool_type=tool_type,
+                    metadata_file=candidate / "tool_info.json",
+                    doc_file=candidate / "doc.py"
+                )
+                self._tool_paths_cache[tool] = paths
+                return paths
         
-        # Thử tìm trong tools/py/
-        py_tool_dir = self.tool_dir / "py" / tool_name
-        py_metadata = py_tool_dir / "tool_info.json"
-        if py_metadata.exists():
-            return py_metadata
+        return None
+    
+    def _locate_tool_dir(self, tool: str) -> Optional[Path]:
+        """
+        Tìm thư mục chứa tool (có cache, xem _locate_tool_paths)
         
-        # Thử tìm trong tools/sh/
-        sh_tool_dir = self.tool_dir / "sh" / tool_name
-        sh_metadata = sh_tool_dir / "tool_info.json"
-        if sh_metadata.exists():
-            return sh_metadata
+        Returns:
+            Path: Thư mục tool (tools/py/<name>, tools/sh/<name> hoặc tools/<name>), None nếu không có
+        """
+        paths = self._locate_tool_paths(tool)
+        return paths.tool_dir if paths is not None else None
+    
+    def _get_tool_metadata_file(self, tool: str) -> Path:
+        """
+        Tìm file tool_info.json cho tool
         
-        # Thử cấu trúc cũ
-        old_tool_dir = self.tool_dir / tool_name
-        old_metadata = old_tool_dir / "tool_info.json"
-        if old_metadata.exists():
-            return old_metadata
+        Args:
+            tool: Tên file tool (vd: backup-folder.py)
+        
+        Returns:
+            Path: Đường dẫn đến tool_info.json hoặc None
+        """
+        paths = self._locate_tool_paths(tool)
+        if paths is not None and paths.metadata_file.exists():
+            return paths.metadata_file
         
         return None
     
@@ -351,19 +417,11 @@ class ToolManager:
         if tool in self.tool_types:
             return self.tool_types[tool]
         
-        tool_name = tool.replace('.py', '')
-        
-        # Kiểm tra trong tools/py/
-        py_tool_path = self.tool_dir / "py" / tool_name / tool
-        if py_tool_path.exists():
-            self.tool_types[tool] = 'py'
-            return 'py'
-        
-        # Kiểm tra trong tools/sh/
-        sh_tool_path = self.tool_dir / "sh" / tool_name / tool
-        if sh_tool_path.exists():
-            self.tool_types[tool] = 'sh'
-            return 'sh'
+        # Loại tool theo thư mục chứa (tools/py/ hoặc tools/sh/)
+        paths = self._locate_tool_paths(tool)
+        if paths is not None and paths.tool_file.exists():
+            self.tool_types[tool] = paths.tool_type
+            return paths.tool_type
         
         # Mặc định là py nếu không tìm thấy (tương thích với cấu trúc cũ)
         self.tool_types[tool] = 'py'
@@ -1039,22 +1097,10 @@ class ToolManager:
         - Ưu tiên cấu trúc mới (tools/py/ và tools/sh/)
         - Vẫn tương thích với cấu trúc cũ
         """
-        tool_name = tool.replace('.py', '')
-        
-        # Thử tìm trong tools/py/ (cấu trúc mới)
-        py_tool_path = self.tool_dir / "py" / tool_name / tool
-        if py_tool_path.exists():
-            return py_tool_path
-        
-        # Thử tìm trong tools/sh/ (các tool đặc biệt)
-        sh_tool_path = self.tool_dir / "sh" / tool_name / tool
-        if sh_tool_path.exists():
-            return sh_tool_path
-        
-        # Thử cấu trúc cũ: tool/backup-folder/backup-folder.py
-        old_structure_path = self.tool_dir / tool_name / tool
-        if old_structure_path.exists():
-            return old_structure_path
+        # Thử cấu trúc thư mục: tools/py/, tools/sh/, rồi tool/backup-folder/
+        paths = self._locate_tool_paths(tool)
+        if paths is not None and paths.tool_file.exists():
+            return paths.tool_file
         
         # Thử cấu trúc cũ: tool/backup-folder.py
         old_file_path = self.tool_dir / tool
@@ -1086,6 +1132,33 @@ class ToolManager:
             print(Colors.error("❌ Không tìm thấy tool nào!"))
             return
         
+        # Stats nhanh (dùng cho cả cache key lẫn phần hiển thị)
+        total = len(tools)
+        all_tools_count = len(self.get_all_tools_including_disabled())
+        disabled_count = all_tools_count - total
+        favorites_count = len([t for t in tools if t in self.config['favorites']])
+        recent_count = len([t for t in self.config['recent'] if t in tools])
+        
+        # Tính tổng số lần sử dụng từ statistics
+        total_usage = sum(self.config.get('statistics', {}).get('tool_usage', {}).values())
+        
+        # Menu không đổi so với lần hiển thị trước -> ghi lại output đã render
+        # (key gồm cả trạng thái màu và tags vì chúng đổi output/nhóm category)
+        render_key = (
+            tuple(tools), title, group_by_category, search_query,
+            tuple(self.config['favorites']), tuple(self.config['recent']),
+            disabled_count, total_usage, is_color_enabled(),
+            tuple(self.get_tool_display_name(tool) for tool in tools),
+            tuple(tuple(self.get_tool_tags(tool)) for tool in tools),
+        )
+        if render_key == self._menu_render_key:
+            rendered, displayed_tools_order = self._menu_render_cache
+            sys.stdout.write(rendered)
+            self.displayed_tools_order = list(displayed_tools_order)
+            return
+        
+        output = []
+        
         # Helper function để tính display width (bao gồm emoji)
         def get_display_width(text: str) -> int:
             """Tính độ dài hiển thị thực tế của text (bao gồm cả emoji)"""
@@ -1129,25 +1202,16 @@ class ToolManager:
         box_width = content_width + 2  # Content area + 2 borders
         
         # Header với box design
-        print()
-        print("  " + Colors.primary("╔" + "═" * content_width + "╗"))
+        output.append("")
+        output.append("  " + Colors.primary("╔" + "═" * content_width + "╗"))
         title_plain = title  # Plain text để tính độ dài
         title_padding = (content_width - len(title_plain)) // 2
         title_padding_right = content_width - len(title_plain) - title_padding
         title_line = "  " + Colors.primary("║") + " " * title_padding + Colors.bold(Colors.info(title)) + " " * title_padding_right + Colors.primary("║")
-        print(title_line)
-        print("  " + Colors.primary("╠" + "═" * content_width + "╣"))
+        output.append(title_line)
+        output.append("  " + Colors.primary("╠" + "═" * content_width + "╣"))
         
         # Stats nhanh với icon đẹp
-        total = len(tools)
-        all_tools_count = len(self.get_all_tools_including_disabled())
-        disabled_count = all_tools_count - total
-        favorites_count = len([t for t in tools if t in self.config['favorites']])
-        recent_count = len([t for t in self.config['recent'] if t in tools])
-        
-        # Tính tổng số lần sử dụng từ statistics
-        total_usage = sum(self.config.get('statistics', {}).get('tool_usage', {}).values())
-        
         # Build stats text
         stats_text_parts = []
         if disabled_count > 0:
@@ -1176,9 +1240,9 @@ class ToolManager:
         if padding < 0:
             padding = 0
         stats_line = "  " + Colors.primary("║") + " " + stats_colored + " " * padding + Colors.primary("║")
-        print(stats_line)
-        print("  " + Colors.primary("╠" + "═" * content_width + "╣"))
-        print()
+        output.append(stats_line)
+        output.append("  " + Colors.primary("╠" + "═" * content_width + "╣"))
+        output.append("")
         
         # Tạo danh sách tools theo đúng thứ tự hiển thị
         displayed_tools_order = []
@@ -1196,14 +1260,14 @@ class ToolManager:
                 cat_name = cat_info['name']
                 
                 # Category header với box style - đồng nhất width
-                print()
+                output.append("")
                 cat_title = f"{icon} {cat_name} ({len(category_tools)})"
                 cat_title_plain = cat_title  # Plain text để tính độ dài
                 cat_title_display_width = get_display_width(cat_title_plain)
                 cat_title_padding = category_box_width - cat_title_display_width - 3
                 if cat_title_padding < 0:
                     cat_title_padding = 0
-                print("  " + Colors.secondary("┌─ ") + Colors.bold(Colors.info(cat_title)) + Colors.secondary(" " + "─" * cat_title_padding + "┐"))
+                output.append("  " + Colors.secondary("┌─ ") + Colors.bold(Colors.info(cat_title)) + Colors.secondary(" " + "─" * cat_title_padding + "┐"))
                 
                 # Tools trong category
                 for tool in category_tools:
@@ -1236,14 +1300,14 @@ class ToolManager:
                     if padding_right < 0:
                         padding_right = 0
                     
-                    print(f"  {Colors.secondary('│')}  {star} {idx_colored} {tool_name_colored}" + " " * padding_right + f" {Colors.secondary('│')}")
+                    output.append(f"  {Colors.secondary('│')}  {star} {idx_colored} {tool_name_colored}" + " " * padding_right + f" {Colors.secondary('│')}")
                     current_idx += 1
                 
-                print("  " + Colors.secondary("└" + "─" * category_box_width + "┘"))
+                output.append("  " + Colors.secondary("└" + "─" * category_box_width + "┘"))
         else:
             # Hiển thị flat list (không nhóm) với border
             displayed_tools_order = tools.copy()  # Flat list giữ nguyên thứ tự
-            print()
+            output.append("")
             for idx, tool in enumerate(tools, start=1):
                 is_favorite = tool in self.config['favorites']
                 tool_name = self.get_tool_display_name(tool)
@@ -1264,12 +1328,17 @@ class ToolManager:
                 
                 # Padding để align với border
                 padding = " " * 2
-                print(f"  {padding}{star} {idx_colored} {tool_name_colored}")
+                output.append(f"  {padding}{star} {idx_colored} {tool_name_colored}")
         
         # Footer
-        print()
-        print("  " + Colors.primary("╚" + "═" * content_width + "╝"))
-        print()
+        output.append("")
+        output.append("  " + Colors.primary("╚" + "═" * content_width + "╝"))
+        output.append("")
+        
+        rendered = "\n".join(output) + "\n"
+        sys.stdout.write(rendered)
+        self._menu_render_key = render_key
+        self._menu_render_cache = (rendered, tuple(displayed_tools_order))
         
         # Lưu danh sách tools theo đúng thứ tự hiển thị để dùng khi chọn số
         self.displayed_tools_order = displayed_tools_order
@@ -1623,21 +1692,10 @@ class ToolManager:
         """
         tool_name = tool.replace('.py', '')
         
-        # Tìm file doc.py trong tools/py/ trước
-        tool_dir_path = self.tool_dir / "py" / tool_name
-        doc_path = tool_dir_path / "doc.py"
+        # Tìm file doc.py trong thư mục tool (tools/py/, tools/sh/ hoặc cấu trúc cũ)
+        paths = self._locate_tool_paths(tool)
         
-        # Nếu không có trong py/, thử tìm trong sh/
-        if not doc_path.exists():
-            tool_dir_path = self.tool_dir / "sh" / tool_name
-            doc_path = tool_dir_path / "doc.py"
-        
-        # Nếu vẫn không có, thử cấu trúc cũ
-        if not doc_path.exists():
-            tool_dir_path = self.tool_dir / tool_name
-            doc_path = tool_dir_path / "doc.py"
-        
-        if not doc_path.exists():
+        if paths is None or not paths.doc_file.exists():
             # Thông báo không tìm thấy doc.py
             tool_display_name = self.get_tool_display_name(tool)
             print()
@@ -1651,12 +1709,11 @@ class ToolManager:
         # Import và đọc doc.py
         try:
             # Thêm thư mục tool vào sys.path để import
-            if str(tool_dir_path) not in sys.path:
-                sys.path.insert(0, str(tool_dir_path))
+            _add_sys_path(str(paths.tool_dir))
             
             # Import module doc
             import importlib.util
-            spec = importlib.util.spec_from_file_location(f"{tool_name}.doc", doc_path)
+            spec = importlib.util.spec_from_file_location(f"{tool_name}.doc", paths.doc_file)
             doc_module = importlib.util.module_from_spec(spec)
             spec.loader.exec_module(doc_module)
             
@@ -1725,33 +1782,12 @@ class ToolManager:
         
         tool_name = tool.replace('.py', '')
         
-        # Tìm đường dẫn thư mục tool
-        tool_dir = None
-        tool_type = None
-        
-        # Thử tìm trong tools/py/
-        py_tool_dir = self.tool_dir / "py" / tool_name
-        if py_tool_dir.exists() and py_tool_dir.is_dir():
-            tool_dir = py_tool_dir
-            tool_type = 'py'
-        
-        # Thử tìm trong tools/sh/
-        if not tool_dir:
-            sh_tool_dir = self.tool_dir / "sh" / tool_name
-            if sh_tool_dir.exists() and sh_tool_dir.is_dir():
-                tool_dir = sh_tool_dir
-                tool_type = 'sh'
-        
-        # Thử cấu trúc cũ
-        if not tool_dir:
-            old_tool_dir = self.tool_dir / tool_name
-            if old_tool_dir.exists() and old_tool_dir.is_dir():
-                tool_dir = old_tool_dir
-                tool_type = 'py'  # Mặc định
-        
-        if not tool_dir or not tool_dir.exists():
+        # Tìm đường dẫn thư mục tool (tools/py/, tools/sh/ hoặc cấu trúc cũ)
+        paths = self._locate_tool_paths(tool)
+        if paths is None or not paths.tool_dir.is_dir():
             print(Colors.error(f"❌ Không tìm thấy thư mục tool: {tool_name}"))
             return None
+        tool_dir, tool_type = paths.tool_dir, paths.tool_type
         
         # Tạo thư mục exports nếu chưa có
         project_root = Path(__file__).parent.parent
@@ -1958,27 +1994,9 @@ class ToolManager:
         tool_name = tool.replace('.py', '')
         tool_display_name = self.get_tool_display_name(tool)
         
-        # Tìm đường dẫn thư mục tool
-        tool_dir = None
-        
-        # Thử tìm trong tools/py/
-        py_tool_dir = self.tool_dir / "py" / tool_name
-        if py_tool_dir.exists() and py_tool_dir.is_dir():
-            tool_dir = py_tool_dir
-        
-        # Thử tìm trong tools/sh/
-        if not tool_dir:
-            sh_tool_dir = self.tool_dir / "sh" / tool_name
-            if sh_tool_dir.exists() and sh_tool_dir.is_dir():
-                tool_dir = sh_tool_dir
-        
-        # Thử cấu trúc cũ
-        if not tool_dir:
-            old_tool_dir = self.tool_dir / tool_name
-            if old_tool_dir.exists() and old_tool_dir.is_dir():
-                tool_dir = old_tool_dir
-        
-        if not tool_dir or not tool_dir.exists():
+        # Tìm đường dẫn thư mục tool (tools/py/, tools/sh/ hoặc cấu trúc cũ)
+        tool_dir = self._locate_tool_dir(tool)
+        if tool_dir is None or not tool_dir.is_dir():
             print(Colors.error(f"❌ Không tìm thấy thư mục tool: {tool_name}"))
             return False
         
@@ -1996,6 +2014,7 @@ class ToolManager:
         try:
             # Xóa thư mục tool
             shutil.rmtree(tool_dir)
+            self._tool_paths_cache.pop(tool, None)
             
             # Xóa khỏi favorites nếu có
             if tool in self.config.get('favorites', []):
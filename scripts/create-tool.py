@@ -12,7 +12,9 @@ Cách dùng:
 import os
 import sys
 import json
+from functools import lru_cache
 from pathlib import Path
+from string import Template
 
 
 def normalize_tool_name(name: str) -> str:
@@ -42,6 +44,30 @@ def normalize_tool_name(name: str) -> str:
     return name or "new-tool"
 
 
+# Thư mục chứa template file của tool mới
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+
+
+@lru_cache(maxsize=None)
+def load_template(name: str) -> Template:
+    """
+    Đọc và cache template từ scripts/templates
+    
+    Args:
+        name: Tên file template (vd: tool.py.tmpl)
+    
+    Returns:
+        Template: string.Template với placeholder dạng ${display_name}
+    
+    Giải thích:
+    - Template nằm ngoài code: chỉ đọc khi thực sự tạo tool
+    - Dùng string.Template ($placeholder) thay vì format: dấu ngoặc {} của
+      code Python trong template giữ nguyên, không phải escape thành {{ }}
+    - lru_cache: mỗi file chỉ đọc 1 lần dù tạo nhiều tool trong cùng process
+    """
+    return Template((TEMPLATES_DIR / name).read_text(encoding='utf-8'))
+
+
 def create_python_tool(tool_name: str, tool_dir: Path, display_name: str, description: str):
     """Tạo tool Python"""
     
@@ -55,66 +81,16 @@ Tool: {tool_name}
 
 '''
     
+    # Giá trị điền vào các template (tính 1 lần)
+    template_vars = {
+        'display_name': display_name,
+        'display_name_upper': display_name.upper(),
+        'description': description,
+    }
+    
     # Template tool.py
     tool_file = tool_dir / f"{tool_name}.py"
-    tool_content = f'''#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-Tool: {display_name}
-
-Mục đích: {description}
-"""
-
-import os
-import sys
-from pathlib import Path
-
-# Thêm thư mục cha vào sys.path để import utils
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
-from utils import (
-    print_header, get_user_input, confirm_action,
-    ensure_directory_exists, log_info, log_error, normalize_path
-)
-from utils.colors import Colors
-
-
-def main():
-    """Hàm chính"""
-    print_header("TOOL {display_name.upper()}", width=70)
-    print(Colors.primary(f"  {display_name}"))
-    print()
-    
-    # TODO: Thêm logic của tool ở đây
-    
-    print()
-    print(Colors.success("✅ Tool đã chạy xong!"))
-    print()
-
-
-def main_cli():
-    """Chế độ CLI (nếu cần)"""
-    import argparse
-    
-    parser = argparse.ArgumentParser(description=f'{display_name}')
-    # TODO: Thêm arguments nếu cần
-    
-    args = parser.parse_args()
-    main()
-
-
-if __name__ == "__main__":
-    try:
-        main()
-    except KeyboardInterrupt:
-        print(Colors.warning("\\n⚠️  Đã hủy bởi người dùng!"))
-        sys.exit(130)
-    except Exception as e:
-        log_error(f"❌ Lỗi không mong muốn: {{e}}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
-'''
+    tool_content = load_template("tool.py.tmpl").substitute(template_vars)
     
     # Template tool_info.json
     tool_info_content = {
@@ -123,40 +99,7 @@ if __name__ == "__main__":
     }
     
     # Template doc.py
-    doc_content = f'''#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-Hướng dẫn sử dụng: {display_name}
-"""
-
-def get_help():
-    """
-    Trả về hướng dẫn sử dụng tool
-    
-    Returns:
-        str: Nội dung hướng dẫn
-    """
-    return """
-══════════════════════════════════════════════════════════════════════
-  📖 HƯỚNG DẪN SỬ DỤNG: {display_name}
-══════════════════════════════════════════════════════════════════════
-
-📝 MÔ TẢ:
-  {description}
-
-🚀 CÁCH SỬ DỤNG:
-  1. Chọn tool từ menu chính
-  2. [TODO: Thêm hướng dẫn sử dụng]
-
-💡 VÍ DỤ:
-  [TODO: Thêm ví dụ sử dụng]
-
-📌 LƯU Ý:
-  [TODO: Thêm lưu ý nếu có]
-
-══════════════════════════════════════════════════════════════════════
-"""
-'''
+    doc_content = load_template("doc.py.tmpl").substitute(template_vars)
     
     # Ghi các file
     print(f"📁 Đang tạo thư mục: {tool_dir}")
@@ -236,9 +179,8 @@ def main():
         print(f"❌ Tool '{tool_name}' đã tồn tại!")
         return
     
-    display_name = input(f"Tên hiển thị (mặc định: {tool_name.replace('-', ' ').title()}): ").strip()
-    if not display_name:
-        display_name = tool_name.replace('-', ' ').title()
+    default_display_name = tool_name.replace('-', ' ').title()
+    display_name = input(f"Tên hiển thị (mặc định: {default_display_name}): ").strip() or default_display_name
     
     description = input("Mô tả ngắn gọn về tool: ").strip()
     if not description:
@@ -21,7 +21,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils import (
     print_header, format_size, get_user_input, confirm_action,
-    get_folder_size, ensure_directory_exists, ProgressBar,
+    walk_with_sizes, ensure_directory_exists, ProgressBar,
     log_info, log_error, setup_logger, normalize_path
 )
 
@@ -133,9 +133,14 @@ class BackupManager:
             
             log_info(f"Bắt đầu backup: {self.source_path}")
             
-            # Tính dung lượng (với progress)
+            # Tính dung lượng + đếm file trong 1 lần duyệt
+            # (số file dùng lại cho progress bar, không quét lại thư mục)
             print(f"📊 Đang tính dung lượng...")
-            total_size = get_folder_size(str(self.source_path))
+            total_size = 0
+            total_files = 0
+            for _, size in walk_with_sizes(str(self.source_path)):
+                total_size += size
+                total_files += 1
             print(f"   Dung lượng: {format_size(total_size)}")
             log_info(f"Dung lượng nguồn: {format_size(total_size)}")
             
@@ -143,7 +148,8 @@ class BackupManager:
             if exclude_patterns:
                 print(f"\n📦 Đang copy và loại trừ...")
                 backup_file = self._backup_with_exclude(
-                    backup_name, exclude_patterns, compression_format, show_progress
+                    backup_name, exclude_patterns, compression_format, show_progress,
+                    total_files
                 )
             else:
                 print(f"\n📦 Đang nén...")
@@ -231,7 +237,8 @@ class BackupManager:
         backup_name: str,
         exclude_patterns: List[str],
         compression_format: str,
-        show_progress: bool
+        show_progress: bool,
+        total_files: Optional[int] = None
     ) -> Optional[str]:
         """
         Backup với exclude patterns
@@ -241,6 +248,7 @@ class BackupManager:
             exclude_patterns: Danh sách patterns cần loại trừ
             compression_format: Format nén
             show_progress: Hiển thị progress
+            total_files: Số file nguồn đã đếm sẵn (None = tự đếm)
         
         Returns:
             str: Đường dẫn file backup
@@ -265,8 +273,9 @@ class BackupManager:
             
             # Copy với progress
             if show_progress:
-                # Đếm số file để hiển thị progress
-                total_files = sum(1 for _ in self.source_path.rglob('*') if _.is_file())
+                # Đếm số file để hiển thị progress (nếu caller chưa đếm sẵn)
+                if total_files is None:
+                    total_files = sum(1 for _ in walk_with_sizes(str(self.source_path)))
                 progress = ProgressBar(total_files, prefix="Copy file:")
                 
                 # Custom copytree với callback
@@ -294,12 +303,9 @@ class BackupManager:
             return backup_file
             
         except Exception as e:
-            # Cleanup thư mục tạm nếu lỗi
-            if temp_folder.exists():
-                try:
-                    shutil.rmtree(temp_folder)
-                except Exception:
-                    pass
+            # Cleanup thư mục tạm nếu lỗi (ignore_errors: không cần kiểm tra
+            # tồn tại trước, thư mục chưa tạo hoặc xóa dở cũng bỏ qua)
+            shutil.rmtree(temp_folder, ignore_errors=True)
             
             log_error(f"Lỗi khi backup với exclude: {e}")
             return None
@@ -532,9 +538,6 @@ def main_cli(args):
 
 def main():
     """Hàm main"""
-    # Setup logger
-    setup_logger('backup-folder', log_to_console=False)
-    
     # Argument parser
     parser = argparse.ArgumentParser(
         description='Tool backup thư mục với nén',
@@ -564,6 +567,9 @@ Ví dụ:
     
     args, unknown = parser.parse_known_args()
     
+    # Setup logger sau khi parse: --help/lỗi tham số thoát ngay, không tạo file log
+    setup_logger('backup-folder', log_to_console=False)
+    
     if args.source:
         sys.exit(main_cli(args))
     else:
@@ -11,19 +11,25 @@ import os
 import sys
 import datetime
 import argparse
+from array import array
+from itertools import compress
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 # Thêm thư mục cha vào sys.path để import utils
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils import (
     print_header, format_size, get_user_input, confirm_action,
-    get_file_list, ensure_directory_exists, ProgressBar, 
+    get_file_list, ensure_directory_exists, AsyncProgress, 
     log_info, log_error, setup_logger, normalize_path,
     install_library
 )
+from utils.processing import (
+    FREE_THREADED, SEQ_THRESHOLD, get_shared_pool, measure_executor_mode, submit_stream
+)
 
 # Kiểm tra thư viện PIL
 try:
@@ -194,6 +200,103 @@ def compress_single_image(
         return False, str(e), 0, 0
 
 
+# Config nén read-only của worker, nạp 1 lần qua initializer của pool
+_WORKER_CFG: Dict = {}
+
+
+def _init_worker(options_items: tuple):
+    """
+    Initializer chạy 1 lần trong mỗi worker process
+    
+    Args:
+        options_items: Tuple các cặp (key, value) của options nén
+    """
+    global _WORKER_CFG
+    _WORKER_CFG = dict(options_items)
+
+
+def _compress_in_worker(input_path: str, output_path: str) -> Tuple[bool, str, int, int]:
+    """
+    Worker nén một ảnh dùng config đã nạp sẵn (_WORKER_CFG)
+    
+    Giải thích:
+    - Mỗi task chỉ gửi 2 đường dẫn qua IPC, không pickle lại options
+    """
+    return compress_single_image(input_path, output_path, **_WORKER_CFG)
+
+
+class ResultBuffer:
+    """
+    Lưu kết quả nén theo dạng cột (mỗi thuộc tính 1 mảng)
+    
+    Mục đích: Thay list các dict nhỏ cho từng file
+    Lý do: Kích thước lưu trong array('q') (int 64-bit liền nhau, không
+    boxing), tính tổng chỉ là sum() trên mảng phẳng, tốn ít bộ nhớ hơn
+    """
+    
+    def __init__(self):
+        """Khởi tạo buffer rỗng"""
+        self.filenames: List[str] = []
+        self.success = bytearray()          # 1 = thành công, 0 = lỗi
+        self.old_size = array('q')
+        self.new_size = array('q')
+        self.errors: Dict[int, str] = {}    # index -> thông báo lỗi
+    
+    def __len__(self) -> int:
+        return len(self.filenames)
+    
+    def append(self, filename: str, success: bool, old_size: int,
+               new_size: int, error: Optional[str] = None):
+        """
+        Thêm kết quả của một file
+        
+        Args:
+            filename: Tên file
+            success: Nén thành công hay không
+            old_size: Dung lượng gốc (bytes)
+            new_size: Dung lượng mới (bytes, 0 nếu lỗi)
+            error: Thông báo lỗi (nếu có)
+        """
+        if error is not None:
+            self.errors[len(self.filenames)] = error
+        self.filenames.append(filename)
+        self.success.append(1 if success else 0)
+        self.old_size.append(old_size)
+        self.new_size.append(new_size)
+    
+    def totals(self) -> Tuple[int, int, int, int]:
+        """
+        Tính thống kê tổng từ các cột
+        
+        Returns:
+            tuple: (success_count, error_count, total_old_size, total_new_size)
+            (dung lượng chỉ tính các file nén thành công)
+        
+        Giải thích:
+        - sum() trên bytearray/array và itertools.compress chạy ở tầng C,
+          không cần duyệt từng dict hay cộng dồn trong vòng lặp xử lý
+        """
+        success_count = sum(self.success)
+        total_old_size = sum(compress(self.old_size, self.success))
+        total_new_size = sum(compress(self.new_size, self.success))
+        return success_count, len(self) - success_count, total_old_size, total_new_size
+    
+    def reduction(self, index: int) -> float:
+        """
+        Tỷ lệ giảm dung lượng (%) của file tại index
+        
+        Args:
+            index: Vị trí file trong buffer
+        
+        Returns:
+            float: Phần trăm giảm (0 nếu lỗi hoặc file rỗng)
+        """
+        old = self.old_size[index]
+        if not self.success[index] or old <= 0:
+            return 0
+        return ((old - self.new_size[index]) / old) * 100
+
+
 def batch_compress_images(
     input_dir: str,
     output_dir: str,
@@ -204,8 +307,9 @@ def batch_compress_images(
     resize_width: Optional[int] = None,
     resize_height: Optional[int] = None,
     use_multiprocessing: bool = True,
-    max_workers: Optional[int] = None
-) -> Tuple[int, int, int, int, List[Dict]]:
+    max_workers: Optional[int] = None,
+    executor_mode: str = 'auto'
+) -> Tuple[int, int, int, int, ResultBuffer]:
     """
     Nén ảnh hàng loạt
     
@@ -220,14 +324,18 @@ def batch_compress_images(
         resize_height: Chiều cao mới
         use_multiprocessing: Có dùng multiprocessing không
         max_workers: Số workers (None = auto)
+        executor_mode: "auto", "thread" hoặc "process"
     
     Returns:
         tuple: (success_count, error_count, total_old_size, total_new_size, file_details)
-        file_details: List các dict chứa thông tin chi tiết từng file
+        file_details: ResultBuffer chứa thông tin chi tiết từng file
     
     Giải thích:
     - Quét tất cả ảnh trong thư mục
     - Xử lý song song với multiprocessing (nếu enabled)
+    - executor_mode="auto": nén thử ảnh đầu tiên, nếu phần lớn thời gian
+      nằm trong code C của Pillow (nhả GIL) thì dùng thread thay vì process
+    - Python free-threaded (3.13t, GIL tắt): auto luôn chọn thread
     - Hiển thị progress bar
     - Trả về thống kê và danh sách chi tiết từng file
     """
@@ -241,7 +349,7 @@ def batch_compress_images(
     
     if not image_files:
         print("❌ Không tìm thấy ảnh nào!")
-        return 0, 0, 0, 0, []
+        return 0, 0, 0, 0, ResultBuffer()
     
     print(f"📸 Tìm thấy {len(image_files)} ảnh\n")
     log_info(f"Bắt đầu nén {len(image_files)} ảnh")
@@ -250,6 +358,16 @@ def batch_compress_images(
     ensure_directory_exists(output_dir)
     
     # Bước 3: Chuẩn bị tasks
+    # Tham số nén giống nhau cho mọi ảnh -> tạo 1 lần, task chỉ còn cặp đường dẫn
+    options = {
+        'quality': quality,
+        'optimize': optimize,
+        'max_size_kb': max_size_kb,
+        'convert_format': convert_format,
+        'resize_width': resize_width,
+        'resize_height': resize_height
+    }
+    
     tasks = []
     for img_path in image_files:
         filename = os.path.basename(img_path)
@@ -264,151 +382,98 @@ def batch_compress_images(
         
         output_path = os.path.join(output_dir, filename)
         
-        tasks.append({
-            'input_path': img_path,
-            'output_path': output_path,
-            'quality': quality,
-            'optimize': optimize,
-            'max_size_kb': max_size_kb,
-            'convert_format': convert_format,
-            'resize_width': resize_width,
-            'resize_height': resize_height
-        })
+        tasks.append((img_path, output_path))
     
     # Bước 4: Xử lý ảnh
-    success_count = 0
-    error_count = 0
-    total_old_size = 0
-    total_new_size = 0
-    file_details = []  # List để lưu thông tin chi tiết từng file
-    
-    progress = ProgressBar(len(tasks), prefix="Đang xử lý:")
-    progress.update(0)  # Hiển thị progress bar ngay từ đầu
-    
-    if use_multiprocessing and len(tasks) > 1:
-        # Xử lý song song với multiprocessing
-        import multiprocessing
-        if max_workers is None:
-            max_workers = min(multiprocessing.cpu_count(), len(tasks))
+    file_details = ResultBuffer()  # Thông tin chi tiết từng file (dạng cột)
+    
+    # Progress bar vẽ ở thread riêng, vòng lặp thu kết quả chỉ cần notify()
+    progress = AsyncProgress(len(tasks), prefix="Đang xử lý:")
+    
+    # Gán sẵn các hàm dùng mỗi file (tránh tra attribute trong vòng lặp nóng)
+    basename = os.path.basename
+    append_result = file_details.append
+    notify = progress.notify
+    
+    def record(input_path: str, success: bool, message: str, old_size: int, new_size: int):
+        """Ghi nhận kết quả 1 file vào buffer, progress và log"""
+        filename = basename(input_path)
         
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(
-                    compress_single_image,
-                    task['input_path'],
-                    task['output_path'],
-                    task['quality'],
-                    task['optimize'],
-                    task['max_size_kb'],
-                    task['convert_format'],
-                    task['resize_width'],
-                    task['resize_height']
-                ): task for task in tasks
-            }
-            
-            for future in as_completed(futures):
-                task = futures[future]
-                filename = os.path.basename(task['input_path'])
-                
-                try:
-                    success, message, old_size, new_size = future.result()
-                    
-                    if success:
-                        success_count += 1
-                        total_old_size += old_size
-                        total_new_size += new_size
-                        # Lưu thông tin chi tiết
-                        reduction = ((old_size - new_size) / old_size) * 100 if old_size > 0 else 0
-                        file_details.append({
-                            'filename': filename,
-                            'old_size': old_size,
-                            'new_size': new_size,
-                            'reduction': reduction,
-                            'status': 'success'
-                        })
-                        progress.update(message=f"✅ {filename}")
-                        log_info(f"Nén thành công: {filename} - {message}")
-                    else:
-                        error_count += 1
-                        file_details.append({
-                            'filename': filename,
-                            'old_size': old_size if old_size > 0 else os.path.getsize(task['input_path']) if os.path.exists(task['input_path']) else 0,
-                            'new_size': 0,
-                            'reduction': 0,
-                            'status': 'error',
-                            'error': message
-                        })
-                        progress.update(message=f"❌ {filename}: {message}")
-                        log_error(f"Lỗi nén {filename}: {message}")
-                
-                except Exception as e:
-                    error_count += 1
-                    old_size_temp = os.path.getsize(task['input_path']) if os.path.exists(task['input_path']) else 0
-                    file_details.append({
-                        'filename': filename,
-                        'old_size': old_size_temp,
-                        'new_size': 0,
-                        'reduction': 0,
-                        'status': 'error',
-                        'error': str(e)
-                    })
-                    progress.update(message=f"❌ {filename}: {str(e)}")
-                    log_error(f"Exception khi nén {filename}: {str(e)}")
-    else:
-        # Xử lý tuần tự
-        for task in tasks:
-            filename = os.path.basename(task['input_path'])
+        if success:
+            append_result(filename, True, old_size, new_size)
+            notify(f"✅ {filename}")
+            log_info(f"Nén thành công: {filename} - {message}")
+        else:
+            if old_size <= 0:
+                old_size = os.path.getsize(input_path) if os.path.exists(input_path) else 0
+            append_result(filename, False, old_size, 0, message)
+            notify(f"❌ {filename}: {message}")
+            log_error(f"Lỗi nén {filename}: {message}")
+    
+    auto_workers = max_workers is None
+    if auto_workers:
+        max_workers = min(os.cpu_count() or 1, len(tasks))
+    
+    def collect(executor, worker, task_iter):
+        """Submit task theo luồng và ghi nhận kết quả khi từng task xong"""
+        # Chỉ giữ tối đa 2*max_workers future đang chạy, task mới được
+        # submit khi có task hoàn thành -> bộ nhớ O(max_workers)
+        for (input_path, _), future in submit_stream(executor, worker, task_iter, max_workers * 2):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = (False, str(e), 0, 0)
+            record(input_path, *result)
+    
+    # finally: lỗi hoặc Ctrl+C giữa chừng vẫn dừng thread vẽ progress
+    try:
+        # Batch nhỏ hoặc chỉ 1 worker: xử lý tuần tự nhanh hơn tạo pool
+        if use_multiprocessing and max_workers > 1 and len(tasks) > SEQ_THRESHOLD:
+            # Xử lý song song với multiprocessing
+            task_iter = iter(tasks)
             
-            success, message, old_size, new_size = compress_single_image(
-                task['input_path'],
-                task['output_path'],
-                task['quality'],
-                task['optimize'],
-                task['max_size_kb'],
-                task['convert_format'],
-                task['resize_width'],
-                task['resize_height']
-            )
+            # Auto: xử lý ảnh đầu tiên tại chỗ để đo CPU/wall và chọn executor
+            if executor_mode == 'auto':
+                input_path, output_path = next(task_iter)
+                result, executor_mode = measure_executor_mode(
+                    compress_single_image, input_path, output_path, **options
+                )
+                record(input_path, *result)
+                log_info(f"Chế độ xử lý song song: {executor_mode}")
             
-            if success:
-                success_count += 1
-                total_old_size += old_size
-                total_new_size += new_size
-                # Lưu thông tin chi tiết
-                reduction = ((old_size - new_size) / old_size) * 100 if old_size > 0 else 0
-                file_details.append({
-                    'filename': filename,
-                    'old_size': old_size,
-                    'new_size': new_size,
-                    'reduction': reduction,
-                    'status': 'success'
-                })
-                progress.update(message=f"✅ {filename}")
-                log_info(f"Nén thành công: {filename} - {message}")
+            if executor_mode == 'thread':
+                # Free-threaded Python (3.13t): thread song song thật, dùng nhiều
+                # worker hơn để phủ cả thời gian chờ I/O
+                if FREE_THREADED and auto_workers:
+                    max_workers = min((os.cpu_count() or 1) * 2, len(tasks))
+                # Pool thread chỉ dùng cho batch này: with đảm bảo shutdown kể cả khi lỗi
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    collect(executor, partial(compress_single_image, **options), task_iter)
             else:
-                error_count += 1
-                file_details.append({
-                    'filename': filename,
-                    'old_size': old_size if old_size > 0 else os.path.getsize(task['input_path']) if os.path.exists(task['input_path']) else 0,
-                    'new_size': 0,
-                    'reduction': 0,
-                    'status': 'error',
-                    'error': message
-                })
-                progress.update(message=f"❌ {filename}: {message}")
-                log_error(f"Lỗi nén {filename}: {message}")
-    
-    progress.finish()
-    
-    return success_count, error_count, total_old_size, total_new_size, file_details
+                # Options nạp vào worker qua initializer, pool giữ lại nếu options không đổi
+                executor = get_shared_pool(
+                    max_workers,
+                    initializer=_init_worker,
+                    initargs=(tuple(sorted(options.items())),)
+                )
+                collect(executor, _compress_in_worker, task_iter)
+        else:
+            # Xử lý tuần tự
+            for input_path, output_path in tasks:
+                record(input_path, *compress_single_image(input_path, output_path, **options))
+    finally:
+        progress.finish()
+    
+    # Thống kê tổng tính 1 lần từ buffer dạng cột
+    return (*file_details.totals(), file_details)
 
 
-def print_detailed_statistics(file_details: List[Dict]):
+def print_detailed_statistics(file_details: ResultBuffer):
     """
     Hiển thị bảng thống kê chi tiết từng file ảnh đã nén
     
     Args:
-        file_details: List các dict chứa thông tin chi tiết từng file
+        file_details: ResultBuffer chứa thông tin chi tiết từng file
     
     Giải thích:
     - Sắp xếp theo tên file
@@ -417,47 +482,51 @@ def print_detailed_statistics(file_details: List[Dict]):
     if not file_details:
         return
     
-    print(f"\n{'='*80}")
-    print("📊 THỐNG KÊ CHI TIẾT TỪNG FILE ẢNH")
-    print(f"{'='*80}\n")
+    filenames = file_details.filenames
     
-    # Sắp xếp theo tên file
-    sorted_details = sorted(file_details, key=lambda x: x['filename'].lower())
+    # Sắp xếp index theo tên file (không copy dữ liệu các cột)
+    sorted_indexes = sorted(range(len(filenames)), key=lambda i: filenames[i].lower())
     
     # Tính độ rộng cột (giới hạn tối đa 50 ký tự để bảng không quá rộng)
-    max_filename_len = max(len(d['filename']) for d in sorted_details)
+    max_filename_len = max(len(name) for name in filenames)
     max_filename_len = min(max(max_filename_len, 25), 50)  # Tối thiểu 25, tối đa 50 ký tự
     
-    # In header
     header = f"{'STT':<5} | {'Tên file':<{max_filename_len}} | {'Dung lượng gốc':<15} | {'Dung lượng mới':<15} | {'Tỷ lệ giảm':<12} | {'Trạng thái'}"
-    print(header)
-    print("-" * len(header))
     
-    # In từng dòng
-    for idx, detail in enumerate(sorted_details, 1):
-        filename = detail['filename']
+    # Gom toàn bộ bảng vào list rồi in 1 lần (1 lần ghi thay vì mỗi dòng 1 lần)
+    lines = [
+        f"\n{'='*80}",
+        "📊 THỐNG KÊ CHI TIẾT TỪNG FILE ẢNH",
+        f"{'='*80}\n",
+        header,
+        "-" * len(header)
+    ]
+    
+    for idx, i in enumerate(sorted_indexes, 1):
+        filename = filenames[i]
         # Rút ngắn tên file nếu quá dài
         if len(filename) > max_filename_len:
             filename = filename[:max_filename_len-3] + "..."
         
-        old_size_str = format_size(detail['old_size'])
-        new_size_str = format_size(detail['new_size']) if detail['status'] == 'success' else "N/A"
+        old_size_str = format_size(file_details.old_size[i])
         
-        if detail['status'] == 'success':
-            reduction_str = f"-{detail['reduction']:.1f}%"
+        if file_details.success[i]:
+            new_size_str = format_size(file_details.new_size[i])
+            reduction_str = f"-{file_details.reduction(i):.1f}%"
             status_str = "✅ Thành công"
         else:
+            new_size_str = "N/A"
             reduction_str = "N/A"
-            error_msg = detail.get('error', 'Lỗi không xác định')
+            error_msg = file_details.errors.get(i, 'Lỗi không xác định')
             # Rút ngắn thông báo lỗi để phù hợp với cột
             if len(error_msg) > 25:
                 error_msg = error_msg[:22] + "..."
             status_str = f"❌ {error_msg}"
         
-        row = f"{idx:<5} | {filename:<{max_filename_len}} | {old_size_str:<15} | {new_size_str:<15} | {reduction_str:<12} | {status_str}"
-        print(row)
+        lines.append(f"{idx:<5} | {filename:<{max_filename_len}} | {old_size_str:<15} | {new_size_str:<15} | {reduction_str:<12} | {status_str}")
     
-    print(f"\n{'='*80}\n")
+    lines.append(f"\n{'='*80}\n")
+    print("\n".join(lines))
 
 
 def main_interactive():
@@ -554,18 +623,21 @@ def main_interactive():
         convert_format, resize_width, resize_height, use_multiprocessing
     )
     
-    # Hiển thị kết quả tổng quan
-    print(f"\n{'='*60}")
-    print(f"✅ Hoàn thành!")
-    print(f"   - Thành công: {success} ảnh")
-    print(f"   - Lỗi: {errors} ảnh")
-    print(f"   - Dung lượng gốc: {format_size(old_size)}")
-    print(f"   - Dung lượng mới: {format_size(new_size)}")
+    # Hiển thị kết quả tổng quan (gom lại in 1 lần)
+    lines = [
+        f"\n{'='*60}",
+        "✅ Hoàn thành!",
+        f"   - Thành công: {success} ảnh",
+        f"   - Lỗi: {errors} ảnh",
+        f"   - Dung lượng gốc: {format_size(old_size)}",
+        f"   - Dung lượng mới: {format_size(new_size)}"
+    ]
     if old_size > 0:
         reduction = ((old_size - new_size) / old_size) * 100
-        print(f"   - Tiết kiệm: {format_size(old_size - new_size)} ({reduction:.1f}%)")
-    print(f"   - Thư mục: {output_dir}")
-    print(f"{'='*60}")
+        lines.append(f"   - Tiết kiệm: {format_size(old_size - new_size)} ({reduction:.1f}%)")
+    lines.append(f"   - Thư mục: {output_dir}")
+    lines.append(f"{'='*60}")
+    print("\n".join(lines))
     
     # Hiển thị thống kê chi tiết từng file
     print_detailed_statistics(file_details)
@@ -599,7 +671,8 @@ def main_cli(args):
         args.format,
         args.width,
         args.height,
-        not args.no_multiprocessing
+        not args.no_multiprocessing,
+        executor_mode=args.executor
     )
     
     # Hiển thị kết quả ngắn gọn
@@ -619,9 +692,6 @@ def main():
     - Nếu có arguments -> CLI mode
     - Nếu không -> Interactive mode
     """
-    # Setup logger
-    setup_logger('compress-images', log_to_console=False)
-    
     # Tạo argument parser
     parser = argparse.ArgumentParser(
         description='Tool nén và chỉnh sửa ảnh hàng loạt',
@@ -655,10 +725,15 @@ Ví dụ:
     parser.add_argument('-H', '--height', type=int, help='Chiều cao mới (px)')
     parser.add_argument('--no-multiprocessing', action='store_true',
                        help='Tắt multiprocessing')
+    parser.add_argument('--executor', choices=['auto', 'thread', 'process'], default='auto',
+                       help='Loại executor khi xử lý song song (mặc định: auto)')
     
     # Parse arguments
     args, unknown = parser.parse_known_args()
     
+    # Setup logger sau khi parse: --help/lỗi tham số thoát ngay, không tạo file log
+    setup_logger('compress-images', log_to_console=False)
+    
     # Nếu có -i thì dùng CLI mode
     if args.input:
         if not args.output:
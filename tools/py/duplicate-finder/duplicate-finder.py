@@ -14,15 +14,16 @@ import argparse
 from pathlib import Path
 from collections import defaultdict
 from typing import Dict, List, Tuple, Optional
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Thêm thư mục cha vào sys.path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils import (
     print_header, format_size, get_user_input, confirm_action,
-    ProgressBar, log_info, log_error, setup_logger, safe_delete, normalize_path
+    ProgressBar, log_info, log_error, setup_logger, safe_delete, normalize_path,
+    walk_with_sizes
 )
+from utils.processing import SEQ_THRESHOLD, get_shared_pool
 
 
 def get_file_hash(file_path: str, hash_algo: str = 'md5', chunk_size: int = 8192) -> Optional[str]:
@@ -80,7 +81,12 @@ def get_file_hash_with_size(args: Tuple[str, int, str]) -> Tuple[str, Optional[s
     - Trả về cả path và hash và size
     """
     file_path, size, hash_algo = args
-    file_hash = get_file_hash(file_path, hash_algo)
+    try:
+        file_hash = get_file_hash(file_path, hash_algo)
+    except Exception as e:
+        # executor.map dừng toàn bộ khi một task raise, nên trả về None thay vì raise
+        log_error(f"Lỗi khi hash {file_path}: {e}")
+        file_hash = None
     return file_path, file_hash, size
 
 
@@ -108,6 +114,29 @@ class DuplicateFinder:
         self.hash_algo = hash_algo
         self.file_count = 0
     
+    def _group_by_size(self, size_dict: Dict[int, List[str]]):
+        """
+        Quét thư mục và group file theo size vào size_dict
+        
+        Args:
+            size_dict: Dict {size: [file_paths]} để ghi kết quả
+        """
+        # Gán sẵn biến local cho vòng lặp nóng (tránh tra attribute mỗi file)
+        min_size = self.min_size
+        file_count = self.file_count
+        
+        for file_path, size in walk_with_sizes(self.folder_path, recursive=self.recursive):
+            if size < min_size:
+                continue
+            
+            size_dict[size].append(file_path)
+            file_count += 1
+            
+            if file_count % 100 == 0:
+                print(f"   Đã quét {file_count} file...", end='\r')
+        
+        self.file_count = file_count
+    
     def find_by_size_first(self, use_multiprocessing: bool = True) -> Dict[str, List[Tuple[str, int]]]:
         """
         Tìm duplicate bằng cách filter theo size trước
@@ -129,39 +158,7 @@ class DuplicateFinder:
         print("🔍 Bước 1: Quét và group theo kích thước...\n")
         size_dict = defaultdict(list)
         
-        if self.recursive:
-            for root, dirs, files in os.walk(self.folder_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        size = os.path.getsize(file_path)
-                        
-                        if size < self.min_size:
-                            continue
-                        
-                        size_dict[size].append(file_path)
-                        self.file_count += 1
-                        
-                        if self.file_count % 100 == 0:
-                            print(f"   Đã quét {self.file_count} file...", end='\r')
-                    
-                    except (OSError, PermissionError):
-                        pass
-        else:
-            for file in os.listdir(self.folder_path):
-                file_path = os.path.join(self.folder_path, file)
-                if os.path.isfile(file_path):
-                    try:
-                        size = os.path.getsize(file_path)
-                        
-                        if size < self.min_size:
-                            continue
-                        
-                        size_dict[size].append(file_path)
-                        self.file_count += 1
-                    
-                    except (OSError, PermissionError):
-                        pass
+        self._group_by_size(size_dict)
         
         print(f"   Đã quét {self.file_count} file.       ")
         
@@ -182,7 +179,10 @@ class DuplicateFinder:
         # Bước 2: Hash các file có cùng size
         hash_dict = defaultdict(list)
         
-        if use_multiprocessing and files_to_hash > 5:
+        max_workers = min(os.cpu_count() or 1, files_to_hash)
+        
+        # Ít file hoặc chỉ 1 CPU: xử lý tuần tự nhanh hơn tạo pool
+        if use_multiprocessing and max_workers > 1 and files_to_hash > SEQ_THRESHOLD:
             # Sử dụng multiprocessing
             progress = ProgressBar(files_to_hash, prefix="Tính hash:")
             
@@ -193,24 +193,18 @@ class DuplicateFinder:
                     tasks.append((file_path, size, self.hash_algo))
             
             # Xử lý song song
-            import multiprocessing
-            max_workers = min(multiprocessing.cpu_count(), files_to_hash)
             
-            with ProcessPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(get_file_hash_with_size, task) for task in tasks]
+            # Gom nhiều file vào một lần gửi sang worker để giảm chi phí IPC/pickle
+            chunksize = max(1, len(tasks) // (max_workers * 4))
+            
+            executor = get_shared_pool(max_workers)
+            update = progress.update
+            for file_path, file_hash, size in executor.map(
+                    get_file_hash_with_size, tasks, chunksize=chunksize):
+                if file_hash:
+                    hash_dict[file_hash].append((file_path, size))
                 
-                for future in as_completed(futures):
-                    try:
-                        file_path, file_hash, size = future.result()
-                        
-                        if file_hash:
-                            hash_dict[file_hash].append((file_path, size))
-                        
-                        progress.update()
-                    
-                    except Exception as e:
-                        log_error(f"Lỗi khi hash: {e}")
-                        progress.update()
+                update()
             
             progress.finish()
         
@@ -218,12 +212,14 @@ class DuplicateFinder:
             # Xử lý tuần tự
             progress = ProgressBar(files_to_hash, prefix="Tính hash:")
             
+            hash_algo = self.hash_algo
+            update = progress.update
             for size, file_paths in potential_duplicates.items():
                 for file_path in file_paths:
-                    file_hash = get_file_hash(file_path, self.hash_algo)
+                    file_hash = get_file_hash(file_path, hash_algo)
                     if file_hash:
                         hash_dict[file_hash].append((file_path, size))
-                    progress.update()
+                    update()
             
             progress.finish()
         
@@ -251,39 +247,7 @@ class DuplicateFinder:
         
         size_dict = defaultdict(list)
         
-        if self.recursive:
-            for root, dirs, files in os.walk(self.folder_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        size = os.path.getsize(file_path)
-                        
-                        if size < self.min_size:
-                            continue
-                        
-                        size_dict[size].append(file_path)
-                        self.file_count += 1
-                        
-                        if self.file_count % 100 == 0:
-                            print(f"   Đã quét {self.file_count} file...", end='\r')
-                    
-                    except (OSError, PermissionError):
-                        pass
-        else:
-            for file in os.listdir(self.folder_path):
-                file_path = os.path.join(self.folder_path, file)
-                if os.path.isfile(file_path):
-                    try:
-                        size = os.path.getsize(file_path)
-                        
-                        if size < self.min_size:
-                            continue
-                        
-                        size_dict[size].append(file_path)
-                        self.file_count += 1
-                    
-                    except (OSError, PermissionError):
-                        pass
+        self._group_by_size(size_dict)
         
         print(f"   Đã quét {self.file_count} file.       ")
         
@@ -604,8 +568,6 @@ def main_cli(args):
 
 def main():
     """Hàm main"""
-    setup_logger('duplicate-finder', log_to_console=False)
-    
     parser = argparse.ArgumentParser(description='Tool tìm file trùng lặp')
     parser.add_argument('directory', nargs='?', help='Thư mục cần quét')
     parser.add_argument('--sha256', action='store_true', help='Dùng SHA256 thay vì MD5')
@@ -618,6 +580,9 @@ def main():
     
     args = parser.parse_args()
     
+    # Setup logger sau khi parse: --help/lỗi tham số thoát ngay, không tạo file log
+    setup_logger('duplicate-finder', log_to_console=False)
+    
     if args.directory:
         main_cli(args)
     else:
@@ -14,7 +14,7 @@ from pathlib import Path
 # Thêm thư mục cha vào sys.path để import utils
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from utils import install_library
+from utils import install_library, is_module_available
 
 
 def print_header():
@@ -32,11 +32,10 @@ def check_dependencies():
     Returns:
         bool: True nếu đủ dependencies
     """
-    try:
-        # Thử import fonttools
-        import fontTools
+    # Kiểm tra fonttools (không import, chỉ tìm module)
+    if is_module_available('fontTools'):
         print("✅ Thư viện fonttools: OK")
-    except ImportError:
+    else:
         install_library(
             package_name="fonttools",
             install_command="pip install fonttools",
@@ -44,11 +43,10 @@ def check_dependencies():
         )
         return False
     
-    try:
-        # Thử import brotli (cho WOFF2)
-        import brotli
+    # Kiểm tra brotli (cho WOFF2)
+    if is_module_available('brotli'):
         print("✅ Thư viện brotli: OK")
-    except ImportError:
+    else:
         print("⚠️  Thư viện brotli chưa được cài (cần cho WOFF2)")
         if install_library(
             package_name="brotli",
@@ -1175,9 +1175,6 @@ def main_cli(args):
 
 def main():
     """Hàm main"""
-    # Setup logger
-    setup_logger('git-push-source', log_to_console=False)
-    
     # Argument parser
     parser = argparse.ArgumentParser(
         description='Tool kết nối Git và push source code lên repository',
@@ -1222,6 +1219,9 @@ Ví dụ:
     
     args, unknown = parser.parse_known_args()
     
+    # Setup logger sau khi parse: --help/lỗi tham số thoát ngay, không tạo file log
+    setup_logger('git-push-source', log_to_console=False)
+    
     if any([args.clone, args.init, args.setup_remote, args.add, args.commit, args.push, args.status]):
         sys.exit(main_cli(args))
     else:
@@ -13,7 +13,7 @@ from pathlib import Path
 # Thêm thư mục cha vào sys.path để import utils
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from utils import install_library
+from utils import install_library, is_module_available
 
 
 def get_templates_file():
@@ -76,16 +76,15 @@ def check_dependencies():
     Mục đích: Đảm bảo user đã cài Pillow
     Lý do: Pillow cần thiết cho xử lý ảnh
     """
-    try:
-        from PIL import Image
+    if is_module_available('PIL'):
         return True
-    except ImportError:
-        install_library(
-            package_name="Pillow",
-            install_command="pip install Pillow",
-            library_display_name="Pillow"
-        )
-        return False
+    
+    install_library(
+        package_name="Pillow",
+        install_command="pip install Pillow",
+        library_display_name="Pillow"
+    )
+    return False
 
 
 def format_size(size_bytes):
@@ -32,7 +32,8 @@ def check_dependencies():
         bool: True nếu đủ dependencies
     """
     try:
-        # Thử import pydub (để xử lý audio)
+        # Import thật thay vì chỉ tìm module: pydub có thể cài rồi nhưng import lỗi
+        # (vd: Python 3.13 bỏ audioop)
         import pydub
         print("✅ Thư viện pydub: OK")
     except ImportError:
@@ -44,7 +45,8 @@ def check_dependencies():
         return False
     
     try:
-        # Thử import moviepy (để xử lý video)
+        # Thử import moviepy (để xử lý video); "from moviepy import ..." chỉ có từ
+        # moviepy 2.x, bản 1.x cũng báo thiếu để cài lại
         from moviepy import VideoFileClip
         print("✅ Thư viện moviepy: OK")
     except ImportError:
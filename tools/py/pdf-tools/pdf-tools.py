@@ -12,7 +12,7 @@ from pathlib import Path
 # Thêm thư mục cha vào sys.path để import utils
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from utils import install_library
+from utils import install_library, is_module_available
 
 
 def print_header():
@@ -30,9 +30,7 @@ def check_dependencies():
     Mục đích: Đảm bảo user đã cài đủ thư viện
     Lý do: PyPDF2 và Pillow cần thiết cho tool
     """
-    try:
-        import PyPDF2
-    except ImportError:
+    if not is_module_available('PyPDF2'):
         install_library(
             package_name="PyPDF2",
             install_command="pip install PyPDF2",
@@ -40,9 +38,7 @@ def check_dependencies():
         )
         return False
     
-    try:
-        from PIL import Image
-    except ImportError:
+    if not is_module_available('PIL'):
         install_library(
             package_name="Pillow",
             install_command="pip install Pillow",
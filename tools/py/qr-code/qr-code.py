@@ -10,7 +10,6 @@ Lý do: Marketing, thanh toán, chia sẻ link, quét mã hàng loạt
 import os
 import sys
 import time
-import argparse
 import contextlib
 import shutil
 import csv
@@ -19,6 +18,7 @@ import re
 from pathlib import Path
 from typing import List, Tuple, Optional, TYPE_CHECKING, Dict
 from datetime import datetime
+from functools import lru_cache
 
 # Import Image cho type hint (nếu có)
 if TYPE_CHECKING:
@@ -30,37 +30,28 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from utils import (
     print_header, get_user_input, confirm_action,
     ensure_directory_exists, log_info, log_error, normalize_path,
-    install_library
+    install_library, is_module_available
 )
 from utils.colors import Colors
 
 # ==================== QR CODE GENERATOR ====================
 
-# Kiểm tra thư viện tạo QR code
-try:
-    import qrcode
-    from PIL import Image
-    QRCODE_GEN_AVAILABLE = True
-except ImportError:
-    QRCODE_GEN_AVAILABLE = False
-    qrcode = None  # Set to None nếu không có
-    Image = None  # Set to None nếu không có
+# Kiểm tra thư viện tạo QR code (chỉ dò, chưa import)
+# qrcode được import trong hàm tạo QR, Pillow ở lần đầu cần xử lý ảnh
+# (xem _load_image_lib): --help và lỗi tham số không phải import chúng
+QRCODE_GEN_AVAILABLE = is_module_available('qrcode') and is_module_available('PIL')
+Image = None
 
-# Kiểm tra thư viện giải mã QR code
-try:
-    import cv2
-    import numpy as np
-    from pyzbar.pyzbar import decode
-    QRCODE_DECODE_AVAILABLE = True
-except ImportError:
-    QRCODE_DECODE_AVAILABLE = False
+# Kiểm tra thư viện giải mã QR code (chỉ dò, chưa import)
+# cv2 + numpy + pyzbar import mất hàng trăm ms nên chỉ import ở lần giải mã
+# đầu tiên (xem _load_decode_libs), chế độ tạo QR code không phải trả chi phí này
+QRCODE_DECODE_AVAILABLE = all(is_module_available(name) for name in ('cv2', 'numpy', 'pyzbar'))
+cv2 = None
+np = None
+decode = None
 
-# OCR tùy chọn
-try:
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+# OCR tùy chọn (import trong decode_with_ocr khi cần)
+OCR_AVAILABLE = is_module_available('pytesseract')
 
 # Clipboard (tùy chọn)
 try:
@@ -76,6 +67,25 @@ CSV_AVAILABLE = True  # Built-in module
 
 # ==================== HÀM TẠO QR CODE ====================
 
+def _load_image_lib() -> bool:
+    """
+    Import PIL.Image ở lần gọi đầu tiên
+    
+    Returns:
+        bool: True nếu dùng được Pillow
+    
+    Giải thích:
+    - Gán vào biến global Image, các hàm xử lý ảnh dùng Image như trước
+    """
+    global Image
+    if Image is None:
+        try:
+            from PIL import Image
+        except ImportError:
+            return False
+    return True
+
+
 def create_qr_code(
     data: str,
     output_path: str,
@@ -89,7 +99,7 @@ def create_qr_code(
     logo_size_ratio: float = 0.3
 ) -> Tuple[bool, str]:
     """Tạo QR code từ dữ liệu"""
-    if not QRCODE_GEN_AVAILABLE:
+    if not QRCODE_GEN_AVAILABLE or not _load_image_lib():
         return False, "Thiếu thư viện qrcode. Cài đặt: pip install qrcode[pil]"
     
     # Import qrcode module vào local scope để tránh UnboundLocalError
@@ -316,6 +326,32 @@ def create_url_qr(url: str) -> str:
 
 # ==================== HÀM GIẢI MÃ QR CODE ====================
 
+def _load_decode_libs() -> bool:
+    """
+    Import cv2, numpy, pyzbar (và Pillow) ở lần gọi đầu tiên
+    
+    Returns:
+        bool: True nếu dùng được các thư viện giải mã
+    
+    Giải thích:
+    - Gán vào biến global cv2/np/decode, các lần gọi sau chỉ kiểm tra decode
+    - pyzbar có thể đã cài nhưng thiếu thư viện zbar của hệ thống (ImportError
+      khi import), lúc đó đánh dấu QRCODE_DECODE_AVAILABLE = False
+    """
+    global cv2, np, decode, QRCODE_DECODE_AVAILABLE
+    if decode is None and QRCODE_DECODE_AVAILABLE:
+        try:
+            import cv2
+            import numpy as np
+            from pyzbar.pyzbar import decode
+        except ImportError:
+            QRCODE_DECODE_AVAILABLE = False
+        else:
+            # Ảnh được đọc bằng Pillow trước khi đưa vào pyzbar
+            QRCODE_DECODE_AVAILABLE = _load_image_lib()
+    return QRCODE_DECODE_AVAILABLE
+
+
 def decode_safe(pil_img):
     """Giải mã barcode bằng pyzbar, ẩn cảnh báo stderr"""
     with contextlib.redirect_stderr(open(os.devnull, 'w')):
@@ -383,6 +419,7 @@ def decode_with_ocr(image_path):
         return []
     
     try:
+        import pytesseract
         ocr_text = pytesseract.image_to_string(Image.open(image_path))
         import re
         text = ocr_text.upper().replace('\n', ' ').replace('\r', ' ').strip()
@@ -395,7 +432,7 @@ def decode_with_ocr(image_path):
 
 def process_image(image_path: Path) -> Tuple[List, Optional[str], str]:
     """Xử lý từng ảnh để giải mã barcode/QR code"""
-    if not QRCODE_DECODE_AVAILABLE:
+    if not _load_decode_libs():
         return [], None, "Thiếu thư viện. Cài đặt: pip install opencv-python pyzbar pillow numpy"
     
     try:
@@ -640,7 +677,7 @@ def process_directory_with_export(directory: Path, output_format: str = "txt",
 
 def decode_from_webcam():
     """Đọc QR code từ webcam"""
-    if not QRCODE_DECODE_AVAILABLE:
+    if not _load_decode_libs():
         print(Colors.error("❌ Cần cài đặt: pip install opencv-python pyzbar pillow numpy"))
         return
     
@@ -993,7 +1030,7 @@ def mode_decode():
     print(Colors.primary("  📷 GIẢI MÃ MÃ VẠCH VÀ QR CODE TỪ ẢNH"))
     print()
     
-    if not QRCODE_DECODE_AVAILABLE:
+    if not _load_decode_libs():
         install_library(
             package_name="opencv-python pyzbar pillow numpy",
             install_command="pip install opencv-python pyzbar pillow numpy",
@@ -1041,7 +1078,7 @@ def mode_decode_with_export():
     print(Colors.primary("  📷 GIẢI MÃ VÀ XUẤT KẾT QUẢ RA JSON/CSV"))
     print()
     
-    if not QRCODE_DECODE_AVAILABLE:
+    if not _load_decode_libs():
         install_library(
             package_name="opencv-python pyzbar pillow numpy",
             install_command="pip install opencv-python pyzbar pillow numpy",
@@ -1386,7 +1423,7 @@ def main_cli(args):
             print(Colors.error(f"❌ Thư mục không tồn tại: {args.directory}"))
             return 1
         
-        if hasattr(args, 'export') and args.export:
+        if getattr(args, 'export', None):
             process_directory_with_export(directory_path, args.export, move_success=args.move_success)
         else:
             process_directory(directory_path, move_success=args.move_success)
@@ -1447,8 +1484,106 @@ def main_cli(args):
         return 1
 
 
-def main():
-    """Hàm main"""
+def _run_interactive():
+    """Chạy chế độ interactive (bắt Ctrl+C và lỗi không mong muốn)"""
+    try:
+        main_interactive()
+    except KeyboardInterrupt:
+        print(Colors.warning("\n⚠️  Đã hủy bởi người dùng!"))
+        sys.exit(130)
+    except Exception as e:
+        log_error(f"❌ Lỗi không mong muốn: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+def _add_generate_args(gen_parser):
+    """Khai báo tham số cho subcommand generate"""
+    gen_parser.add_argument('-d', '--data', required=True, help='Nội dung cần tạo QR code')
+    gen_parser.add_argument('-o', '--output', help='Đường dẫn file lưu (mặc định: qr_code.png)')
+    gen_parser.add_argument('-s', '--size', type=int, default=10, help='Kích thước box (mặc định: 10)')
+    gen_parser.add_argument('-b', '--border', type=int, default=4, help='Độ dày border (mặc định: 4)')
+    gen_parser.add_argument('-e', '--error-correction', choices=['L', 'M', 'Q', 'H'], default='M',
+                          help='Mức sửa lỗi: L (~7%%), M (~15%%), Q (~25%%), H (~30%%)')
+    gen_parser.add_argument('--fill-color', default='black', help='Màu mã QR (mặc định: black)')
+    gen_parser.add_argument('--back-color', default='white', help='Màu nền (mặc định: white)')
+    gen_parser.add_argument('--logo', help='Đường dẫn logo (tùy chọn)')
+    gen_parser.add_argument('--logo-size', type=float, default=0.3,
+                          help='Tỷ lệ logo (0.1-0.4, mặc định: 0.3)')
+
+
+def _add_decode_args(dec_parser):
+    """Khai báo tham số cho subcommand decode"""
+    dec_parser.add_argument('--directory', '-d', required=True, help='Thư mục chứa ảnh')
+    dec_parser.add_argument('--no-move', dest='move_success', action='store_false',
+                          help='Không di chuyển ảnh thành công vào thư mục ok')
+    dec_parser.add_argument('--export', choices=['json', 'csv', 'both'], 
+                          help='Xuất kết quả ra JSON/CSV')
+    dec_parser.set_defaults(move_success=True)
+
+
+def _add_batch_args(batch_parser):
+    """Khai báo tham số cho subcommand batch"""
+    batch_parser.add_argument('-i', '--input', required=True, help='File CSV hoặc Text')
+    batch_parser.add_argument('-o', '--output', default='./qr_batch_output', help='Thư mục output')
+    batch_parser.add_argument('-s', '--size', type=int, default=10, help='Kích thước box')
+    batch_parser.add_argument('-b', '--border', type=int, default=4, help='Độ dày border')
+
+
+def _add_clipboard_args(clipboard_parser):
+    """Khai báo tham số cho subcommand clipboard"""
+    clipboard_parser.add_argument('-o', '--output', default='qr_clipboard.png', help='File output')
+
+
+# Subcommand -> (help, hàm khai báo tham số), theo thứ tự hiển thị trong --help
+_SUBCOMMANDS = {
+    'generate': ('Tạo QR code', _add_generate_args),
+    'decode': ('Giải mã QR code từ ảnh', _add_decode_args),
+    'batch': ('Tạo QR code hàng loạt từ CSV/Text', _add_batch_args),
+    'webcam': ('Đọc QR code từ webcam', None),
+    'clipboard': ('Tạo QR code từ clipboard', _add_clipboard_args),
+}
+
+
+def _sniff_subcommand(argv: List[str]) -> Optional[str]:
+    """
+    Tìm subcommand trong argv mà không cần dựng parser
+    
+    Args:
+        argv: Tham số dòng lệnh (không gồm tên script)
+    
+    Returns:
+        str hoặc None: Tên subcommand hợp lệ, None nếu không có/không hợp lệ
+    
+    Giải thích:
+    - Parser gốc chỉ có -h nên token đầu tiên không bắt đầu bằng "-"
+      chính là subcommand
+    """
+    token = next((arg for arg in argv if not arg.startswith('-')), None)
+    return token if token in _SUBCOMMANDS else None
+
+
+@lru_cache(maxsize=None)
+def _build_parser(selected: Optional[str] = None):
+    """
+    Dựng ArgumentParser cho CLI (1 lần mỗi process cho mỗi subcommand)
+    
+    Args:
+        selected: Subcommand sẽ chạy (từ _sniff_subcommand), None = khai báo đủ tất cả
+    
+    Returns:
+        argparse.ArgumentParser: Parser với 5 subcommand
+    
+    Giải thích:
+    - argparse chỉ được import ở đây: chế độ interactive không cần nó
+    - Subparser nào cũng được tạo (để --help gốc và thông báo lỗi liệt kê đủ),
+      nhưng chỉ subcommand được chọn mới khai báo tham số
+    - lru_cache: gọi main() nhiều lần trong cùng process (script, test)
+      chỉ dựng parser 1 lần, các lần sau chỉ còn parse_args
+    """
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description='Tool tạo và giải mã QR Code - Đa dụng',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1479,58 +1614,32 @@ Ví dụ:
     
     subparsers = parser.add_subparsers(dest='mode', help='Chế độ hoạt động')
     
-    # Parser cho generate
-    gen_parser = subparsers.add_parser('generate', help='Tạo QR code')
-    gen_parser.add_argument('-d', '--data', required=True, help='Nội dung cần tạo QR code')
-    gen_parser.add_argument('-o', '--output', help='Đường dẫn file lưu (mặc định: qr_code.png)')
-    gen_parser.add_argument('-s', '--size', type=int, default=10, help='Kích thước box (mặc định: 10)')
-    gen_parser.add_argument('-b', '--border', type=int, default=4, help='Độ dày border (mặc định: 4)')
-    gen_parser.add_argument('-e', '--error-correction', choices=['L', 'M', 'Q', 'H'], default='M',
-                          help='Mức sửa lỗi: L (~7%%), M (~15%%), Q (~25%%), H (~30%%)')
-    gen_parser.add_argument('--fill-color', default='black', help='Màu mã QR (mặc định: black)')
-    gen_parser.add_argument('--back-color', default='white', help='Màu nền (mặc định: white)')
-    gen_parser.add_argument('--logo', help='Đường dẫn logo (tùy chọn)')
-    gen_parser.add_argument('--logo-size', type=float, default=0.3,
-                          help='Tỷ lệ logo (0.1-0.4, mặc định: 0.3)')
-    
-    # Parser cho decode
-    dec_parser = subparsers.add_parser('decode', help='Giải mã QR code từ ảnh')
-    dec_parser.add_argument('--directory', '-d', required=True, help='Thư mục chứa ảnh')
-    dec_parser.add_argument('--no-move', dest='move_success', action='store_false',
-                          help='Không di chuyển ảnh thành công vào thư mục ok')
-    dec_parser.add_argument('--export', choices=['json', 'csv', 'both'], 
-                          help='Xuất kết quả ra JSON/CSV')
-    dec_parser.set_defaults(move_success=True)
-    
-    # Parser cho batch
-    batch_parser = subparsers.add_parser('batch', help='Tạo QR code hàng loạt từ CSV/Text')
-    batch_parser.add_argument('-i', '--input', required=True, help='File CSV hoặc Text')
-    batch_parser.add_argument('-o', '--output', default='./qr_batch_output', help='Thư mục output')
-    batch_parser.add_argument('-s', '--size', type=int, default=10, help='Kích thước box')
-    batch_parser.add_argument('-b', '--border', type=int, default=4, help='Độ dày border')
-    
-    # Parser cho webcam
-    webcam_parser = subparsers.add_parser('webcam', help='Đọc QR code từ webcam')
+    for name, (help_text, add_args) in _SUBCOMMANDS.items():
+        sub_parser = subparsers.add_parser(name, help=help_text)
+        if add_args is not None and selected in (None, name):
+            add_args(sub_parser)
     
-    # Parser cho clipboard
-    clipboard_parser = subparsers.add_parser('clipboard', help='Tạo QR code từ clipboard')
-    clipboard_parser.add_argument('-o', '--output', default='qr_clipboard.png', help='File output')
+    return parser
+
+
+def main():
+    """
+    Hàm main
+    
+    Giải thích:
+    - Không có tham số -> interactive ngay, không dựng parser (5 subparser)
+    - Có tham số -> parse và chạy CLI theo subcommand
+    """
+    if len(sys.argv) == 1:
+        _run_interactive()
+        return
     
-    args = parser.parse_args()
+    args = _build_parser(_sniff_subcommand(sys.argv[1:])).parse_args()
     
     if args.mode:
         sys.exit(main_cli(args))
     else:
-        try:
-            main_interactive()
-        except KeyboardInterrupt:
-            print(Colors.warning("\n⚠️  Đã hủy bởi người dùng!"))
-            sys.exit(130)
-        except Exception as e:
-            log_error(f"❌ Lỗi không mong muốn: {e}")
-            import traceback
-            traceback.print_exc()
-            sys.exit(1)
+        _run_interactive()
 
 
 if __name__ == "__main__":
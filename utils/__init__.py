@@ -11,107 +11,89 @@ Cấu trúc:
 - file_ops.py: Thao tác file/folder
 - progress.py: Progress bar
 - logger.py: Logging system
-"""
-
-# Import từ các module mới
-from .format import (
-    format_size,
-    print_header,
-    print_separator,
-    pluralize
-)
-
-from .validation import (
-    get_user_input,
-    normalize_path,
-    confirm_action,
-    validate_path,
-    parse_size_string,
-    install_library
-)
-
-from .file_ops import (
-    get_file_list,
-    get_folder_size,
-    safe_delete,
-    ensure_directory_exists,
-    create_backup_name,
-    get_available_space
-)
-
-from .progress import (
-    ProgressBar,
-    Spinner,
-    simple_progress
-)
+- processing.py: Process pool dùng chung cho xử lý song song
 
-from .logger import (
-    setup_logger,
-    get_logger,
-    log_info,
-    log_error,
-    log_warning,
-    log_debug,
-    log_success,
-    log_operation
-)
+Các tên public được import lazy (PEP 562) ở lần truy cập đầu tiên
+"""
 
-from .ui import (
-    print_success_box,
-    print_error_box,
-    print_warning_box,
-    print_info_box,
-    print_table,
-    print_steps
-)
+import importlib
 
-# Backward compatibility: Import từ common nếu ai đó vẫn import trực tiếp
-# from .common import *  # DEPRECATED - sẽ xóa trong tương lai
-
-__all__ = [
+# Lazy import (PEP 562): tên public -> submodule chứa nó
+# Submodule chỉ được import khi tên đầu tiên của nó được truy cập, tool
+# chỉ dùng vài hàm không phải trả chi phí import toàn bộ utils
+_LAZY_EXPORTS = {
     # Format functions
-    'format_size',
-    'print_header',
-    'print_separator',
-    'pluralize',
+    'format_size': 'format',
+    'print_header': 'format',
+    'print_separator': 'format',
+    'pluralize': 'format',
     
     # Validation functions
-    'get_user_input',
-    'normalize_path',
-    'confirm_action',
-    'validate_path',
-    'parse_size_string',
-    'install_library',
+    'get_user_input': 'validation',
+    'normalize_path': 'validation',
+    'confirm_action': 'validation',
+    'validate_path': 'validation',
+    'parse_size_string': 'validation',
+    'install_library': 'validation',
+    'is_module_available': 'validation',
     
     # File operations
-    'get_file_list',
-    'get_folder_size',
-    'safe_delete',
-    'ensure_directory_exists',
-    'create_backup_name',
-    'get_available_space',
+    'get_file_list': 'file_ops',
+    'get_folder_size': 'file_ops',
+    'walk_with_sizes': 'file_ops',
+    'safe_delete': 'file_ops',
+    'ensure_directory_exists': 'file_ops',
+    'create_backup_name': 'file_ops',
+    'get_available_space': 'file_ops',
     
     # Progress
-    'ProgressBar',
-    'Spinner',
-    'simple_progress',
+    'ProgressBar': 'progress',
+    'AsyncProgress': 'progress',
+    'Spinner': 'progress',
+    'simple_progress': 'progress',
     
     # Logger
-    'setup_logger',
-    'get_logger',
-    'log_info',
-    'log_error',
-    'log_warning',
-    'log_debug',
-    'log_success',
-    'log_operation',
+    'setup_logger': 'logger',
+    'get_logger': 'logger',
+    'log_info': 'logger',
+    'log_error': 'logger',
+    'log_warning': 'logger',
+    'log_debug': 'logger',
+    'log_success': 'logger',
+    'log_operation': 'logger',
     
     # UI components
-    'print_success_box',
-    'print_error_box',
-    'print_warning_box',
-    'print_info_box',
-    'print_table',
-    'print_steps'
-]
+    'print_success_box': 'ui',
+    'print_error_box': 'ui',
+    'print_warning_box': 'ui',
+    'print_info_box': 'ui',
+    'print_table': 'ui',
+    'print_steps': 'ui',
+}
+
+
+def __getattr__(name: str):
+    """
+    Import lazy tên public từ submodule tương ứng ở lần truy cập đầu tiên
+    
+    Giải thích:
+    - Hoạt động với cả "utils.format_size" và "from utils import format_size"
+    - Giá trị được gán vào globals() nên các lần sau không gọi lại hàm này
+    """
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
+
+# Backward compatibility: Import từ common nếu ai đó vẫn import trực tiếp
+# from .common import *  # DEPRECATED - sẽ xóa trong tương lai
 
+__all__ = list(_LAZY_EXPORTS)
@@ -7,8 +7,15 @@ Mục đích: Tập trung các hàm và class để hiển thị màu sắc tron
 Lý do: Tách riêng logic màu sắc để dễ maintain và tương thích cross-platform
 """
 
+from __future__ import annotations
+
 import sys
-from typing import Optional
+
+# typing chỉ cần cho type checker: annotation là string (PEP 563),
+# lúc chạy không import typing
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
 
 # Thử import colorama, nếu không có thì dùng ANSI codes trực tiếp
 try:
@@ -7,10 +7,17 @@ Mục đích: Tập trung các thao tác file/folder operations
 Lý do: Tách riêng logic file operations để dễ maintain và test
 """
 
+from __future__ import annotations
+
 import os
+import re
 import shutil
 from pathlib import Path
-from typing import List, Optional, Tuple
+
+# Chỉ dùng cho type hint
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Callable, Iterator, List, Optional, Tuple
 
 
 def get_file_list(directory: str, extensions: Optional[List[str]] = None, 
@@ -36,49 +43,95 @@ def get_file_list(directory: str, extensions: Optional[List[str]] = None,
     file_list = []
     directory = Path(directory)
     
-    if exclude_patterns is None:
-        exclude_patterns = []
+    # Chuẩn hóa extension 1 lần thành frozenset (lowercase, có dấu chấm):
+    # mỗi file chỉ còn 1 phép "in" O(1)
+    ext_set = None
+    if extensions:
+        ext_set = frozenset('.' + ext.lower().lstrip('.') for ext in extensions)
     
-    def should_exclude(path: Path) -> bool:
+    # Gộp các pattern thành 1 regex compile sẵn: mỗi path chỉ quét 1 lần
+    # thay vì lặp substring search cho từng pattern
+    exclude_re = None
+    if exclude_patterns:
+        exclude_re = re.compile('|'.join(re.escape(p) for p in exclude_patterns))
+    
+    def should_exclude(path_str: str) -> bool:
         """Kiểm tra có nên loại trừ path này không"""
-        path_str = str(path)
-        for pattern in exclude_patterns:
-            if pattern in path_str:
-                return True
-        return False
+        return exclude_re is not None and exclude_re.search(path_str) is not None
+    
+    def matches_extension(name: str) -> bool:
+        """Kiểm tra extension của file (không tạo Path cho từng file)"""
+        return ext_set is None or os.path.splitext(name)[1].lower() in ext_set
     
     if recursive:
         for root, dirs, files in os.walk(directory):
             # Loại bỏ các thư mục không mong muốn khỏi dirs
-            dirs[:] = [d for d in dirs if not should_exclude(Path(root) / d)]
+            dirs[:] = [d for d in dirs if not should_exclude(os.path.join(root, d))]
             
             for file in files:
-                file_path = Path(root) / file
-                
-                if should_exclude(file_path):
+                if not matches_extension(file):
                     continue
                 
-                # Kiểm tra extension
-                if extensions:
-                    if file_path.suffix.lower() in extensions:
-                        file_list.append(str(file_path))
-                else:
-                    file_list.append(str(file_path))
+                file_path = os.path.join(root, file)
+                if not should_exclude(file_path):
+                    file_list.append(file_path)
     else:
         for item in directory.iterdir():
             if item.is_file():
-                if should_exclude(item):
+                item_str = str(item)
+                if should_exclude(item_str) or not matches_extension(item.name):
                     continue
                 
-                if extensions:
-                    if item.suffix.lower() in extensions:
-                        file_list.append(str(item))
-                else:
-                    file_list.append(str(item))
+                file_list.append(item_str)
     
     return file_list
 
 
+def walk_with_sizes(root: str, filter_fn: Optional[Callable[[os.DirEntry], bool]] = None,
+                    recursive: bool = True) -> Iterator[Tuple[str, int]]:
+    """
+    Duyệt thư mục bằng os.scandir, trả về (đường dẫn, kích thước) từng file
+    
+    Args:
+        root: Thư mục gốc cần duyệt
+        filter_fn: Hàm lọc nhận DirEntry, trả về False để bỏ qua (file hoặc thư mục)
+        recursive: Có duyệt thư mục con không
+    
+    Yields:
+        tuple: (file_path, size_bytes)
+    
+    Giải thích:
+    - Loại file (file/thư mục) lấy từ dirent, không cần stat riêng
+    - Kích thước lấy từ DirEntry.stat() (có cache) -> mỗi file 1 syscall stat
+    - Gộp việc tìm file + lấy size + lọc vào 1 lần duyệt
+    - Không đi theo symlink thư mục (giống os.walk mặc định)
+    - Thứ tự giống os.walk top-down: thư mục con được đẩy vào stack theo thứ tự
+      ngược nên được duyệt đúng thứ tự scandir (quan trọng với "giữ file đầu tiên")
+    - Bỏ qua file/thư mục không có quyền truy cập
+    """
+    stack = [str(root)]
+    
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if filter_fn is not None and not filter_fn(entry):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                subdirs.append(entry.path)
+                        elif entry.is_file():
+                            yield entry.path, entry.stat().st_size
+                    except (OSError, PermissionError):
+                        pass
+        except (OSError, PermissionError):
+            pass
+        stack.extend(reversed(subdirs))
+
+
 def get_folder_size(folder_path: str) -> int:
     """
     Tính tổng dung lượng của thư mục
@@ -93,27 +146,14 @@ def get_folder_size(folder_path: str) -> int:
     - Duyệt qua tất cả file trong thư mục và thư mục con
     - Cộng dồn kích thước của từng file
     - Bỏ qua file không tồn tại hoặc không có quyền truy cập
-    - Sử dụng Path và generator để tối ưu memory
+    - Dùng walk_with_sizes (os.scandir): mỗi file chỉ stat 1 lần
     """
-    total_size = 0
     folder = Path(folder_path)
     
     if not folder.exists() or not folder.is_dir():
         return 0
     
-    try:
-        # Sử dụng Path.rglob() thay vì os.walk() để tối ưu hơn
-        for file_path in folder.rglob('*'):
-            if file_path.is_file():
-                try:
-                    total_size += file_path.stat().st_size
-                except (OSError, PermissionError):
-                    # Bỏ qua file không có quyền truy cập
-                    pass
-    except (OSError, PermissionError):
-        pass
-    
-    return total_size
+    return sum(size for _, size in walk_with_sizes(folder_path))
 
 
 def safe_delete(path: str) -> Tuple[bool, str]:
@@ -7,9 +7,97 @@ Mục đích: Tập trung các hàm helper cho UI/UX
 """
 
 import difflib
+import os
 import re
-from typing import List, Optional
-from .colors import Colors
+import sys
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from .colors import Colors, is_color_enabled
+
+# Thử import rapidfuzz (fuzzy matching viết bằng C++), nếu không có thì dùng difflib
+try:
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+
+
+# ANSI escape sequence pattern (compile một lần khi import)
+_ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+
+@lru_cache(maxsize=64)
+def _colorize_cached(text: str, color: Optional[str], enabled: bool) -> str:
+    """
+    Colors.colorize có cache - dùng cho các ký tự viền với màu truyền vào
+    
+    Args:
+        text: Text (thường là một ký tự viền)
+        color: Màu sắc
+        enabled: Trạng thái bật màu lúc gọi (is_color_enabled()), là một
+                 phần của key để enable_colors(False) không trả về bản có màu
+    
+    Returns:
+        str: Text đã tô màu
+    """
+    return Colors.colorize(text, color)
+
+
+def _colorize(text: str, color: Optional[str]) -> str:
+    """Tô màu text ngắn cố định (viền box), cache theo trạng thái bật màu hiện tại"""
+    return _colorize_cached(text, color, is_color_enabled())
+
+
+@lru_cache(maxsize=16)
+def _round_box_cached(width: int, color: Optional[str], enabled: bool) -> Tuple[str, str, str]:
+    """
+    Tạo (và cache) khung box bo góc: viền trên, dòng trống, viền dưới
+    
+    Args:
+        width: Độ rộng nội dung giữa 2 viền dọc
+        color: Màu sắc cho box
+        enabled: Trạng thái bật màu (một phần của key cache)
+    
+    Returns:
+        tuple: (top border, dòng trống, bottom border)
+    """
+    return (
+        Colors.colorize("  ┌─ " + "─" * (width - 2) + " ┐", color),
+        Colors.colorize("  │", color) + " " * width + Colors.colorize("│", color),
+        Colors.colorize("  └─ " + "─" * (width - 2) + " ┘", color),
+    )
+
+
+def _round_box(width: int, color: Optional[str]) -> Tuple[str, str, str]:
+    """Khung box bo góc theo trạng thái bật màu hiện tại (xem _round_box_cached)"""
+    return _round_box_cached(width, color, is_color_enabled())
+
+
+@lru_cache(maxsize=16)
+def _double_box_cached(width: int, color: Optional[str], enabled: bool) -> Tuple[str, str, str, str]:
+    """
+    Tạo (và cache) khung box viền đôi: viền trên, separator, dòng trống, viền dưới
+    
+    Args:
+        width: Độ rộng nội dung giữa 2 viền dọc
+        color: Màu sắc cho box
+        enabled: Trạng thái bật màu (một phần của key cache)
+    
+    Returns:
+        tuple: (top border, separator, dòng trống, bottom border)
+    """
+    border = Colors.colorize("║", color)
+    return (
+        "  " + Colors.colorize("╔" + "═" * width + "╗", color),
+        "  " + Colors.colorize("╠" + "═" * width + "╣", color),
+        "  " + border + " " * width + border,
+        "  " + Colors.colorize("╚" + "═" * width + "╝", color),
+    )
+
+
+def _double_box(width: int, color: Optional[str]) -> Tuple[str, str, str, str]:
+    """Khung box viền đôi theo trạng thái bật màu hiện tại (xem _double_box_cached)"""
+    return _double_box_cached(width, color, is_color_enabled())
 
 
 def strip_ansi(text: str) -> str:
@@ -22,9 +110,7 @@ def strip_ansi(text: str) -> str:
     Returns:
         str: Text không có ANSI codes
     """
-    # ANSI escape sequence pattern
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    return ansi_escape.sub('', text)
+    return _ANSI_RE.sub('', text)
 
 
 def get_text_width(text: str) -> int:
@@ -37,7 +123,43 @@ def get_text_width(text: str) -> int:
     Returns:
         int: Độ dài thực tế của text
     """
-    return len(strip_ansi(text))
+    return visible_width(text)
+
+
+def visible_width(text: str) -> int:
+    """
+    Tính độ dài hiển thị của text (không tính ANSI codes) mà không tạo chuỗi mới
+    
+    Args:
+        text: Text có thể chứa ANSI codes
+    
+    Returns:
+        int: Độ dài thực tế của text
+    """
+    if '\x1b' not in text:
+        return len(text)
+    
+    # Cộng độ dài các đoạn text nằm giữa các ANSI escape sequences
+    total = 0
+    last = 0
+    for match in _ANSI_RE.finditer(text):
+        total += match.start() - last
+        last = match.end()
+    return total + len(text) - last
+
+
+@lru_cache(maxsize=64)
+def _keyword_pattern(keyword: str) -> "re.Pattern":
+    """
+    Compile (và cache) pattern tìm keyword không phân biệt hoa thường
+    
+    Args:
+        keyword: Keyword cần tìm
+    
+    Returns:
+        re.Pattern: Pattern đã compile
+    """
+    return re.compile(re.escape(keyword), re.IGNORECASE)
 
 
 def highlight_keyword(text: str, keyword: str) -> str:
@@ -54,15 +176,12 @@ def highlight_keyword(text: str, keyword: str) -> str:
     if not keyword:
         return text
     
-    keyword_lower = keyword.lower()
-    text_lower = text.lower()
-    
-    if keyword_lower not in text_lower:
+    # Tìm vị trí keyword (không cần tạo bản lowercase của cả text)
+    match = _keyword_pattern(keyword).search(text)
+    if match is None:
         return text
     
-    # Tìm vị trí keyword
-    start = text_lower.find(keyword_lower)
-    end = start + len(keyword)
+    start, end = match.span()
     
     # Highlight
     highlighted = (
@@ -74,6 +193,66 @@ def highlight_keyword(text: str, keyword: str) -> str:
     return highlighted
 
 
+@lru_cache(maxsize=32)
+def _lowered_commands(commands: Tuple[str, ...]) -> Tuple[Tuple[str, ...], Dict[str, str]]:
+    """
+    Lowercase danh sách commands một lần và map ngược về command gốc
+    
+    Args:
+        commands: Tuple commands hợp lệ
+    
+    Returns:
+        tuple: (commands đã lowercase, dict lowercase -> command gốc)
+    """
+    lowered = tuple(cmd.lower() for cmd in commands)
+    orig_map = {}
+    for low, cmd in zip(lowered, commands):
+        # Giữ command đầu tiên nếu trùng lowercase (giống cách map cũ)
+        orig_map.setdefault(low, cmd)
+    return lowered, orig_map
+
+
+@lru_cache(maxsize=256)
+def _suggest_command_cached(user_input_lower: str, commands: Tuple[str, ...], n: int) -> Tuple[str, ...]:
+    """
+    Phần lõi của suggest_command, được cache theo (input, commands, n)
+    
+    Args:
+        user_input_lower: Input từ user (đã lowercase)
+        commands: Tuple commands hợp lệ
+        n: Số lượng gợi ý tối đa
+    
+    Returns:
+        tuple: Các commands gợi ý
+    """
+    lowered, orig_map = _lowered_commands(commands)
+    
+    # Khớp chính xác thì không cần fuzzy search
+    if user_input_lower in orig_map:
+        return (orig_map[user_input_lower],)
+    
+    # Tìm commands tương tự
+    if HAS_RAPIDFUZZ:
+        matches = _rf_process.extract(
+            user_input_lower,
+            lowered,
+            scorer=_rf_fuzz.ratio,
+            limit=n,
+            score_cutoff=30
+        )
+        suggestions = [match[0] for match in matches]
+    else:
+        suggestions = difflib.get_close_matches(
+            user_input_lower,
+            lowered,
+            n=n,
+            cutoff=0.3
+        )
+    
+    # Map về commands gốc
+    return tuple(orig_map[sug] for sug in suggestions)
+
+
 def suggest_command(user_input: str, valid_commands: List[str], max_suggestions: int = 3) -> List[str]:
     """
     Gợi ý command gần đúng khi user nhập sai
@@ -89,23 +268,21 @@ def suggest_command(user_input: str, valid_commands: List[str], max_suggestions:
     if not user_input:
         return []
     
-    # Tìm commands tương tự
-    suggestions = difflib.get_close_matches(
-        user_input.lower(),
-        [cmd.lower() for cmd in valid_commands],
-        n=max_suggestions,
-        cutoff=0.3
-    )
-    
-    # Map về commands gốc
-    result = []
-    for sug in suggestions:
-        for cmd in valid_commands:
-            if cmd.lower() == sug:
-                result.append(cmd)
-                break
-    
-    return result
+    return list(_suggest_command_cached(user_input.lower(), tuple(valid_commands), max_suggestions))
+
+
+# Danh sách tips cố định (không cần dựng lại mỗi lần gọi)
+_TIPS = (
+    "💡 Tip: Nhập 'h' để xem hướng dẫn đầy đủ",
+    "💡 Tip: Dùng 's [keyword]' để tìm kiếm nhanh",
+    "💡 Tip: Thêm tool vào favorites bằng 'f+ [số]'",
+    "💡 Tip: Nhập số + 'h' (vd: '1h') để xem hướng dẫn tool",
+    "💡 Tip: Dùng 'r' để xem recent tools",
+    "💡 Tip: Nhập 'clear' để xóa màn hình",
+    "💡 Tip: Dùng 'f' để xem tất cả favorites",
+    "💡 Tip: Nhập 'set' để xem settings",
+    "💡 Tip: Nhập 'log' để xem logs",
+)
 
 
 def format_tips() -> List[str]:
@@ -115,19 +292,7 @@ def format_tips() -> List[str]:
     Returns:
         list: Danh sách tips
     """
-    tips = [
-        "💡 Tip: Nhập 'h' để xem hướng dẫn đầy đủ",
-        "💡 Tip: Dùng 's [keyword]' để tìm kiếm nhanh",
-        "💡 Tip: Thêm tool vào favorites bằng 'f+ [số]'",
-        "💡 Tip: Nhập số + 'h' (vd: '1h') để xem hướng dẫn tool",
-        "💡 Tip: Dùng 'r' để xem recent tools",
-        "💡 Tip: Nhập 'clear' để xóa màn hình",
-        "💡 Tip: Dùng 'f' để xem tất cả favorites",
-        "💡 Tip: Nhập 'set' để xem settings",
-        "💡 Tip: Nhập 'log' để xem logs",
-    ]
-    
-    return tips
+    return list(_TIPS)
 
 
 def print_welcome_tip():
@@ -140,33 +305,88 @@ def print_welcome_tip():
     print(Colors.muted(f"  {tip}"))
 
 
+def _pad_line(colored: str, visible: int, width: int, center: bool = True) -> str:
+    """
+    Căn lề text đã tô màu theo độ dài hiển thị của nó
+    
+    Args:
+        colored: Text đã tô màu sẽ được in ra
+        visible: Độ dài hiển thị của text (không tính ANSI codes)
+        width: Độ rộng hiển thị cần đạt
+        center: True để căn giữa, False để căn trái
+    
+    Returns:
+        str: Text đã tô màu và được pad đủ độ rộng
+    """
+    # Phần ANSI codes không chiếm chỗ khi hiển thị nên cộng thêm vào độ rộng của ljust
+    ansi_overhead = len(colored) - visible
+    if center:
+        colored = " " * ((width - visible) // 2) + colored
+    return colored.ljust(width + ansi_overhead)
+
+
+# Các kiểu tô màu dùng cho dòng căn giữa (tên -> hàm tô màu)
+_CENTER_STYLES = {
+    "bold": Colors.bold,
+    "info": Colors.info,
+    "info_bold": lambda text: Colors.bold(Colors.info(text)),
+    "secondary": Colors.secondary,
+    "muted": Colors.muted,
+}
+
+
+@lru_cache(maxsize=128)
+def _center_colored_cached(plain: str, width: int, style: str, enabled: bool) -> str:
+    """
+    Căn giữa và tô màu text (có cache vì các tiêu đề gần như không đổi)
+    
+    Args:
+        plain: Text không màu
+        width: Độ rộng hiển thị cần đạt
+        style: Tên kiểu tô màu trong _CENTER_STYLES
+        enabled: Trạng thái bật màu (một phần của key cache)
+    
+    Returns:
+        str: Dòng đã căn giữa và tô màu (chưa gồm viền)
+    """
+    return _pad_line(_CENTER_STYLES[style](plain), len(plain), width)
+
+
+def _center_colored(plain: str, width: int, style: str) -> str:
+    """Căn giữa và tô màu text theo trạng thái bật màu hiện tại (xem _center_colored_cached)"""
+    return _center_colored_cached(plain, width, style, is_color_enabled())
+
+
+# Các dòng tips trong welcome message
+_WELCOME_TIPS = (
+    ("• Nhập", Colors.muted, "số", Colors.info, "để chạy tool (vd: 1, 2, 3)"),
+    ("• Nhập", Colors.muted, "h", Colors.info, "để xem hướng dẫn đầy đủ"),
+    ("• Nhập", Colors.muted, "s [từ khóa]", Colors.info, "để tìm kiếm tool"),
+    ("• Nhập", Colors.muted, "f+ [số]", Colors.info, "để thêm vào favorites"),
+)
+
+
 def print_welcome_message():
     """
     In welcome message thân thiện với onboarding tips
     
     Mục đích: Giúp người dùng mới hiểu cách sử dụng nhanh chóng
     """
-    print()
-    print(Colors.primary("  ┌─ " + "─" * 65 + " ┐"))
-    print(Colors.primary("  │") + " " * 67 + Colors.primary("│"))
+    top, empty, bottom = _round_box(67, Colors.PRIMARY)
+    output = [""]
+    output.append(top)
+    output.append(empty)
     
     welcome_text = "👋 Chào mừng đến với DevTools!"
-    welcome_padding = (67 - len(welcome_text) + 1) // 2  # +1 cho emoji
-    print(Colors.primary("  │") + " " * welcome_padding + Colors.bold(Colors.info(welcome_text)) + " " * (67 - len(welcome_text) - welcome_padding + 1) + Colors.primary("│"))
+    # Độ rộng 68 = 67 + 1 cho emoji
+    output.append(_colorize("  │", Colors.PRIMARY) + _center_colored(welcome_text, 68, "info_bold") + _colorize("│", Colors.PRIMARY))
     
-    print(Colors.primary("  │") + " " * 67 + Colors.primary("│"))
+    output.append(empty)
     
     quick_start = "🚀 Bắt đầu nhanh:"
-    print(Colors.primary("  │") + "  " + Colors.bold(Colors.warning(quick_start)) + " " * (67 - len(quick_start) - 2) + Colors.primary("│"))
-    
-    tips = [
-        ("• Nhập", Colors.muted, "số", Colors.info, "để chạy tool (vd: 1, 2, 3)"),
-        ("• Nhập", Colors.muted, "h", Colors.info, "để xem hướng dẫn đầy đủ"),
-        ("• Nhập", Colors.muted, "s [từ khóa]", Colors.info, "để tìm kiếm tool"),
-        ("• Nhập", Colors.muted, "f+ [số]", Colors.info, "để thêm vào favorites"),
-    ]
+    output.append(_colorize("  │", Colors.PRIMARY) + _pad_line("  " + Colors.bold(Colors.warning(quick_start)), 2 + len(quick_start), 67, center=False) + _colorize("│", Colors.PRIMARY))
     
-    for tip_parts in tips:
+    for tip_parts in _WELCOME_TIPS:
         tip_line = ""
         for part in tip_parts:
             if isinstance(part, str):
@@ -175,120 +395,97 @@ def print_welcome_message():
                 tip_line += part("") if callable(part) else str(part)
         
         # Tính độ dài thực tế (không tính ANSI codes)
-        tip_plain = strip_ansi(tip_line)
-        tip_padding = 67 - len(tip_plain) - 2
-        if tip_padding < 0:
-            tip_padding = 0
+        tip_width = 2 + visible_width(tip_line)
         
-        print(Colors.primary("  │") + "  " + tip_line + " " * tip_padding + Colors.primary("│"))
+        output.append(_colorize("  │", Colors.PRIMARY) + _pad_line("  " + tip_line, tip_width, 67, center=False) + _colorize("│", Colors.PRIMARY))
     
-    print(Colors.primary("  │") + " " * 67 + Colors.primary("│"))
+    output.append(empty)
     
     help_text = "💡 Tip: Nhập 'h' để xem tất cả lệnh có sẵn"
-    help_padding = (67 - len(help_text) + 1) // 2
-    print(Colors.primary("  │") + " " * help_padding + Colors.muted(help_text) + " " * (67 - len(help_text) - help_padding + 1) + Colors.primary("│"))
+    output.append(_colorize("  │", Colors.PRIMARY) + _center_colored(help_text, 68, "muted") + _colorize("│", Colors.PRIMARY))
     
-    print(Colors.primary("  │") + " " * 67 + Colors.primary("│"))
-    print(Colors.primary("  └─ " + "─" * 65 + " ┘"))
-    print()
+    output.append(empty)
+    output.append(bottom)
+    output.append("")
+    
+    # Ghi toàn bộ box trong một lần thay vì gọi print() cho từng dòng
+    sys.stdout.write("\n".join(output) + "\n")
 
 
-def print_keyboard_shortcuts():
+# Bảng keyboard shortcuts - dữ liệu tĩnh, phần không màu (padding) tính sẵn khi import
+_SHORTCUTS = (
+    ("Số (1-9)", "Chạy tool theo số thứ tự"),
+    ("s [keyword]", "Tìm kiếm tool"),
+    ("f", "Xem favorites"),
+    ("r", "Xem recent tools"),
+    ("h", "Xem help"),
+    ("q", "Thoát"),
+    ("clear", "Xóa màn hình"),
+)
+
+# (shortcut, description, shortcut_formatted, line_content)
+# line_content = "  " + shortcut_formatted + "  " + description (không màu)
+_SHORTCUTS_PRECOMPUTED = tuple(
+    (shortcut, description, f"{shortcut:20s}", f"  {shortcut:20s}  {description}")
+    for shortcut, description in _SHORTCUTS
+)
+_SHORTCUTS_MAX_LINE_LENGTH = max(len(row[3]) for row in _SHORTCUTS_PRECOMPUTED)
+
+# Dùng cùng border_width với khối "VÍ DỤ SỬ DỤNG" để đồng đều
+_SHORTCUTS_BORDER_WIDTH = 71
+
+
+@lru_cache(maxsize=2)
+def _shortcut_rows(enabled: bool) -> Tuple[str, ...]:
     """
-    In danh sách keyboard shortcuts phổ biến
+    Render (và cache) các dòng của box keyboard shortcuts
     
-    Mục đích: Giúp người dùng biết các shortcuts tiện lợi
+    Args:
+        enabled: Trạng thái bật màu (is_color_enabled()), mỗi trạng thái render 1 lần
+    
+    Returns:
+        tuple: Các dòng đã có màu và padding (bao gồm cả border)
     """
-    shortcuts = [
-        ("Số (1-9)", "Chạy tool theo số thứ tự"),
-        ("s [keyword]", "Tìm kiếm tool"),
-        ("f", "Xem favorites"),
-        ("r", "Xem recent tools"),
-        ("h", "Xem help"),
-        ("q", "Thoát"),
-        ("clear", "Xóa màn hình"),
-    ]
-    
-    # Tính chiều dài của từng dòng (không màu) để tìm dòng dài nhất
-    max_line_length = 0
-    formatted_lines = []
+    border_width = _SHORTCUTS_BORDER_WIDTH
     title = " ⌨️  KEYBOARD SHORTCUTS"
     
-    # Tính chiều dài của từng dòng nội dung (không tính border)
-    for shortcut, description in shortcuts:
-        # Format text không màu trước để tính padding chính xác
-        shortcut_formatted = f"{shortcut:20s}"
-        # Tính chiều dài hiển thị thực tế của nội dung
-        # Format: "  " + "║" + " " + "  " + line_content + padding + "║"
-        # Có thêm 2 spaces ở đầu mỗi dòng content (tổng 3 spaces sau ║)
-        # Vậy line_content = "  " + shortcut_formatted + "  " + description
-        line_content = f"  {shortcut_formatted}  {description}"
-        line_length = len(line_content)
-        
-        if line_length > max_line_length:
-            max_line_length = line_length
-        
-        formatted_lines.append({
-            'shortcut': shortcut,
-            'description': description,
-            'shortcut_formatted': shortcut_formatted,
-            'line_content': line_content,
-        })
-    
-    # Dùng cùng border_width với khối "VÍ DỤ SỬ DỤNG" để đồng đều
-    # border_width = 67 (tính từ khối "VÍ DỤ SỬ DỤNG")
-    border_width = 71
-    
-    print()
-    # Render với double box drawing characters để đồng đều với các khối khác
-    # Top border: "  " + "╔" + "═" * border_width + "╗"
-    print("  " + Colors.primary("╔" + "═" * border_width + "╗"))
+    top, separator, empty, bottom = _double_box(border_width, Colors.PRIMARY)
+    rows = [top]
     
     # Title line: "  " + "║" + " " + title với padding + "║"
-    # Tính padding để center title
     total_padding = border_width - 1 - len(title)
     padding_before = total_padding // 2
     padding_after = total_padding - padding_before
     title_colored = Colors.bold(Colors.info(title))
-    print("  " + Colors.primary("║") + " " + " " * padding_before + title_colored + " " * padding_after + Colors.primary("║"))
-    
-    # Separator: "  " + "╠" + "═" * border_width + "╣"
-    print("  " + Colors.primary("╠" + "═" * border_width + "╣"))
+    rows.append("  " + _colorize("║", Colors.PRIMARY) + " " + " " * padding_before + title_colored + " " * padding_after + _colorize("║", Colors.PRIMARY))
     
-    # Empty line
-    print("  " + Colors.primary("║") + " " * border_width + Colors.primary("║"))
+    rows.append(separator)
+    rows.append(empty)
     
-    # Render các dòng với padding chính xác
-    for line_data in formatted_lines:
-        shortcut = line_data['shortcut']
-        description = line_data['description']
-        shortcut_formatted = line_data['shortcut_formatted']
-        line_content = line_data['line_content']
-        
-        # Thêm màu vào từng phần đã được format
+    for shortcut, description, shortcut_formatted, _line_content in _SHORTCUTS_PRECOMPUTED:
+        # Thêm màu vào từng phần, giữ nguyên chiều dài hiển thị của shortcut
         shortcut_colored = Colors.bold(Colors.info(shortcut))
         desc_colored = Colors.muted(description)
-        
-        # Tính padding cho shortcut để giữ nguyên chiều dài hiển thị
         shortcut_padding = len(shortcut_formatted) - len(shortcut)
-        
-        # Tạo line với màu và padding chính xác (có "  " ở đầu để khớp với output mẫu)
         line = f"  {shortcut_colored}{' ' * shortcut_padding}  {desc_colored}"
         
         # Tính độ dài thực tế của line (không tính ANSI codes) để đảm bảo padding chính xác
-        line_plain = strip_ansi(line)
-        actual_padding = (border_width - 1) - len(line_plain)
-        if actual_padding < 0:
-            actual_padding = 0
-        
-        print("  " + Colors.primary("║") + " " + line + " " * actual_padding + Colors.primary("║"))
+        actual_padding = max((border_width - 1) - visible_width(line), 0)
+        rows.append("  " + _colorize("║", Colors.PRIMARY) + " " + line + " " * actual_padding + _colorize("║", Colors.PRIMARY))
     
-    # Empty line
-    print("  " + Colors.primary("║") + " " * border_width + Colors.primary("║"))
+    rows.append(empty)
+    rows.append(bottom)
+    return tuple(rows)
+
+
+def print_keyboard_shortcuts():
+    """
+    In danh sách keyboard shortcuts phổ biến
     
-    # Bottom border: "  " + "╚" + "═" * border_width + "╝"
-    print("  " + Colors.primary("╚" + "═" * border_width + "╝"))
-    print()
+    Mục đích: Giúp người dùng biết các shortcuts tiện lợi
+    """
+    # Ghi toàn bộ box (render 1 lần cho mỗi trạng thái màu) trong một lần
+    sys.stdout.write("\n" + "\n".join(_shortcut_rows(is_color_enabled())) + "\n\n")
 
 
 def print_command_suggestions(user_input: str, suggestions: List[str]):
@@ -302,68 +499,124 @@ def print_command_suggestions(user_input: str, suggestions: List[str]):
     if not suggestions:
         return
     
+    top, empty, bottom = _round_box(65, Colors.ERROR)
     print()
-    print(Colors.error("  ┌─ " + "─" * 63 + " ┐"))
-    print(Colors.error("  │") + " " * 65 + Colors.error("│"))
+    print(top)
+    print(empty)
     
     error_msg = f"⚠️  Không tìm thấy lệnh: '{user_input}'"
-    error_padding = (65 - len(error_msg) + 1) // 2
-    print(Colors.error("  │") + " " * error_padding + Colors.bold(error_msg) + " " * (65 - len(error_msg) - error_padding + 1) + Colors.error("│"))
+    # Độ rộng 66 = 65 + 1 cho emoji
+    print(_colorize("  │", Colors.ERROR) + _center_colored(error_msg, 66, "bold") + _colorize("│", Colors.ERROR))
     
-    print(Colors.error("  │") + " " * 65 + Colors.error("│"))
+    print(empty)
     
     if len(suggestions) == 1:
         suggest_msg = f"💡 Có phải bạn muốn: {Colors.bold(suggestions[0])}?"
-        suggest_plain = strip_ansi(suggest_msg)
-        suggest_padding = (65 - len(suggest_plain) + 1) // 2
-        print(Colors.error("  │") + " " * suggest_padding + Colors.info(suggest_msg) + " " * (65 - len(suggest_plain) - suggest_padding + 1) + Colors.error("│"))
+        print(_colorize("  │", Colors.ERROR) + _pad_line(Colors.info(suggest_msg), visible_width(suggest_msg), 66) + _colorize("│", Colors.ERROR))
     else:
         suggest_title = f"💡 Gợi ý ({len(suggestions)}):"
-        suggest_title_padding = (65 - len(suggest_title) + 1) // 2
-        print(Colors.error("  │") + " " * suggest_title_padding + Colors.info(suggest_title) + " " * (65 - len(suggest_title) - suggest_title_padding + 1) + Colors.error("│"))
+        print(_colorize("  │", Colors.ERROR) + _center_colored(suggest_title, 66, "info") + _colorize("│", Colors.ERROR))
         
         suggestions_text = ", ".join([Colors.bold(s) for s in suggestions])
-        suggestions_plain = strip_ansi(suggestions_text)
-        suggestions_padding = (65 - len(suggestions_plain)) // 2
-        print(Colors.error("  │") + " " * suggestions_padding + suggestions_text + " " * (65 - len(suggestions_plain) - suggestions_padding) + Colors.error("│"))
+        print(_colorize("  │", Colors.ERROR) + _pad_line(suggestions_text, visible_width(suggestions_text), 65) + _colorize("│", Colors.ERROR))
     
-    print(Colors.error("  │") + " " * 65 + Colors.error("│"))
-    print(Colors.error("  └─ " + "─" * 63 + " ┘"))
+    print(empty)
+    print(bottom)
     print()
 
 
+# Banner không đổi trong suốt quá trình chạy (chỉ phụ thuộc trạng thái bật màu)
+_BANNER_WIDTH = 70
+
+
+@lru_cache(maxsize=2)
+def _banner(enabled: bool) -> Tuple[str, bytes]:
+    """
+    Render (và cache) banner cho một trạng thái màu
+    
+    Args:
+        enabled: Trạng thái bật màu (is_color_enabled())
+    
+    Returns:
+        tuple: (banner dạng str, banner đã encode UTF-8)
+    """
+    top, _, empty, bottom = _double_box(_BANNER_WIDTH, Colors.PRIMARY)
+    border = _colorize("║", Colors.PRIMARY)
+    banner = "\n".join((
+        "",
+        top,
+        "  " + border + _center_colored("DEV TOOLS", _BANNER_WIDTH, "info_bold") + border,
+        "  " + border + _center_colored("Bộ công cụ Python tiện ích", _BANNER_WIDTH, "secondary") + border,
+        empty,
+        "  " + border + _center_colored("Nhập 'h' hoặc 'help' để xem hướng dẫn", _BANNER_WIDTH, "muted") + border,
+        bottom,
+        "",
+    )) + "\n"
+    return banner, banner.encode('utf-8')
+
+
 def print_banner():
     """
     In banner đẹp với design hiện đại
     
     Mục đích: Tạo ấn tượng ban đầu tốt, thu hút người dùng
     """
-    width = 70
-    
-    # Tính toán padding chính xác (không tính ANSI codes)
-    title1 = "DEV TOOLS"
-    title1_len = len(title1)
-    title1_padding_left = (width - title1_len) // 2
-    title1_padding_right = width - title1_len - title1_padding_left
+    banner, banner_bytes = _banner(is_color_enabled())
+    
+    # Trên Unix với TTY UTF-8: ghi thẳng bytes đã render sẵn bằng một syscall
+    # Windows vẫn đi qua sys.stdout để colorama xử lý ANSI codes
+    if sys.platform != 'win32':
+        try:
+            if sys.stdout.isatty() and (sys.stdout.encoding or '').lower().replace('-', '') == 'utf8':
+                sys.stdout.flush()
+                fd = sys.stdout.fileno()
+                data = banner_bytes
+                while data:
+                    written = os.write(fd, data)
+                    data = data[written:]
+                return
+        except (AttributeError, OSError, ValueError):
+            pass
+    
+    sys.stdout.write(banner)
+
+
+def _wrap_line(line: str, width: int) -> Iterator[Tuple[str, int]]:
+    """
+    Chia một dòng thành các đoạn có độ rộng hiển thị tối đa width (một lượt duyệt)
     
-    title2 = "Bộ công cụ Python tiện ích"
-    title2_len = len(title2)
-    title2_padding_left = (width - title2_len) // 2
-    title2_padding_right = width - title2_len - title2_padding_left
+    Args:
+        line: Dòng text (có thể chứa ANSI codes)
+        width: Độ rộng hiển thị tối đa của mỗi đoạn
     
-    title3 = "Nhập 'h' hoặc 'help' để xem hướng dẫn"
-    title3_len = len(title3)
-    title3_padding_left = (width - title3_len) // 2
-    title3_padding_right = width - title3_len - title3_padding_left
+    Yields:
+        tuple: (đoạn text, độ rộng hiển thị của đoạn)
+    """
+    if '\x1b' not in line:
+        # Tính trước số đoạn, mỗi đoạn chỉ cắt một lần từ line gốc
+        n_chunks = max((len(line) + width - 1) // width, 1)
+        for i in range(n_chunks):
+            chunk = line[i * width:(i + 1) * width]
+            yield chunk, len(chunk)
+        return
     
-    print()
-    print("  " + Colors.primary("╔" + "═" * width + "╗"))
-    print("  " + Colors.primary("║") + " " * title1_padding_left + Colors.bold(Colors.info(title1)) + " " * title1_padding_right + Colors.primary("║"))
-    print("  " + Colors.primary("║") + " " * title2_padding_left + Colors.secondary(title2) + " " * title2_padding_right + Colors.primary("║"))
-    print("  " + Colors.primary("║") + " " * width + Colors.primary("║"))
-    print("  " + Colors.primary("║") + " " * title3_padding_left + Colors.muted(title3) + " " * title3_padding_right + Colors.primary("║"))
-    print("  " + Colors.primary("╚" + "═" * width + "╝"))
-    print()
+    # Dòng có ANSI codes: đếm độ rộng hiển thị, bỏ qua escape sequences
+    chunk_start = 0
+    pos = 0
+    visible = 0
+    matches = list(_ANSI_RE.finditer(line))
+    for match in matches + [None]:
+        text_end = match.start() if match else len(line)
+        while text_end - pos > width - visible:
+            split = pos + (width - visible)
+            yield line[chunk_start:split], width
+            chunk_start = pos = split
+            visible = 0
+        visible += text_end - pos
+        pos = match.end() if match else text_end
+    
+    if visible or chunk_start < len(line):
+        yield line[chunk_start:], visible
 
 
 def print_boxed_text(text: str, title: Optional[str] = None, color: Optional[str] = Colors.PRIMARY, width: int = 70) -> None:
@@ -380,39 +633,29 @@ def print_boxed_text(text: str, title: Optional[str] = None, color: Optional[str
     if not lines:
         lines = ['']
     
+    top_line, separator_line, _, bottom_line = _double_box(width - 2, color)
+    
     # Top border
     if title:
         title_len = len(title)  # Plain text length
         title_padding = (width - title_len - 2) // 2
-        top_line = "  " + Colors.colorize("╔" + "═" * (width - 2) + "╗", color)
-        title_line = "  " + Colors.colorize("║", color) + " " * title_padding + Colors.bold(title) + " " * (width - title_len - title_padding - 2) + Colors.colorize("║", color)
+        title_line = "  " + _colorize("║", color) + " " * title_padding + Colors.bold(title) + " " * (width - title_len - title_padding - 2) + _colorize("║", color)
         print(top_line)
         print(title_line)
-        print("  " + Colors.colorize("╠" + "═" * (width - 2) + "╣", color))
+        print(separator_line)
     else:
-        print("  " + Colors.colorize("╔" + "═" * (width - 2) + "╗", color))
+        print(top_line)
     
     # Content
+    max_content_width = width - 4
+    border = _colorize("║", color)
     for line in lines:
-        # Strip ANSI để tính độ dài thực tế
-        line_plain = strip_ansi(line)
-        
-        # Wrap long lines
-        max_content_width = width - 4
-        while len(line_plain) > max_content_width:
-            wrapped_line_plain = line_plain[:max_content_width]
-            line_plain = line_plain[max_content_width:]
-            # Cần tìm lại line có ANSI tương ứng
-            wrapped_line = line[:max_content_width] if len(strip_ansi(line)) == len(line) else wrapped_line_plain
-            content = wrapped_line + " " * (max_content_width - len(wrapped_line_plain))
-            print("  " + Colors.colorize("║", color) + f" {content} " + Colors.colorize("║", color))
-            line = line[max_content_width:] if len(line) > max_content_width else ""
-        
-        content_plain = line_plain + " " * (max_content_width - len(line_plain))
-        print("  " + Colors.colorize("║", color) + f" {line if line else ' ' * max_content_width} " + Colors.colorize("║", color))
+        # Wrap long lines (tuyến tính, không cắt lại phần đuôi mỗi vòng lặp)
+        for chunk, visible in _wrap_line(line, max_content_width):
+            print("  " + border + " " + chunk.ljust(max_content_width + len(chunk) - visible) + " " + border)
     
     # Bottom border
-    print("  " + Colors.colorize("╚" + "═" * (width - 2) + "╝", color))
+    print(bottom_line)
     print()
 
 
@@ -433,15 +676,15 @@ def print_card(title: str, content: str, icon: Optional[str] = None, color: Opti
     
     print()
     print(Colors.colorize(f"┌─ {title_text} {'─' * (65 - len(title_text))}", color))
-    print(Colors.colorize("│", color))
+    print(_colorize("│", color))
     
     for line in content.split('\n'):
         if line.strip():
             print(Colors.colorize(f"│  {line}", color))
         else:
-            print(Colors.colorize("│", color))
+            print(_colorize("│", color))
     
-    print(Colors.colorize("│", color))
+    print(_colorize("│", color))
     print(Colors.colorize("└" + "─" * 68, color))
     print()
 
@@ -462,8 +705,11 @@ def confirm_action(message: str, default: bool = False) -> bool:
     
     prompt = Colors.warning(f"⚠️  {message} ({default_text}): ")
     
-    try:
-        response = input(prompt).strip().lower()
+    while True:
+        try:
+            response = input(prompt).strip().lower()
+        except (KeyboardInterrupt, EOFError):
+            return False
         
         if not response:
             return default
@@ -472,8 +718,6 @@ def confirm_action(message: str, default: bool = False) -> bool:
             return True
         elif response in ['n', 'no']:
             return False
-        else:
-            print(Colors.error("❌ Vui lòng nhập 'y' hoặc 'n'"))
-            return confirm_action(message, default)
-    except (KeyboardInterrupt, EOFError):
-        return False
+        
+        # Input không hợp lệ: hỏi lại (lặp thay vì đệ quy)
+        print(Colors.error("❌ Vui lòng nhập 'y' hoặc 'n'"))
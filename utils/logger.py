@@ -7,11 +7,17 @@ Mục đích: Ghi lại các thao tác và lỗi để debug
 Lý do: Dễ theo dõi và khắc phục sự cố
 """
 
+from __future__ import annotations
+
 import logging
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+
+# Chỉ dùng cho type hint
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
 
 
 # Global logger instance
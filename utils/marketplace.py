@@ -7,18 +7,209 @@ Mục đích: Tải và cài đặt tools từ remote repository
 Lý do: Cho phép người dùng chia sẻ và tải tools từ cộng đồng
 """
 
+import io
+import asyncio
 import os
+import re
 import json
+import hashlib
+import mmap
+import struct
+import zlib
 import shutil
 import zipfile
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 from datetime import datetime
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from utils.colors import Colors
 from utils.format import print_separator
-from utils.progress import ProgressBar, Spinner
+from utils.progress import ProgressBar
+
+# Thử import orjson (JSON parser viết bằng C/Rust), nếu không có thì dùng json chuẩn
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Thử import packaging để so sánh version theo PEP 440/semver
+try:
+    from packaging.version import Version, InvalidVersion
+    HAS_PACKAGING = True
+except ImportError:
+    HAS_PACKAGING = False
+
+
+@lru_cache(maxsize=256)
+def _parse_version(version: str):
+    """
+    Parse chuỗi version thành object so sánh được (có cache theo chuỗi)
+    
+    Args:
+        version: Chuỗi version (vd: "1.10.0")
+    
+    Returns:
+        Version | tuple | None: Object so sánh được, None nếu không parse được
+    """
+    if HAS_PACKAGING:
+        try:
+            return Version(version)
+        except InvalidVersion:
+            return None
+    
+    # Fallback: "1.10.0" -> (1, 10), bỏ số 0 ở cuối để "1.0" == "1.0.0"
+    try:
+        parts = [int(part) for part in version.lstrip('vV').split('.')]
+    except ValueError:
+        return None
+    while parts and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+# Số bit của bloom filter trigram (256 byte) và mask tương ứng
+_BLOOM_BITS = 2048
+_BLOOM_MASK = _BLOOM_BITS - 1
+
+
+def _trigram_bloom(text: str) -> int:
+    """
+    Tạo bloom filter (int dùng như bitset) từ các trigram của text
+    
+    Args:
+        text: Chuỗi đã lowercase
+    
+    Returns:
+        int: Bitset, mỗi trigram bật 3 bit lấy từ hash của nó
+    
+    Giải thích:
+    - Nếu query là substring của text thì mọi trigram của query đều có trong text,
+      nên (bloom_text & bloom_query) == bloom_query là điều kiện cần
+    - hash() của str chỉ ổn định trong một process - đủ vì index chỉ nằm trong RAM
+    """
+    bloom = 0
+    for i in range(len(text) - 2):
+        h = hash(text[i:i + 3])
+        bloom |= (1 << (h & _BLOOM_MASK)) | (1 << ((h >> 11) & _BLOOM_MASK)) | (1 << ((h >> 22) & _BLOOM_MASK))
+    return bloom
+
+
+@contextmanager
+def _zip_view(zip_file: Union[Path, io.BytesIO]):
+    """
+    Mở memoryview chỉ đọc trên toàn bộ nội dung file zip
+    
+    Args:
+        zip_file: File zip trên đĩa (mmap) hoặc BytesIO (getbuffer)
+    
+    Yields:
+        memoryview: View trên bytes của archive (không copy)
+    """
+    if isinstance(zip_file, io.BytesIO):
+        with zip_file.getbuffer() as view:
+            yield view
+        return
+    
+    with open(zip_file, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            memoryview(mm) as view:
+        yield view
+
+
+def _json_loads(data: bytes):
+    """Parse JSON từ bytes (UTF-8) - dùng orjson nếu có"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize object thành JSON bytes (UTF-8, indent 2) - dùng orjson nếu có"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+@lru_cache(maxsize=64)
+def _tool_dir_pattern(tool_id: str) -> 're.Pattern':
+    """
+    Regex (có cache) khớp member zip nằm trong thư mục gốc có chứa tool_id
+    
+    Args:
+        tool_id: ID của tool
+    
+    Returns:
+        re.Pattern: Pattern với group 1 = thư mục gốc, group 2 = "<tool_id>/" lồng (nếu có)
+    """
+    escaped = re.escape(tool_id)
+    return re.compile(rf"([^/]*{escaped}[^/]*)/({escaped}/)?")
+
+
+def _file_sha256(path: Path) -> str:
+    """
+    Tính SHA256 của file (đọc theo block 1 MB)
+    
+    Args:
+        path: Đường dẫn file
+    
+    Returns:
+        str: Hex digest (lowercase)
+    """
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+# File JSON lớn hơn ngưỡng này được mmap thẳng cho orjson thay vì đọc ra bytes
+_MMAP_MIN_SIZE = 1024 * 1024
+
+
+def _load_json_file(path: Path):
+    """
+    Đọc và parse file JSON bằng os.read trên fd thô (không qua lớp buffered I/O)
+    
+    Args:
+        path: Đường dẫn file JSON
+    
+    Returns:
+        Object đã parse
+    
+    Giải thích:
+    - File nhỏ: os.read một lần với kích thước lấy từ fstat
+    - File > 1 MB và có orjson: mmap rồi đưa memoryview cho orjson, không copy
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        
+        if HAS_ORJSON and size > _MMAP_MIN_SIZE:
+            with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        
+        data = os.read(fd, size)
+        if len(data) < size:
+            # os.read có thể trả về ít hơn yêu cầu, đọc tiếp đến hết file
+            chunks = [data]
+            while True:
+                chunk = os.read(fd, 1024 * 1024)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b"".join(chunks)
+        return _json_loads(data)
+    finally:
+        os.close(fd)
 
 
 class MarketplaceManager:
@@ -34,6 +225,15 @@ class MarketplaceManager:
     # Local registry fallback
     LOCAL_REGISTRY_FILE = Path(__file__).parent.parent / "plugins" / "cache" / "marketplace" / "registry.json"
     
+    # Registry nhiều tool hơn ngưỡng này thì search_tools dùng bloom filter lọc trước
+    BLOOM_MIN_TOOLS = 500
+    
+    # Gói tải về nhỏ hơn ngưỡng này được giữ trong RAM thay vì ghi ra file tạm
+    IN_MEMORY_DOWNLOAD_LIMIT = 64 * 1024 * 1024
+    
+    # Dung lượng tối đa của cache zip đã tải (xóa bản dùng lâu nhất khi vượt)
+    ZIP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+    
     def __init__(self, tool_dir: str, cache_dir: Optional[str] = None):
         """
         Khởi tạo MarketplaceManager
@@ -50,9 +250,52 @@ class MarketplaceManager:
         self.registry_cache_file = self.cache_dir / "registry_cache.json"
         self.registry_cache_ttl = 3600  # 1 giờ
         
+        # Cache zip đã tải, key theo tool id + version
+        self.zip_cache_dir = self.cache_dir / "zips"
+        # ETag/Last-Modified của lần tải registry gần nhất (cho conditional GET)
+        self.registry_etag_file = self.cache_dir / "registry_etag.json"
+        
+        # Registry đã parse trong bộ nhớ, key = (path, mtime_ns, size) của file nguồn
+        self._registry_mem = None
+        self._registry_mem_key = None
+        self._tool_index: Dict[str, Dict] = {}
+        self._search_index: List[Tuple[Dict, str]] = []
+        self._search_blooms: Optional[List[int]] = None
+        self._by_category: Dict[str, List[Dict]] = {}
+        
         # Config file cho marketplace settings
         self.config_file = self.cache_dir / "marketplace_config.json"
         self.config = self._load_config()
+        # RLock vì install_tool giữ lock khi gọi _save_config (cũng lấy lock)
+        self._config_lock = threading.RLock()
+        # Khi _defer_config_save bật, _save_config chỉ đánh dấu dirty; ghi một lần sau cùng
+        self._defer_config_save = False
+        self._config_dirty = False
+        # Khi cài song song, dọn cache zip để sau cùng (zip của worker khác có thể đang được giải nén)
+        self._defer_zip_evict = False
+        
+        # Session dùng chung để tái sử dụng kết nối TCP/TLS giữa các lần tải
+        self._session = self._create_session()
+    
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """
+        Tạo requests.Session có connection pool và retry cho lỗi tạm thời
+        
+        Returns:
+            requests.Session: Session đã mount adapter cho http/https
+        """
+        session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+        # pool_maxsize >= max_workers của update_all để các worker không phải chờ kết nối
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
     
     def _load_config(self) -> Dict:
         """Load config từ file"""
@@ -64,23 +307,46 @@ class MarketplaceManager:
         
         if self.config_file.exists():
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded = json.load(f)
-                    # Merge với default để đảm bảo có đầy đủ fields
-                    default_config.update(loaded)
-                    return default_config
+                loaded = _load_json_file(self.config_file)
+                # Merge với default để đảm bảo có đầy đủ fields
+                default_config.update(loaded)
+                return default_config
             except Exception:
                 pass
         
         return default_config
     
     def _save_config(self):
-        """Lưu config ra file"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(Colors.error(f"❌ Lỗi lưu config: {e}"))
+        """
+        Lưu config ra file (atomic: ghi file tạm rồi os.replace)
+        
+        Giải thích:
+        - Ghi vào marketplace_config.json.tmp, fsync, rồi os.replace đè lên file thật
+          nên file config không bao giờ bị hỏng nửa chừng khi crash
+        - Trong lúc cài hàng loạt (update_all) chỉ đánh dấu dirty, ghi một lần ở cuối
+        """
+        with self._config_lock:
+            if self._defer_config_save:
+                self._config_dirty = True
+                return
+            
+            tmp_file = self.config_file.with_suffix('.json.tmp')
+            try:
+                with open(tmp_file, 'wb') as f:
+                    f.write(_json_dumps(self.config))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.config_file)
+                self._config_dirty = False
+            except Exception as e:
+                print(Colors.error(f"❌ Lỗi lưu config: {e}"))
+    
+    def _flush_config_if_dirty(self):
+        """Ghi config nếu còn thay đổi chưa lưu (gọi trong finally của install_many)"""
+        with self._config_lock:
+            self._defer_config_save = False
+            if self._config_dirty:
+                self._save_config()
     
     def _is_cache_valid(self, cache_file: Path, ttl: int) -> bool:
         """Kiểm tra cache còn hiệu lực không"""
@@ -94,6 +360,93 @@ class MarketplaceManager:
         except Exception:
             return False
     
+    def _set_registry_mem(self, registry: Dict, key: Optional[Tuple]):
+        """
+        Lưu registry đã parse vào bộ nhớ và build index theo tool id
+        
+        Args:
+            registry: Registry data
+            key: (path, mtime_ns, size) của file nguồn (None = không gắn với file)
+        """
+        self._registry_mem = registry
+        self._registry_mem_key = key
+        
+        # Giữ tool đầu tiên nếu trùng id (giống thứ tự quét tuần tự trước đây)
+        index: Dict[str, Dict] = {}
+        by_category: Dict[str, List[Dict]] = defaultdict(list)
+        for tool in registry.get('tools', []):
+            index.setdefault(tool.get('id'), tool)
+            by_category[tool.get('category', '').lower()].append(tool)
+        self._tool_index = index
+        self._by_category = dict(by_category)
+        self._search_index = self._build_search_index(registry.get('tools', []))
+        if len(self._search_index) > self.BLOOM_MIN_TOOLS:
+            self._search_blooms = [_trigram_bloom(haystack) for _, haystack in self._search_index]
+        else:
+            self._search_blooms = None
+    
+    @staticmethod
+    def _build_search_index(tools: List[Dict]) -> List[Tuple[Dict, str]]:
+        """
+        Build index tìm kiếm: (tool, chuỗi name/description/tags đã lowercase)
+        
+        Args:
+            tools: Danh sách tools trong registry
+        
+        Returns:
+            list: Danh sách (tool, haystack)
+        """
+        # Nối bằng "\n" để query không khớp vắt qua ranh giới giữa các field
+        return [
+            (tool, "\n".join([
+                tool.get('name', '').lower(),
+                tool.get('description', '').lower(),
+                *(tag.lower() for tag in tool.get('tags', []))
+            ]))
+            for tool in tools
+        ]
+    
+    def _load_registry_file(self, path: Path) -> Dict:
+        """
+        Đọc registry từ file JSON, dùng lại bản đã parse nếu file không đổi
+        
+        Args:
+            path: Đường dẫn file registry
+        
+        Returns:
+            dict: Registry data
+        """
+        st = path.stat()
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        if key == self._registry_mem_key:
+            return self._registry_mem
+        
+        registry = _load_json_file(path)
+        self._set_registry_mem(registry, key)
+        return registry
+    
+    def _conditional_headers(self) -> Dict[str, str]:
+        """
+        Tạo header If-None-Match/If-Modified-Since từ lần tải registry trước
+        
+        Returns:
+            dict: Headers (rỗng nếu chưa có cache hoặc chưa có ETag)
+        """
+        if not self.registry_cache_file.exists() or not self.registry_etag_file.exists():
+            return {}
+        
+        try:
+            meta = _load_json_file(self.registry_etag_file)
+        except Exception:
+            return {}
+        
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+    
     def fetch_registry(self, force_refresh: bool = False) -> Optional[Dict]:
         """
         Lấy registry từ remote hoặc cache
@@ -107,20 +460,18 @@ class MarketplaceManager:
         # Kiểm tra cache trước
         if not force_refresh and self._is_cache_valid(self.registry_cache_file, self.registry_cache_ttl):
             try:
-                with open(self.registry_cache_file, 'r', encoding='utf-8') as f:
-                    registry = json.load(f)
-                    print(Colors.info("ℹ️  Đang dùng registry từ cache"))
-                    return registry
+                registry = self._load_registry_file(self.registry_cache_file)
+                print(Colors.info("ℹ️  Đang dùng registry từ cache"))
+                return registry
             except Exception:
                 pass
         
         # Thử load từ local registry trước (nếu có)
         if self.LOCAL_REGISTRY_FILE.exists():
             try:
-                with open(self.LOCAL_REGISTRY_FILE, 'r', encoding='utf-8') as f:
-                    local_registry = json.load(f)
-                    print(Colors.info("ℹ️  Đang dùng registry local"))
-                    return local_registry
+                local_registry = self._load_registry_file(self.LOCAL_REGISTRY_FILE)
+                print(Colors.info("ℹ️  Đang dùng registry local"))
+                return local_registry
             except Exception:
                 pass
         
@@ -128,46 +479,87 @@ class MarketplaceManager:
         registry_url = self.config.get('registry_url', self.DEFAULT_REGISTRY_URL)
         
         print(Colors.info(f"📥 Đang tải registry từ: {registry_url}"))
-        spinner = Spinner("Đang tải registry...")
-        spinner.start()
         
         try:
-            response = requests.get(registry_url, timeout=30)
+            response = self._session.get(
+                registry_url,
+                headers=self._conditional_headers(),
+                stream=True,
+                timeout=(5, 30)  # (connect, read)
+            )
             response.raise_for_status()
             
-            registry = response.json()
+            # 304: registry trên server không đổi, dùng lại cache hiện có
+            if response.status_code == 304:
+                registry = self._load_registry_file(self.registry_cache_file)
+                # Làm mới mtime để TTL tính lại từ bây giờ, giữ memo khớp với file
+                os.utime(self.registry_cache_file)
+                st = self.registry_cache_file.stat()
+                self._registry_mem_key = (str(self.registry_cache_file), st.st_mtime_ns, st.st_size)
+                print(Colors.success("✅ Registry không thay đổi, dùng cache"))
+                return registry
+            
+            # Đọc body theo chunk, hiển thị tiến độ nếu biết content-length
+            total_size = int(response.headers.get('content-length', 0))
+            progress = None
+            if total_size > 0:
+                progress = ProgressBar(
+                    total=total_size,
+                    prefix="Registry:",
+                    suffix="bytes",
+                    show_percentage=True
+                )
+            
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if chunk:
+                    body += chunk
+                    if progress:
+                        progress.update(len(body))
+            body = bytes(body)
+            
+            if progress:
+                progress.finish("Đã tải registry thành công")
+            else:
+                print(Colors.success("✅ Đã tải registry thành công"))
             
-            # Lưu vào cache
+            registry = _json_loads(body)
+            
+            # Lưu vào cache (ghi nguyên body đã tải, không cần serialize lại)
             try:
-                with open(self.registry_cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(registry, f, indent=2, ensure_ascii=False)
+                with open(self.registry_cache_file, 'wb') as f:
+                    f.write(body)
+                st = self.registry_cache_file.stat()
+                self._set_registry_mem(registry, (str(self.registry_cache_file), st.st_mtime_ns, st.st_size))
+                
+                with open(self.registry_etag_file, 'wb') as f:
+                    f.write(_json_dumps({
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified')
+                    }))
             except Exception:
-                pass
+                self._set_registry_mem(registry, None)
             
-            spinner.stop("✅ Đã tải registry thành công")
             return registry
             
         except requests.exceptions.RequestException as e:
-            spinner.stop()
             print(Colors.warning(f"⚠️  Không thể tải registry từ remote: {e}"))
             
             # Thử dùng cache cũ nếu có
             if self.registry_cache_file.exists():
                 try:
-                    with open(self.registry_cache_file, 'r', encoding='utf-8') as f:
-                        registry = json.load(f)
-                        print(Colors.warning("⚠️  Đang dùng registry cache cũ (có thể không cập nhật)"))
-                        return registry
+                    registry = self._load_registry_file(self.registry_cache_file)
+                    print(Colors.warning("⚠️  Đang dùng registry cache cũ (có thể không cập nhật)"))
+                    return registry
                 except Exception:
                     pass
             
             # Thử dùng local registry nếu có
             if self.LOCAL_REGISTRY_FILE.exists():
                 try:
-                    with open(self.LOCAL_REGISTRY_FILE, 'r', encoding='utf-8') as f:
-                        local_registry = json.load(f)
-                        print(Colors.info("ℹ️  Đang dùng registry local (fallback)"))
-                        return local_registry
+                    local_registry = self._load_registry_file(self.LOCAL_REGISTRY_FILE)
+                    print(Colors.info("ℹ️  Đang dùng registry local (fallback)"))
+                    return local_registry
                 except Exception as e2:
                     print(Colors.error(f"❌ Lỗi khi đọc registry local: {e2}"))
             
@@ -175,7 +567,6 @@ class MarketplaceManager:
             print(Colors.info("💡 Tạo file registry tại: plugins/cache/marketplace/registry.json"))
             return None
         except Exception as e:
-            spinner.stop()
             print(Colors.error(f"❌ Lỗi: {e}"))
             return None
     
@@ -195,22 +586,25 @@ class MarketplaceManager:
             if not registry:
                 return []
         
-        tools = registry.get('tools', [])
         query_lower = query.lower()
         
-        results = []
-        for tool in tools:
-            # Tìm trong tên, mô tả, tags
-            name = tool.get('name', '').lower()
-            description = tool.get('description', '').lower()
-            tags = [tag.lower() for tag in tool.get('tags', [])]
+        # Dùng index đã lowercase sẵn nếu registry là bản đang giữ trong bộ nhớ
+        if registry is self._registry_mem:
+            search_index = self._search_index
             
-            if (query_lower in name or 
-                query_lower in description or 
-                any(query_lower in tag for tag in tags)):
-                results.append(tool)
+            # Registry lớn: bỏ qua tool thiếu trigram nào đó của query trước khi so chuỗi
+            if self._search_blooms is not None and len(query_lower) >= 3:
+                query_bloom = _trigram_bloom(query_lower)
+                return [
+                    tool
+                    for (tool, haystack), bloom in zip(search_index, self._search_blooms)
+                    if bloom & query_bloom == query_bloom and query_lower in haystack
+                ]
+        else:
+            search_index = self._build_search_index(registry.get('tools', []))
         
-        return results
+        # Tìm trong tên, mô tả, tags
+        return [tool for tool, haystack in search_index if query_lower in haystack]
     
     def list_available_tools(self, registry: Optional[Dict] = None, category: Optional[str] = None) -> List[Dict]:
         """
@@ -231,7 +625,11 @@ class MarketplaceManager:
         tools = registry.get('tools', [])
         
         if category:
-            tools = [t for t in tools if t.get('category', '').lower() == category.lower()]
+            category_lower = category.lower()
+            # Tra index theo category nếu registry là bản đang giữ trong bộ nhớ
+            if registry is self._registry_mem:
+                return list(self._by_category.get(category_lower, []))
+            tools = [t for t in tools if t.get('category', '').lower() == category_lower]
         
         return tools
     
@@ -251,6 +649,10 @@ class MarketplaceManager:
             if not registry:
                 return None
         
+        # Tra index O(1) nếu registry là bản đang giữ trong bộ nhớ
+        if registry is self._registry_mem:
+            return self._tool_index.get(tool_id)
+        
         tools = registry.get('tools', [])
         for tool in tools:
             if tool.get('id') == tool_id:
@@ -258,16 +660,68 @@ class MarketplaceManager:
         
         return None
     
-    def download_tool(self, tool_info: Dict, show_progress: bool = True) -> Optional[Path]:
+    def _zip_cache_path(self, tool_info: Dict) -> Path:
         """
-        Tải tool từ URL
+        Đường dẫn file zip trong cache theo tool id + version
+        
+        Args:
+            tool_info: Thông tin tool từ registry
+        
+        Returns:
+            Path: cache_dir/zips/<tool_id>-<version>.zip
+        """
+        name = f"{tool_info.get('id', 'unknown')}-{tool_info.get('version', '0')}"
+        return self.zip_cache_dir / (re.sub(r'[^\w.-]', '_', name) + ".zip")
+    
+    def _evict_zip_cache(self, keep: Optional[Path] = None):
+        """
+        Xóa các zip dùng lâu nhất khi cache vượt ZIP_CACHE_MAX_BYTES
+        
+        Args:
+            keep: File vừa thêm (không bao giờ bị xóa), None = không giữ file nào
+        """
+        try:
+            with os.scandir(self.zip_cache_dir) as it:
+                entries = [
+                    (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                    for entry in it
+                    if entry.is_file() and entry.name.endswith('.zip')
+                ]
+        except OSError:
+            return
+        
+        total = sum(size for _, size, _ in entries)
+        # mtime được làm mới mỗi lần dùng lại, nên cũ nhất = dùng lâu nhất
+        for _, size, path in sorted(entries):
+            if total <= self.ZIP_CACHE_MAX_BYTES:
+                break
+            if path == str(keep):
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+    
+    def download_tool(self, tool_info: Dict, show_progress: bool = True) -> Optional[Union[Path, io.BytesIO]]:
+        """
+        Tải tool từ URL (hoặc lấy từ cache zip nếu đã tải trước đó)
         
         Args:
             tool_info: Thông tin tool từ registry
             show_progress: Có hiển thị progress bar không
         
         Returns:
-            Path: Đường dẫn file zip đã tải hoặc None nếu lỗi
+            Path | BytesIO: File zip trong cache (Path), BytesIO nếu gói nhỏ không
+            cache được (không có version/checksum), hoặc None nếu lỗi
+        
+        Giải thích:
+        - Zip được lưu tại cache_dir/zips/<tool_id>-<version>.zip; cài lại cùng version
+          (gỡ rồi cài lại, rollback) không cần tải lại nếu checksum còn khớp
+        - Gói cache được thì ghi thẳng ra .part rồi os.replace, không giữ bản sao trong RAM
+        - Gói không cache được và có content-length < IN_MEMORY_DOWNLOAD_LIMIT được giữ
+          trong RAM, install_tool giải nén thẳng từ đó mà không ghi ra đĩa
+        - SHA256 được tính ngay trên luồng chunk và so với tool_info['sha256'] (nếu có)
         """
         download_url = tool_info.get('download_url')
         if not download_url:
@@ -275,14 +729,30 @@ class MarketplaceManager:
             return None
         
         tool_id = tool_info.get('id', 'unknown')
-        temp_file = self.cache_dir / f"{tool_id}_temp.zip"
+        expected_sha256 = (tool_info.get('sha256') or '').lower()
+        cache_path = self._zip_cache_path(tool_info)
+        part_file = cache_path.with_suffix('.zip.part')
+        
+        # Chỉ dùng lại cache khi có version hoặc checksum để phân biệt các bản build
+        cacheable = bool(tool_info.get('version') or expected_sha256)
+        if cacheable and cache_path.exists():
+            # File cache có thể vừa bị xóa (evict) hoặc không đọc được: tải lại
+            try:
+                if not expected_sha256 or _file_sha256(cache_path) == expected_sha256:
+                    os.utime(cache_path)  # Đánh dấu vừa dùng (LRU)
+                    if show_progress:
+                        print(Colors.info(f"📦 Dùng bản đã tải trong cache: {tool_info.get('name', tool_id)}"))
+                    return cache_path
+                cache_path.unlink()
+            except OSError:
+                pass
         
         try:
             if show_progress:
                 print(Colors.info(f"📥 Đang tải: {tool_info.get('name', tool_id)}"))
             
             # Download với progress bar
-            response = requests.get(download_url, stream=True, timeout=60)
+            response = self._session.get(download_url, stream=True, timeout=60)
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
@@ -295,38 +765,72 @@ class MarketplaceManager:
                     show_percentage=True
                 )
             
-            with open(temp_file, 'wb') as f:
+            # Gói cache được luôn ghi ra đĩa, giữ thêm trong RAM chỉ tốn bộ nhớ gấp đôi
+            in_memory = not cacheable and 0 < total_size < self.IN_MEMORY_DOWNLOAD_LIMIT
+            hasher = hashlib.sha256()
+            if in_memory:
+                f = io.BytesIO()
+            else:
+                self.zip_cache_dir.mkdir(parents=True, exist_ok=True)
+                f = open(part_file, 'wb')
+            
+            try:
                 downloaded = 0
                 for chunk in response.iter_content(chunk_size=8192):
                     if chunk:
                         f.write(chunk)
+                        hasher.update(chunk)
                         downloaded += len(chunk)
                         if show_progress and total_size > 0:
                             progress.update(downloaded)
+            finally:
+                if not in_memory:
+                    f.close()
             
             if show_progress and total_size > 0:
                 progress.finish("Tải xuống hoàn tất")
             
-            return temp_file
+            # Xác thực checksum nếu registry có cung cấp
+            if expected_sha256 and hasher.hexdigest() != expected_sha256:
+                print(Colors.error("❌ Checksum SHA256 không khớp, gói tải về có thể bị hỏng"))
+                if part_file.exists():
+                    part_file.unlink()
+                return None
+            
+            if in_memory:
+                f.seek(0)
+                return f
+            
+            # Lưu vào cache: ghi .part rồi os.replace để không bao giờ thấy file dở dang
+            os.replace(part_file, cache_path)
+            if not self._defer_zip_evict:
+                self._evict_zip_cache(keep=cache_path)
+            return cache_path
             
         except requests.exceptions.RequestException as e:
             print(Colors.error(f"❌ Lỗi khi tải tool: {e}"))
-            if temp_file.exists():
-                temp_file.unlink()
+            if part_file.exists():
+                part_file.unlink()
             return None
         except Exception as e:
             print(Colors.error(f"❌ Lỗi: {e}"))
-            if temp_file.exists():
-                temp_file.unlink()
+            if part_file.exists():
+                part_file.unlink()
             return None
     
-    def install_tool(self, tool_info: Dict, overwrite: bool = False) -> bool:
+    def get_tool_install_dir(self, tool_info: Dict) -> Path:
+        """Thư mục cài đặt của tool: tool_dir/<type>/<tool_id>"""
+        tool_type = tool_info.get('type', 'py')  # 'py' hoặc 'sh'
+        return self.tool_dir / tool_type / tool_info.get('id', 'unknown')
+    
+    def install_tool(self, tool_info: Dict, overwrite: bool = False, show_progress: bool = True) -> bool:
         """
         Cài đặt tool từ file zip hoặc URL
         
         Args:
             tool_info: Thông tin tool từ registry
             overwrite: Có ghi đè tool đã tồn tại không
+            show_progress: Có hiển thị progress bar khi tải không
         
         Returns:
             bool: True nếu thành công
@@ -336,11 +840,8 @@ class MarketplaceManager:
             print(Colors.error("❌ Tool không có ID"))
             return False
         
-        tool_name = f"{tool_id}.py"
-        tool_type = tool_info.get('type', 'py')  # 'py' hoặc 'sh'
-        
         # Kiểm tra tool đã tồn tại chưa
-        target_dir = self.tool_dir / tool_type / tool_id
+        target_dir = self.get_tool_install_dir(tool_info)
         if target_dir.exists() and not overwrite:
             print(Colors.warning(f"⚠️  Tool '{tool_id}' đã tồn tại!"))
             confirm = input(Colors.warning("   Bạn có muốn ghi đè? (yes/no): ")).strip().lower()
@@ -349,69 +850,223 @@ class MarketplaceManager:
                 return False
         
         # Tải tool
-        zip_file = self.download_tool(tool_info, show_progress=True)
-        if not zip_file or not zip_file.exists():
+        zip_file = self.download_tool(tool_info, show_progress=show_progress)
+        if not zip_file or (isinstance(zip_file, Path) and not zip_file.exists()):
             return False
         
+        # Giải nén vào thư mục staging cạnh target_dir (cùng filesystem) để
+        # bước cuối chỉ là rename, và tool cũ vẫn còn nếu giải nén bị lỗi
+        staging_dir = target_dir.parent / f".{tool_id}.installing"
+        
         try:
-            # Giải nén vào thư mục tạm
-            temp_extract = self.cache_dir / f"{tool_id}_extract"
-            if temp_extract.exists():
-                shutil.rmtree(temp_extract)
-            temp_extract.mkdir(parents=True, exist_ok=True)
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir)
+            staging_dir.mkdir(parents=True)
             
+            # Central directory chỉ parse một lần khi mở ZipFile; namelist/infolist
+            # bên dưới dùng lại kết quả đó và cũng là bước kiểm tra archive bị cắt cụt
             with zipfile.ZipFile(zip_file, 'r') as zipf:
-                zipf.extractall(temp_extract)
+                names = zipf.namelist()
+                if not names:
+                    raise zipfile.BadZipFile("archive rỗng")
+                
+                # Tìm thư mục tool trong archive chỉ từ danh sách tên (không giải nén)
+                prefix = self._find_tool_prefix(names, tool_id)
+                with _zip_view(zip_file) as view:
+                    self._extract_members(zipf, prefix, staging_dir, view)
             
-            # Tìm thư mục tool trong extracted files
-            tool_dir_found = None
-            for item in temp_extract.iterdir():
-                if item.is_dir() and (item.name == tool_id or item.name == f"{tool_type}/{tool_id}"):
-                    tool_dir_found = item
-                    break
-                elif item.is_dir() and tool_id in item.name:
-                    # Thử tìm trong subdirectory
-                    potential_dir = item / tool_id
-                    if potential_dir.exists():
-                        tool_dir_found = potential_dir
-                        break
-            
-            if not tool_dir_found:
-                # Nếu không tìm thấy, coi như toàn bộ temp_extract là tool
-                tool_dir_found = temp_extract
-            
-            # Xóa tool cũ nếu có
+            # Xóa tool cũ nếu có, rồi đổi tên staging thành thư mục đích
             if target_dir.exists():
                 shutil.rmtree(target_dir)
+            shutil.move(str(staging_dir), str(target_dir))
             
-            # Copy vào vị trí đích
-            target_dir.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copytree(tool_dir_found, target_dir)
-            
-            # Cập nhật config
-            self.config['installed_tools'][tool_id] = {
-                'name': tool_info.get('name'),
-                'version': tool_info.get('version', '1.0.0'),
-                'installed_at': datetime.now().isoformat(),
-                'source': 'marketplace'
-            }
-            self._save_config()
-            
-            # Dọn dẹp
-            if temp_extract.exists():
-                shutil.rmtree(temp_extract)
-            if zip_file.exists():
-                zip_file.unlink()
+            # Cập nhật config (có thể được gọi song song từ update_all)
+            with self._config_lock:
+                self.config['installed_tools'][tool_id] = {
+                    'name': tool_info.get('name'),
+                    'version': tool_info.get('version', '1.0.0'),
+                    'installed_at': datetime.now().isoformat(),
+                    'source': 'marketplace'
+                }
+                self._save_config()
             
             print(Colors.success(f"✅ Đã cài đặt tool: {tool_info.get('name', tool_id)}"))
             return True
             
+        except zipfile.BadZipFile as e:
+            print(Colors.error(f"❌ File zip không hợp lệ: {e}"))
+            # Bỏ bản hỏng khỏi cache zip để lần sau tải lại
+            if isinstance(zip_file, Path) and zip_file.exists():
+                zip_file.unlink()
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            return False
         except Exception as e:
             print(Colors.error(f"❌ Lỗi khi cài đặt tool: {e}"))
-            import traceback
-            traceback.print_exc()
+            # Traceback đầy đủ chỉ khi debug, tránh làm ồn/chậm khi cài hàng loạt
+            if os.environ.get('DEVTOOLS_DEBUG'):
+                import traceback
+                traceback.print_exc()
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir, ignore_errors=True)
             return False
     
+    async def install_tool_async(self, tool_info: Dict, overwrite: bool = False) -> bool:
+        """
+        Phiên bản async của install_tool (chạy install_many trong executor, không chặn event loop)
+        
+        Args:
+            tool_info: Thông tin tool từ registry
+            overwrite: Có ghi đè tool đã tồn tại không (False = bỏ qua, không hỏi)
+        
+        Returns:
+            bool: True nếu thành công
+        """
+        # run_in_executor thay cho asyncio.to_thread (chỉ có từ Python 3.9)
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, self.install_many, [tool_info], overwrite)
+        return bool(results) and results[0][1]
+    
+    def install_many(self, tool_infos: List[Dict], overwrite: bool = False,
+                     max_workers: int = 8) -> List[Tuple[str, bool]]:
+        """
+        Cài nhiều tool cùng lúc, tải và giải nén của các tool chồng lên nhau
+        
+        Args:
+            tool_infos: Danh sách thông tin tool từ registry
+            overwrite: Có ghi đè tool đã tồn tại không (False = bỏ qua tool đã tồn tại)
+            max_workers: Số luồng cài đồng thời tối đa
+        
+        Returns:
+            list: Danh sách (tool_id, thành công) theo thứ tự tool_infos (mỗi id một lần)
+        
+        Giải thích:
+        - Tool trùng id chỉ cài một lần: 2 worker cùng id sẽ dùng chung thư mục
+          staging và file .part, xóa/ghi đè lẫn nhau
+        - Tải/cài bằng ThreadPoolExecutor vì thời gian chủ yếu là chờ HTTP
+          (requests nhả GIL khi chờ I/O)
+        - Worker không bao giờ hỏi ghi đè (input() không dùng được từ thread),
+          tool đã tồn tại được lọc ngay trên thread gọi khi overwrite=False
+        - Tắt progress bar trong worker để output không bị chồng lên nhau
+        """
+        unique: Dict[str, Dict] = {}
+        for tool_info in tool_infos:
+            unique.setdefault(tool_info.get('id'), tool_info)
+        
+        results: Dict[str, bool] = {}
+        pending = []
+        for tool_id, tool_info in unique.items():
+            if not overwrite and self.get_tool_install_dir(tool_info).exists():
+                print(Colors.warning(f"⚠️  Tool '{tool_id}' đã tồn tại, bỏ qua"))
+                results[tool_id] = False
+            else:
+                pending.append((tool_id, tool_info))
+        
+        if pending:
+            # Gom các lần lưu config của worker thành một lần ghi; dọn cache zip sau khi
+            # pool xong để không xóa zip mà worker khác vừa nhận và đang giải nén
+            self._defer_config_save = True
+            self._defer_zip_evict = True
+            try:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                    futures = [
+                        (tool_id, executor.submit(self.install_tool, tool_info, True, False))
+                        for tool_id, tool_info in pending
+                    ]
+                    for tool_id, future in futures:
+                        results[tool_id] = future.result()
+            finally:
+                self._defer_zip_evict = False
+                self._evict_zip_cache()
+                self._flush_config_if_dirty()
+        
+        return [(tool_id, results[tool_id]) for tool_id in unique]
+    
+    @staticmethod
+    def _find_tool_prefix(names: List[str], tool_id: str) -> str:
+        """
+        Xác định thư mục chứa tool trong archive
+        
+        Args:
+            names: Danh sách tên member trong zip
+            tool_id: ID của tool
+        
+        Returns:
+            str: Prefix của thư mục tool (vd: "tool-id/"), "" = toàn bộ archive
+        
+        Giải thích:
+        - Ưu tiên thư mục gốc trùng tên tool_id
+        - Sau đó thử "<thư mục gốc chứa tool_id>/<tool_id>/"
+        - Không tìm thấy thì coi toàn bộ archive là tool
+        """
+        # Một lần quét: group 1 = thư mục gốc chứa tool_id, group 2 = "<tool_id>/" lồng bên trong
+        pattern = _tool_dir_pattern(tool_id)
+        nested_tops = set()
+        for name in names:
+            match = pattern.match(name)
+            if not match:
+                continue
+            top = match.group(1)
+            if top == tool_id:
+                return f"{tool_id}/"
+            if match.group(2):
+                nested_tops.add(top)
+        
+        if nested_tops:
+            # Thử tìm trong subdirectory (chọn theo thứ tự tên để kết quả ổn định)
+            return f"{min(nested_tops)}/{tool_id}/"
+        
+        return ""
+    
+    @staticmethod
+    def _extract_members(zipf: zipfile.ZipFile, prefix: str, target_dir: Path,
+                         view: Optional[memoryview] = None):
+        """
+        Giải nén các member nằm dưới prefix thẳng vào target_dir
+        
+        Args:
+            zipf: ZipFile đang mở
+            prefix: Prefix thư mục tool trong archive
+            target_dir: Thư mục đích
+            view: memoryview trên toàn bộ archive (None = luôn đọc qua zipf.open)
+        
+        Giải thích:
+        - Member ZIP_STORED (không nén, không mã hóa) được cắt thẳng từ view theo
+          offset trong local header rồi ghi một lần, kiểm tra CRC bằng zlib.crc32
+        - Member nén (DEFLATE...) vẫn đọc qua zipf.open
+        """
+        for info in zipf.infolist():
+            if not info.filename.startswith(prefix):
+                continue
+            
+            rel = info.filename[len(prefix):]
+            # Bỏ qua path tuyệt đối/".." (zip slip) giống extractall
+            parts = [p for p in rel.split('/') if p not in ('', '.', '..')]
+            if not parts:
+                continue
+            dest = target_dir.joinpath(*parts)
+            
+            if info.is_dir():
+                dest.mkdir(parents=True, exist_ok=True)
+                continue
+            
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            
+            if view is not None and info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                # Local header: 30 byte cố định, độ dài tên/extra ở offset 26/28
+                offset = info.header_offset
+                name_len, extra_len = struct.unpack_from('<HH', view, offset + 26)
+                start = offset + 30 + name_len + extra_len
+                data = view[start:start + info.file_size]
+                if zlib.crc32(data) != info.CRC:
+                    raise zipfile.BadZipFile(f"CRC không khớp: {info.filename}")
+                with open(dest, 'wb') as dst:
+                    dst.write(data)
+                continue
+            
+            with zipf.open(info) as src, open(dest, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 256 * 1024)
+    
     def uninstall_tool(self, tool_id: str) -> bool:
         """
         Gỡ cài đặt tool
@@ -485,10 +1140,68 @@ class MarketplaceManager:
         installed_version = installed_info.get('version', '0.0.0')
         latest_version = tool_info.get('version', '0.0.0')
         
-        if installed_version >= latest_version:
+        if not self._needs_update(installed_version, latest_version):
             print(Colors.info(f"ℹ️  Tool '{tool_id}' đã ở phiên bản mới nhất ({installed_version})"))
             return False
         
         print(Colors.info(f"🔄 Đang cập nhật '{tool_id}' từ {installed_version} lên {latest_version}"))
         return self.install_tool(tool_info, overwrite=True)
-
+    
+    @staticmethod
+    def _needs_update(installed_version: str, latest_version: str) -> bool:
+        """
+        Kiểm tra phiên bản trên registry có mới hơn bản đã cài không
+        
+        Args:
+            installed_version: Version đã cài
+            latest_version: Version mới nhất trên registry
+        
+        Returns:
+            bool: True nếu cần cập nhật
+        """
+        installed = _parse_version(installed_version)
+        latest = _parse_version(latest_version)
+        if installed is None or latest is None:
+            # Không so sánh được thì chỉ cập nhật khi version khác nhau
+            return installed_version != latest_version
+        return installed < latest
+    
+    def update_all(self, registry: Optional[Dict] = None, max_workers: int = 8) -> List[Tuple[str, bool]]:
+        """
+        Cập nhật tất cả tools đã cài có phiên bản mới, tải song song
+        
+        Args:
+            registry: Registry data (None = tự động fetch)
+            max_workers: Số luồng tải tối đa
+        
+        Returns:
+            list: Danh sách (tool_id, thành công) của các tool cần cập nhật
+        
+        Giải thích:
+        - So sánh version đã cài với registry để lọc ra các tool cần cập nhật
+        - Cài song song qua install_many (overwrite=True)
+        """
+        if registry is None:
+            registry = self.fetch_registry()
+            if not registry:
+                return []
+        
+        pending = []
+        for tool_id, installed_info in list(self.config.get('installed_tools', {}).items()):
+            tool_info = self.get_tool_info(tool_id, registry)
+            if not tool_info:
+                print(Colors.error(f"❌ Không tìm thấy tool: {tool_id}"))
+                continue
+            
+            installed_version = installed_info.get('version', '0.0.0')
+            latest_version = tool_info.get('version', '0.0.0')
+            if not self._needs_update(installed_version, latest_version):
+                continue
+            
+            print(Colors.info(f"🔄 Đang cập nhật '{tool_id}' từ {installed_version} lên {latest_version}"))
+            pending.append(tool_info)
+        
+        if not pending:
+            return []
+        
+        return self.install_many(pending, overwrite=True, max_workers=max_workers)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Module processing - Các hàm hỗ trợ xử lý song song dùng chung cho tools
+
+Mục đích: Tập trung logic quản lý process pool cho các tool xử lý hàng loạt
+Lý do: Tránh mỗi lần xử lý lại phải tạo/hủy pool (fork/spawn + import lại module)
+"""
+
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+
+# Pool dùng chung theo số worker, tạo lazy và đóng khi thoát chương trình
+# Giá trị: (initializer, initargs, pool)
+_shared_pools: Dict[int, Tuple[Optional[Callable], tuple, ProcessPoolExecutor]] = {}
+_shared_pools_lock = threading.Lock()
+
+def _read_seq_threshold(default: int = 4) -> int:
+    """Đọc ngưỡng xử lý tuần tự từ biến môi trường DEVTOOLS_SEQ_THRESHOLD"""
+    try:
+        return max(0, int(os.environ.get('DEVTOOLS_SEQ_THRESHOLD', default)))
+    except ValueError:
+        return default
+
+
+# Batch có số item <= ngưỡng này xử lý tuần tự: chi phí tạo pool/pickle
+# lớn hơn thời gian xử lý (đặc biệt spawn trên Windows)
+SEQ_THRESHOLD = _read_seq_threshold()
+
+# Python build free-threaded (PEP 703, vd: python3.13t chạy với GIL tắt):
+# thread chạy song song thật kể cả code Python thuần
+FREE_THREADED = hasattr(sys, '_is_gil_enabled') and not sys._is_gil_enabled()
+
+# Tỷ lệ CPU time / wall time dưới ngưỡng này coi là I/O-bound (nên dùng thread)
+IO_BOUND_CPU_RATIO = 0.3
+
+
+def _get_mp_context():
+    """
+    Chọn start method cho process pool
+
+    Returns:
+        BaseContext: "forkserver" trên Linux, mặc định của hệ điều hành ở nơi khác
+
+    Giải thích:
+    - Không dùng fork: lúc pool tạo worker, process chính đã có thread khác chạy
+      (AsyncProgress, pool thread...), fork process đa luồng có thể deadlock
+      nếu lock đang bị thread khác giữ
+    - forkserver (mặc định từ Python 3.14 trên Linux) fork từ một server
+      đơn luồng; state read-only vẫn nạp 1 lần/worker qua initializer
+    - Windows chỉ có spawn, macOS mặc định spawn vì fork không an toàn
+    """
+    if sys.platform.startswith('linux') and 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context()
+
+
+def get_shared_pool(max_workers: int,
+                    initializer: Optional[Callable] = None,
+                    initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    Lấy ProcessPoolExecutor dùng chung cho số worker chỉ định
+
+    Args:
+        max_workers: Số process worker
+        initializer: Hàm chạy 1 lần trong mỗi worker khi khởi động (tùy chọn)
+        initargs: Tham số cho initializer (so sánh bằng == để quyết định tái sử dụng)
+
+    Returns:
+        ProcessPoolExecutor: Pool đã tạo sẵn (hoặc mới tạo nếu chưa có)
+
+    Giải thích:
+    - Pool được tạo lần đầu cần dùng và giữ lại cho các lần xử lý sau
+    - Dùng initializer để nạp config read-only vào global của worker 1 lần,
+      task chỉ cần gửi dữ liệu riêng (đường dẫn file) qua IPC
+    - Nếu initializer/initargs khác lần trước thì tạo pool mới thay pool cũ
+    - Tự tạo lại nếu pool cũ bị hỏng (worker chết đột ngột)
+    - Tự shutdown khi thoát chương trình (atexit)
+    - Không dùng "with pool:" vì sẽ shutdown pool dùng chung
+
+    Lưu ý: Hàm gửi vào pool phải là hàm top-level (pickle được)
+    """
+    with _shared_pools_lock:
+        entry = _shared_pools.get(max_workers)
+
+        if entry is not None:
+            old_initializer, old_initargs, pool = entry
+            # _broken được đặt khi một worker chết, pool không nhận task mới được nữa
+            if (old_initializer is initializer and old_initargs == initargs
+                    and not getattr(pool, '_broken', False)):
+                return pool
+            pool.shutdown(wait=False)
+
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=_get_mp_context(),
+            initializer=initializer,
+            initargs=initargs
+        )
+        _shared_pools[max_workers] = (initializer, initargs, pool)
+        atexit.register(pool.shutdown, wait=False)
+
+        return pool
+
+
+def measure_executor_mode(func: Callable, *args, **kwargs) -> Tuple[Any, str]:
+    """
+    Chạy thử 1 task để chọn loại executor phù hợp
+
+    Args:
+        func: Hàm xử lý 1 item
+        *args, **kwargs: Tham số cho func
+
+    Returns:
+        tuple: (kết quả của func, "thread" hoặc "process")
+
+    Giải thích:
+    - Đo CPU time (process_time) so với wall time (monotonic) của 1 lần chạy
+    - CPU/wall < IO_BOUND_CPU_RATIO: phần lớn thời gian chờ I/O hoặc ở
+      code C đã nhả GIL -> ThreadPoolExecutor (rẻ, không fork/pickle)
+    - Ngược lại là CPU-bound thuần Python -> ProcessPoolExecutor
+    - Trên build free-threaded (FREE_THREADED) luôn chọn thread: không có
+      GIL nên thread song song thật, tránh hẳn chi phí fork/pickle
+    - Kết quả của lần chạy thử được trả về để không phải xử lý lại item đó
+    """
+    wall_start = time.monotonic()
+    cpu_start = time.process_time()
+
+    result = func(*args, **kwargs)
+
+    wall_time = time.monotonic() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    if FREE_THREADED or wall_time <= 0 or cpu_time / wall_time < IO_BOUND_CPU_RATIO:
+        return result, 'thread'
+    return result, 'process'
+
+
+def submit_stream(executor: Executor, func: Callable, iterable: Iterable[tuple],
+                  limit: int) -> Iterator[Tuple[tuple, Future]]:
+    """
+    Submit task theo luồng, giữ tối đa limit future đang chạy
+
+    Args:
+        executor: Thread/Process pool executor
+        func: Hàm xử lý, gọi func(*args) với mỗi args trong iterable
+        iterable: Iterable các tuple tham số (có thể là generator)
+        limit: Số future tối đa đang chạy cùng lúc (thường 2*max_workers)
+
+    Yields:
+        tuple: (args, future) theo thứ tự hoàn thành
+
+    Giải thích:
+    - Không tạo dict future cho toàn bộ item ngay từ đầu: bộ nhớ O(limit)
+      và kết quả đầu tiên có ngay khi task đầu xong
+    - Mỗi khi 1 future xong thì submit item tiếp theo
+    - Caller tự gọi future.result() để xử lý lỗi theo cách riêng
+
+    Ví dụ:
+        for args, future in submit_stream(pool, work, tasks, limit=8):
+            result = future.result()
+    """
+    items = iter(iterable)
+    pending: Dict[Future, tuple] = {}
+
+    def submit_next() -> bool:
+        args = next(items, None)
+        if args is None:
+            return False
+        pending[executor.submit(func, *args)] = args
+        return True
+
+    for _ in range(max(1, limit)):
+        if not submit_next():
+            break
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            args = pending.pop(future)
+            submit_next()
+            yield args, future
@@ -7,11 +7,19 @@ Mục đích: Cải thiện UX bằng cách cho người dùng biết tiến đ
 Lý do: Các thao tác xử lý nhiều file có thể mất thời gian
 """
 
+from __future__ import annotations
+
+import queue
 import sys
+import threading
 import time
-from typing import Optional
 from .colors import Colors
 
+# Chỉ dùng cho type hint
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional
+
 
 class ProgressBar:
     """
@@ -20,6 +28,9 @@ class ProgressBar:
     Mục đích: Giúp người dùng theo dõi tiến độ xử lý
     """
     
+    # Khoảng cách tối thiểu giữa 2 lần vẽ lại (~30 lần/giây)
+    MIN_REDRAW_INTERVAL = 1 / 30
+    
     def __init__(self, total: int, prefix: str = '', suffix: str = '', 
                  length: int = 50, fill: str = '█', show_percentage: bool = True):
         """
@@ -47,6 +58,7 @@ class ProgressBar:
         self.show_percentage = show_percentage
         self.current = 0
         self.start_time = time.time()
+        self._last_draw = 0.0
     
     def update(self, current: Optional[int] = None, message: str = '') -> None:
         """
@@ -61,6 +73,8 @@ class ProgressBar:
         - Nếu không, tự động tăng counter lên 1
         - Tính phần trăm hoàn thành
         - Hiển thị progress bar với format đẹp
+        - Chỉ vẽ lại tối đa ~30 lần/giây (luôn vẽ khi hoàn thành), tránh
+          tốn CPU format/ghi terminal khi xử lý hàng nghìn file nhỏ
         """
         if current is not None:
             self.current = current
@@ -71,6 +85,12 @@ class ProgressBar:
         if self.current > self.total:
             self.current = self.total
         
+        # Throttle: bỏ qua lần vẽ nếu vừa vẽ xong (counter vẫn được cập nhật)
+        now = time.monotonic()
+        if self.current < self.total and now - self._last_draw < self.MIN_REDRAW_INTERVAL:
+            return
+        self._last_draw = now
+        
         # Tính phần trăm
         percent = 100 * (self.current / float(self.total))
         filled_length = int(self.length * self.current // self.total)
@@ -216,6 +236,91 @@ class Spinner:
             self.current_frame = (self.current_frame + 1) % len(self.frames)
 
 
+class AsyncProgress:
+    """
+    Progress bar vẽ ở thread riêng, nhận cập nhật qua queue giới hạn
+    
+    Mục đích: Vòng lặp thu kết quả không bị chặn bởi việc ghi terminal
+    Lý do: Ghi terminal có thể mất vài ms, làm chậm việc lấy kết quả
+    từ worker và submit task tiếp theo
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, total: int, prefix: str = '', maxsize: int = 128, **kwargs):
+        """
+        Khởi tạo và bắt đầu thread vẽ progress bar
+        
+        Args:
+            total: Tổng số items cần xử lý
+            prefix: Text hiển thị trước progress bar
+            maxsize: Số cập nhật tối đa chờ trong queue
+            **kwargs: Tham số khác truyền cho ProgressBar
+        
+        Giải thích:
+        - Thread daemon lấy message từ queue và gọi ProgressBar.update
+        - Nếu nhiều message đang chờ, chỉ vẽ message mới nhất
+        """
+        self._bar = ProgressBar(total, prefix=prefix, **kwargs)
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._count = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def notify(self, message: str = '') -> None:
+        """
+        Báo hoàn thành 1 item (không chặn)
+        
+        Args:
+            message: Thông báo hiển thị sau progress bar
+        
+        Giải thích:
+        - Chỉ tăng counter và put_nowait vào queue
+        - Queue đầy thì bỏ message (counter vẫn đúng, lần vẽ sau sẽ cập nhật)
+        """
+        self._count += 1
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            pass
+    
+    def _run(self) -> None:
+        """Vòng lặp vẽ progress bar trong thread riêng"""
+        self._bar.update(0)
+        
+        while True:
+            message = self._queue.get()
+            if message is self._STOP:
+                return
+            
+            # Gộp các message đang chờ, chỉ vẽ message mới nhất
+            stop = False
+            while True:
+                try:
+                    pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is self._STOP:
+                    stop = True
+                    break
+                message = pending
+            
+            self._bar.update(self._count, message)
+            if stop:
+                return
+    
+    def finish(self, message: str = "Hoàn thành!") -> None:
+        """
+        Vẽ nốt các cập nhật còn lại, dừng thread và hiển thị thông báo
+        
+        Args:
+            message: Thông báo khi hoàn thành
+        """
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._bar.finish(message)
+
+
 def simple_progress(iterable, prefix: str = '', total: Optional[int] = None):
     """
     Generator đơn giản hiển thị progress cho vòng lặp
@@ -7,25 +7,11 @@ Mục đích: Sử dụng Rich library để tạo UI đẹp hơn với tables,
 Lý do: Cải thiện UX với components hiện đại và đẹp mắt
 """
 
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich.panel import Panel
-    from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
-    from rich.text import Text
-    from rich.layout import Layout
-    from rich.markdown import Markdown
-    from rich.syntax import Syntax
-    from rich.prompt import Prompt, Confirm
-    from rich.tree import Tree
-    RICH_AVAILABLE = True
-except ImportError:
-    RICH_AVAILABLE = False
-    # Fallback nếu không có Rich
-    Console = None
-    Table = None
-    Panel = None
-    Progress = None
+import importlib.util
+
+# Chỉ kiểm tra Rich có cài không (không import): import Rich mất ~80ms,
+# các submodule được import lazy trong từng method khi thực sự cần
+RICH_AVAILABLE = importlib.util.find_spec('rich') is not None
 
 
 class RichUI:
@@ -39,10 +25,22 @@ class RichUI:
             use_rich: Có sử dụng Rich không (False = fallback về console thường)
         """
         self.use_rich = use_rich and RICH_AVAILABLE
-        if self.use_rich:
-            self.console = Console()
-        else:
-            self.console = None
+        self._console = None
+    
+    @property
+    def console(self):
+        """
+        Rich Console, tạo lazy ở lần dùng đầu tiên
+        
+        Giải thích:
+        - Console() dò terminal (ioctl, biến môi trường), tool không in gì
+          qua Rich thì không phải trả chi phí này
+        - Trả về None nếu không dùng Rich
+        """
+        if self._console is None and self.use_rich:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
     
     def print_table(self, title: str, headers: list, rows: list, show_header: bool = True):
         """
@@ -55,17 +53,18 @@ class RichUI:
             show_header: Có hiển thị header không
         """
         if not self.use_rich:
-            # Fallback: in bảng đơn giản
-            print(f"\n{title}")
-            print("=" * 80)
+            # Fallback: in bảng đơn giản (gom các dòng rồi in 1 lần)
+            lines = [f"\n{title}", "=" * 80]
             if show_header:
-                print(" | ".join(headers))
-                print("-" * 80)
-            for row in rows:
-                print(" | ".join(str(cell) for cell in row))
-            print()
+                lines.append(" | ".join(headers))
+                lines.append("-" * 80)
+            lines.extend(" | ".join(str(cell) for cell in row) for row in rows)
+            lines.append('')
+            print('\n'.join(lines))
             return
         
+        from rich.table import Table
+        
         table = Table(title=title, show_header=show_header, header_style="bold magenta")
         
         # Thêm columns
@@ -89,18 +88,17 @@ class RichUI:
             border_style: Style cho border
         """
         if not self.use_rich:
-            # Fallback: in với border đơn giản
-            print()
+            # Fallback: in với border đơn giản (gom lại in 1 lần)
             if title:
-                print(f"╔═ {title} {'═' * (76 - len(title))}╗")
+                top_border = f"╔═ {title} {'═' * (76 - len(title))}╗"
             else:
-                print("╔" + "═" * 78 + "╗")
-            for line in content.split('\n'):
-                print(f"║ {line:<77}║")
-            print("╚" + "═" * 78 + "╝")
-            print()
+                top_border = "╔" + "═" * 78 + "╗"
+            lines = [f"║ {line:<77}║" for line in content.split('\n')]
+            print('\n'.join(['', top_border, *lines, "╚" + "═" * 78 + "╝", '']))
             return
         
+        from rich.panel import Panel
+        
         panel = Panel(
             content,
             title=title,
@@ -153,13 +151,16 @@ class RichUI:
             from utils.progress import ProgressBar
             return ProgressBar(total, prefix=description)
         
+        from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
+        
         progress = Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeRemainingColumn(),
-            console=self.console
+            console=self.console,
+            refresh_per_second=10
         )
         
         return progress
@@ -173,24 +174,27 @@ class RichUI:
             tree_data: Dict chứa cấu trúc cây
         """
         if not self.use_rich:
-            # Fallback: in cây đơn giản
-            def print_tree_recursive(data, prefix="", is_last=True):
+            # Fallback: in cây đơn giản (gom các dòng rồi in 1 lần)
+            lines = [f"\n{title}", "=" * 80]
+            
+            def build_tree_lines(data, prefix=""):
                 items = list(data.items())
                 for i, (key, value) in enumerate(items):
                     is_last_item = i == len(items) - 1
                     current_prefix = "└── " if is_last_item else "├── "
-                    print(f"{prefix}{current_prefix}{key}")
+                    lines.append(f"{prefix}{current_prefix}{key}")
                     
                     if isinstance(value, dict):
                         next_prefix = prefix + ("    " if is_last_item else "│   ")
-                        print_tree_recursive(value, next_prefix, is_last_item)
+                        build_tree_lines(value, next_prefix)
             
-            print(f"\n{title}")
-            print("=" * 80)
-            print_tree_recursive(tree_data)
-            print()
+            build_tree_lines(tree_data)
+            lines.append('')
+            print('\n'.join(lines))
             return
         
+        from rich.tree import Tree
+        
         tree = Tree(title)
         self._build_tree(tree, tree_data)
         self.console.print(tree)
@@ -220,6 +224,8 @@ class RichUI:
             print("```\n")
             return
         
+        from rich.syntax import Syntax
+        
         syntax = Syntax(code, language, theme=theme)
         self.console.print(syntax)
     
@@ -230,6 +236,8 @@ class RichUI:
             print(markdown)
             return
         
+        from rich.markdown import Markdown
+        
         md = Markdown(markdown)
         self.console.print(md)
     
@@ -250,6 +258,8 @@ class RichUI:
                 return input(f"{message} [{default}]: ").strip() or default
             return input(f"{message}: ").strip()
         
+        from rich.prompt import Prompt
+        
         return Prompt.ask(message, default=default)
     
     def confirm(self, message: str, default: bool = True) -> bool:
@@ -271,6 +281,8 @@ class RichUI:
                 return default
             return response in ['y', 'yes', 'có', 'c']
         
+        from rich.prompt import Confirm
+        
         return Confirm.ask(message, default=default)
 
 
@@ -7,13 +7,105 @@ Mục đích: Cải thiện performance với caching thông minh, TTL, invalida
 Lý do: Giảm thời gian load và tăng tốc độ xử lý
 """
 
+import os
 import json
+import atexit
 import time
 import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Optional, Callable, Dict
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, wraps
+
+# Thử import xxhash (hash không mã hóa, dùng SIMD), nếu không có thì dùng md5
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+# Thử import msgpack (serialize nhị phân nhanh, file nhỏ hơn), nếu không có thì dùng json
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+# Đuôi file cache theo định dạng đang dùng (file .json cũ vẫn đọc được)
+CACHE_SUFFIX = '.msgpack' if HAS_MSGPACK else '.json'
+CACHE_SUFFIXES = ('.msgpack', '.json')
+
+
+@lru_cache(maxsize=1024)
+def _hash_key(key: str) -> str:
+    """
+    Hash cache key thành tên file (32 ký tự hex)
+    
+    Giải thích:
+    - Key cache không cần hash mã hóa: xxh3_128 nhanh hơn md5 nhiều lần
+    - lru_cache: get rồi set cùng 1 key (pattern phổ biến) chỉ hash 1 lần
+    """
+    if HAS_XXHASH:
+        return xxhash.xxh3_128_hexdigest(key)
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _hash_call(qualname_bytes: bytes, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """
+    Hash lời gọi hàm (tên + args + kwargs) thành cache key 32 ký tự hex
+    
+    Args:
+        qualname_bytes: func.__qualname__ đã encode sẵn lúc decorate
+        args: Positional args của lời gọi
+        kwargs: Keyword args của lời gọi
+    
+    Returns:
+        str: Key đã hash, dùng trực tiếp làm tên file (prehashed=True)
+    
+    Giải thích:
+    - pickle.dumps giữ cấu trúc tuple nên f("a:b") và f("a", "b") khác key,
+      không gọi str() trên từng arg (chậm với object lớn)
+    - Arg không pickle được (lambda, lock...) thì dùng repr thay thế
+    - Byte 0 ngăn cách tên hàm với payload để 2 phần không trộn lẫn nhau
+    """
+    call = (args, tuple(sorted(kwargs.items())))
+    try:
+        payload = pickle.dumps(call, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        payload = repr(call).encode('utf-8', 'backslashreplace')
+    
+    if HAS_XXHASH:
+        h = xxhash.xxh3_128(qualname_bytes)
+    else:
+        h = hashlib.md5(qualname_bytes)
+    h.update(b'\0')
+    h.update(payload)
+    return h.hexdigest()
+
+
+def _dump_item(item: Dict[str, Any]) -> bytes:
+    """Serialize cache item theo định dạng hiện tại (msgpack hoặc json)"""
+    if HAS_MSGPACK:
+        return msgpack.packb(item, use_bin_type=True)
+    return json.dumps(item, ensure_ascii=False).encode('utf-8')
+
+
+def _load_item(cache_file: Path) -> Dict[str, Any]:
+    """
+    Đọc cache item, chọn định dạng theo đuôi file
+    
+    Giải thích:
+    - .msgpack: msgpack.unpackb
+    - .json: json (file cache cũ trước khi có msgpack)
+    """
+    data = cache_file.read_bytes()
+    if cache_file.suffix == '.msgpack':
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
 
 
 class SmartCache:
@@ -38,44 +130,120 @@ class SmartCache:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
         self.default_ttl = default_ttl
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}
+        # LRU: item dùng gần nhất ở cuối, item ít dùng nhất bị xóa trước
+        self.memory_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.max_memory_items = 100  # Giới hạn số items trong memory cache
+        # Khóa cho memory_cache: OrderedDict không an toàn khi nhiều thread
+        # cùng sửa (move_to_end/popitem xen kẽ làm hỏng thứ tự LRU)
+        self._lock = threading.RLock()
+        
+        # Index file cache trên đĩa: cache_key (hash) -> tên file, tạo lazy
+        # bằng 1 lần scandir (xem _get_file_index)
+        self._file_index: Optional[Dict[str, str]] = None
+        
+        # Item đã set() nhưng writer thread chưa ghi xong: cache_key -> item.
+        # get() đọc từ đây thay vì file (có thể chưa tồn tại)
+        self._pending_writes: Dict[str, Dict[str, Any]] = {}
+        
+        # Ghi file cache ở thread nền (1 worker nên các lệnh ghi/xóa giữ đúng thứ tự),
+        # set() trả về ngay sau khi cập nhật memory cache
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smartcache-writer")
+        atexit.register(self._writer.shutdown, wait=True)
     
-    def _get_cache_key(self, key: str) -> str:
-        """Tạo cache key từ string"""
-        return hashlib.md5(key.encode()).hexdigest()
+    def _get_cache_key(self, key: str, prehashed: bool = False) -> str:
+        """Tạo cache key từ string (key đã hash sẵn thì dùng luôn)"""
+        if prehashed:
+            return key
+        return _hash_key(key)
     
-    def _get_cache_file(self, key: str) -> Path:
-        """Lấy đường dẫn file cache"""
-        cache_key = self._get_cache_key(key)
-        return self.cache_dir / f"{cache_key}.json"
+    def _get_cache_file(self, key: str, prehashed: bool = False) -> Path:
+        """Lấy đường dẫn file cache (theo định dạng hiện tại)"""
+        cache_key = self._get_cache_key(key, prehashed)
+        return self.cache_dir / f"{cache_key}{CACHE_SUFFIX}"
     
-    def get(self, key: str, default: Any = None) -> Optional[Any]:
+    def _get_file_index(self) -> Dict[str, str]:
+        """
+        Lấy index file cache trên đĩa (gọi khi đang giữ self._lock)
+        
+        Returns:
+            dict: cache_key -> tên file (.msgpack hoặc .json)
+        
+        Giải thích:
+        - Tạo ở lần tra file đầu tiên bằng 1 lần scandir (chỉ đọc tên file,
+          không stat), sau đó get() không phải exists() từng file nữa:
+          key không có trong index là miss ngay
+        - set/invalidate/clear/cleanup_expired cập nhật index tương ứng
+        - Có cả 2 định dạng thì ưu tiên định dạng hiện tại (file .json cũ là migration)
+        - File do process khác tạo sau khi index đã dựng sẽ không thấy: chỉ
+          là cache miss, giá trị được tính lại và ghi đè
+        """
+        if self._file_index is None:
+            index: Dict[str, str] = {}
+            try:
+                with os.scandir(self.cache_dir) as it:
+                    for entry in it:
+                        name = entry.name
+                        if not name.endswith(CACHE_SUFFIXES):
+                            continue
+                        cache_key, suffix = os.path.splitext(name)
+                        if cache_key not in index or suffix == CACHE_SUFFIX:
+                            index[cache_key] = name
+            except OSError:
+                pass
+            self._file_index = index
+        return self._file_index
+    
+    def _find_cache_file(self, key: str, prehashed: bool = False) -> Optional[Path]:
+        """
+        Tìm file cache đang tồn tại của key (tra index, không stat file)
+        
+        Giải thích:
+        - Ưu tiên định dạng hiện tại, sau đó là file .json cũ (migration)
+        """
+        cache_key = self._get_cache_key(key, prehashed)
+        with self._lock:
+            name = self._get_file_index().get(cache_key)
+        if name is None:
+            return None
+        return self.cache_dir / name
+    
+    def get(self, key: str, default: Any = None, prehashed: bool = False) -> Optional[Any]:
         """
         Lấy giá trị từ cache
         
         Args:
             key: Cache key
             default: Giá trị mặc định nếu không tìm thấy
+            prehashed: key đã là hex hash (vd: từ @cached), không hash lại
         
         Returns:
             Giá trị cached hoặc default
         """
         # Kiểm tra memory cache trước
-        if key in self.memory_cache:
-            item = self.memory_cache[key]
-            if self._is_valid(item):
-                return item['value']
-            else:
+        with self._lock:
+            item = self.memory_cache.get(key)
+            if item is not None:
+                if self._is_valid(item):
+                    self.memory_cache.move_to_end(key)
+                    return item['value']
                 # Expired, xóa khỏi memory
                 del self.memory_cache[key]
         
+        # Item đang chờ ghi ra đĩa: dùng luôn bản trong bộ nhớ
+        cache_key = self._get_cache_key(key, prehashed)
+        with self._lock:
+            item = self._pending_writes.get(cache_key)
+        if item is not None:
+            if self._is_valid(item):
+                self._add_to_memory(key, item)
+                return item['value']
+            return default
+        
         # Kiểm tra file cache
-        cache_file = self._get_cache_file(key)
-        if cache_file.exists():
+        cache_file = self._find_cache_file(cache_key, prehashed=True)
+        if cache_file is not None:
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    item = json.load(f)
+                item = _load_item(cache_file)
                 
                 if self._is_valid(item):
                     # Lưu vào memory cache
@@ -83,13 +251,17 @@ class SmartCache:
                     return item['value']
                 else:
                     # Expired, xóa file
+                    self._forget_file(cache_file.stem, cache_file.name)
                     cache_file.unlink()
+            except FileNotFoundError:
+                # File đã bị xóa từ bên ngoài, bỏ khỏi index
+                self._forget_file(cache_file.stem, cache_file.name)
             except Exception:
                 pass
         
         return default
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, prehashed: bool = False):
         """
         Lưu giá trị vào cache
         
@@ -97,6 +269,7 @@ class SmartCache:
             key: Cache key
             value: Giá trị cần cache
             ttl: Thời gian sống (None = dùng default_ttl)
+            prehashed: key đã là hex hash (vd: từ @cached), không hash lại
         """
         if ttl is None:
             ttl = self.default_ttl
@@ -112,81 +285,149 @@ class SmartCache:
         # Lưu vào memory cache
         self._add_to_memory(key, item)
         
-        # Lưu vào file cache
-        cache_file = self._get_cache_file(key)
+        # Lưu vào file cache (ở thread nền)
+        cache_file = self._get_cache_file(key, prehashed)
+        with self._lock:
+            self._get_file_index()[cache_file.stem] = cache_file.name
+            self._pending_writes[cache_file.stem] = item
+        self._writer.submit(self._write_to_disk, cache_file, item)
+    
+    def _write_to_disk(self, cache_file: Path, item: Dict[str, Any]):
+        """
+        Ghi cache item ra file (chạy trên writer thread)
+        
+        Giải thích:
+        - Ghi ra file tạm rồi os.replace: reader không bao giờ thấy file ghi dở
+        - Ghi thời điểm hết hạn vào mtime của file: cleanup_expired chỉ
+          cần đọc metadata thư mục, không phải mở/parse từng file
+        - Xong thì bỏ item khỏi _pending_writes (trừ khi set() mới hơn đã thay item)
+        """
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(item, f, ensure_ascii=False)
+            tmp_file.write_bytes(_dump_item(item))
+            os.utime(tmp_file, (item['expires_at'], item['expires_at']))
+            os.replace(tmp_file, cache_file)
         except Exception:
-            pass
+            try:
+                tmp_file.unlink()
+            except OSError:
+                pass
+        finally:
+            with self._lock:
+                if self._pending_writes.get(cache_file.stem) is item:
+                    del self._pending_writes[cache_file.stem]
     
-    def _add_to_memory(self, key: str, item: Dict[str, Any]):
-        """Thêm vào memory cache (với giới hạn)"""
-        # Nếu đã đầy, xóa item cũ nhất
-        if len(self.memory_cache) >= self.max_memory_items:
-            # Xóa item cũ nhất (FIFO)
-            oldest_key = next(iter(self.memory_cache))
-            del self.memory_cache[oldest_key]
+    def _forget_file(self, cache_key: str, name: Optional[str] = None):
+        """
+        Bỏ file của cache_key khỏi index (file đã/đang bị xóa)
+        
+        Args:
+            cache_key: Key đã hash
+            name: Tên file bị xóa (None = bỏ bất kể file nào); index đang trỏ
+                  tới file khác (vd: xóa .json cũ nhưng còn .msgpack) thì giữ nguyên
         
-        self.memory_cache[key] = item
+        Giải thích:
+        - Key còn lệnh ghi đang chờ thì giữ nguyên: file sắp được (ghi lại) tạo
+        """
+        with self._lock:
+            if self._file_index is not None and cache_key not in self._pending_writes:
+                if name is None or self._file_index.get(cache_key) == name:
+                    self._file_index.pop(cache_key, None)
+    
+    def flush(self):
+        """Chờ các lệnh ghi file cache đang chờ hoàn tất"""
+        self._writer.submit(lambda: None).result()
+    
+    def _add_to_memory(self, key: str, item: Dict[str, Any]):
+        """Thêm vào memory cache (với giới hạn, xóa theo LRU)"""
+        with self._lock:
+            if key in self.memory_cache:
+                self.memory_cache.move_to_end(key)
+            elif len(self.memory_cache) >= self.max_memory_items:
+                # Xóa item ít được dùng gần đây nhất (đầu OrderedDict)
+                self.memory_cache.popitem(last=False)
+            
+            self.memory_cache[key] = item
     
     def _is_valid(self, item: Dict[str, Any]) -> bool:
         """Kiểm tra cache item còn hiệu lực không"""
         expires_at = item.get('expires_at', 0)
         return time.time() < expires_at
     
-    def invalidate(self, key: str):
+    def invalidate(self, key: str, prehashed: bool = False):
         """
         Xóa cache cho key cụ thể
         
         Args:
             key: Cache key cần xóa
+            prehashed: key đã là hex hash (vd: từ @cached), không hash lại
         """
         # Xóa khỏi memory
-        if key in self.memory_cache:
-            del self.memory_cache[key]
+        with self._lock:
+            self.memory_cache.pop(key, None)
         
-        # Xóa file
-        cache_file = self._get_cache_file(key)
-        if cache_file.exists():
-            cache_file.unlink()
+        # Xóa file (cả định dạng hiện tại và file .json cũ)
+        # Chờ ghi xong trước, tránh lệnh ghi đang chờ tạo lại file vừa xóa
+        self.flush()
+        cache_key = self._get_cache_key(key, prehashed)
+        self._forget_file(cache_key)
+        for suffix in CACHE_SUFFIXES:
+            # unlink thẳng thay vì exists() rồi unlink(): thread khác có thể
+            # xóa file ở giữa 2 lệnh
+            try:
+                os.unlink(self.cache_dir / f"{cache_key}{suffix}")
+            except FileNotFoundError:
+                pass
     
     def clear(self):
         """Xóa tất cả cache"""
-        # Xóa memory cache
-        self.memory_cache.clear()
+        # Xóa memory cache và index file
+        with self._lock:
+            self.memory_cache.clear()
+            self._file_index = {}
+            self._pending_writes.clear()
         
-        # Xóa tất cả file cache
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                cache_file.unlink()
-            except Exception:
-                pass
+        # Xóa tất cả file cache (sau khi các lệnh ghi đang chờ hoàn tất)
+        # 1 lần scandir cho mọi định dạng, unlink bằng path string (không tạo Path)
+        self.flush()
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(CACHE_SUFFIXES):
+                        try:
+                            os.unlink(entry.path)
+                        except OSError:
+                            pass
+        except OSError:
+            pass
     
     def cleanup_expired(self):
         """Dọn dẹp các cache đã hết hạn"""
         # Dọn memory cache
-        expired_keys = [
-            key for key, item in self.memory_cache.items()
-            if not self._is_valid(item)
-        ]
-        for key in expired_keys:
-            del self.memory_cache[key]
-        
-        # Dọn file cache
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    item = json.load(f)
-                
-                if not self._is_valid(item):
-                    cache_file.unlink()
-            except Exception:
-                # Nếu không đọc được, xóa luôn
-                try:
-                    cache_file.unlink()
-                except Exception:
-                    pass
+        with self._lock:
+            expired_keys = [
+                key for key, item in self.memory_cache.items()
+                if not self._is_valid(item)
+            ]
+            for key in expired_keys:
+                del self.memory_cache[key]
+        
+        # Dọn file cache: mtime của file = thời điểm hết hạn (xem set)
+        # File cũ ghi trước khi có quy ước này có mtime trong quá khứ nên cũng bị xóa
+        now = time.time()
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(CACHE_SUFFIXES):
+                        continue
+                    try:
+                        if entry.stat().st_mtime < now:
+                            self._forget_file(os.path.splitext(entry.name)[0], entry.name)
+                            os.unlink(entry.path)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
 
 
 def cached(ttl: int = 3600, key_func: Optional[Callable] = None):
@@ -206,32 +447,37 @@ def cached(ttl: int = 3600, key_func: Optional[Callable] = None):
     cache = SmartCache(default_ttl=ttl)
     
     def decorator(func: Callable):
+        # Encode tên hàm 1 lần lúc decorate, không phải mỗi lần gọi
+        qualname_bytes = func.__qualname__.encode('utf-8')
+        
+        def make_key(args, kwargs):
+            """Tạo (cache_key, prehashed) cho 1 lời gọi"""
+            if key_func:
+                return key_func(*args, **kwargs), False
+            # Hash cấu trúc args/kwargs 1 lần, SmartCache dùng luôn làm tên file
+            return _hash_call(qualname_bytes, args, kwargs), True
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Tạo cache key
-            if key_func:
-                cache_key = key_func(*args, **kwargs)
-            else:
-                # Tự động tạo key từ args và kwargs
-                key_parts = [str(arg) for arg in args]
-                key_parts.extend([f"{k}={v}" for k, v in sorted(kwargs.items())])
-                cache_key = f"{func.__name__}:{':'.join(key_parts)}"
+            cache_key, prehashed = make_key(args, kwargs)
             
             # Kiểm tra cache
-            cached_value = cache.get(cache_key)
+            cached_value = cache.get(cache_key, prehashed=prehashed)
             if cached_value is not None:
                 return cached_value
             
             # Thực thi function và cache kết quả
             result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl=ttl)
+            cache.set(cache_key, result, ttl=ttl, prehashed=prehashed)
             
             return result
         
-        # Thêm method để invalidate cache
-        wrapper.invalidate_cache = lambda *args, **kwargs: cache.invalidate(
-            key_func(*args, **kwargs) if key_func else f"{func.__name__}:{':'.join([str(arg) for arg in args])}"
-        )
+        # Thêm method để invalidate cache (dùng chung cách tạo key với wrapper)
+        def invalidate_cache(*args, **kwargs):
+            cache_key, prehashed = make_key(args, kwargs)
+            cache.invalidate(cache_key, prehashed=prehashed)
+        
+        wrapper.invalidate_cache = invalidate_cache
         
         return wrapper
     
@@ -240,11 +486,20 @@ def cached(ttl: int = 3600, key_func: Optional[Callable] = None):
 
 # Global cache instance
 _global_cache = None
+_global_cache_lock = threading.Lock()
 
 def get_cache(ttl: int = 3600) -> SmartCache:
-    """Lấy global cache instance"""
+    """
+    Lấy global cache instance
+    
+    Giải thích:
+    - Double-checked locking: đã tạo rồi thì không phải lấy lock,
+      lần đầu nhiều thread gọi cùng lúc vẫn chỉ tạo 1 instance
+    """
     global _global_cache
     if _global_cache is None:
-        _global_cache = SmartCache(default_ttl=ttl)
+        with _global_cache_lock:
+            if _global_cache is None:
+                _global_cache = SmartCache(default_ttl=ttl)
     return _global_cache
 
@@ -8,24 +8,71 @@ Lý do: Cải thiện UX với dark/light mode và custom themes
 """
 
 import json
+import os
+import sys
 from pathlib import Path
-from typing import Dict, Optional
-from dataclasses import dataclass, asdict
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+from dataclasses import dataclass, asdict, fields
 
 
-@dataclass
+# slots=True chỉ có từ Python 3.10, bản cũ hơn vẫn dùng __dict__
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
 class ThemeColors:
-    """Class chứa màu sắc của theme"""
-    primary: str = "#3498db"      # Blue
-    success: str = "#2ecc71"      # Green
-    warning: str = "#f39c12"      # Orange
-    error: str = "#e74c3c"        # Red
-    info: str = "#3498db"         # Blue
-    secondary: str = "#95a5a6"    # Gray
-    muted: str = "#7f8c8d"        # Dark gray
-    background: str = "#ffffff"    # White
-    foreground: str = "#000000"   # Black
-    border: str = "#bdc3c7"       # Light gray
+    """
+    Class chứa màu sắc của theme (mỗi màu là int RGB 0xRRGGBB)
+    
+    Giải thích:
+    - frozen: theme không bị sửa sau khi tạo, hash được (dùng làm key/dedupe)
+    - slots: không có __dict__ mỗi instance, truy cập field nhanh hơn
+    - Màu lưu dạng int: so sánh/tách kênh bằng phép toán bit, không parse
+      lại chuỗi hex; vẫn nhận chuỗi "#rrggbb" khi tạo (tương thích ngược)
+    """
+    primary: int = 0x3498db      # Blue
+    success: int = 0x2ecc71      # Green
+    warning: int = 0xf39c12      # Orange
+    error: int = 0xe74c3c        # Red
+    info: int = 0x3498db         # Blue
+    secondary: int = 0x95a5a6    # Gray
+    muted: int = 0x7f8c8d        # Dark gray
+    background: int = 0xffffff    # White
+    foreground: int = 0x000000   # Black
+    border: int = 0xbdc3c7       # Light gray
+    
+    def __post_init__(self):
+        # Chuyển màu truyền vào dạng "#rrggbb" thành int (ValueError nếu sai định dạng)
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if not isinstance(value, int):
+                object.__setattr__(self, f.name, int(str(value).lstrip('#'), 16))
+    
+    def hex(self, name: str) -> str:
+        """
+        Lấy màu dạng hex string
+        
+        Args:
+            name: Tên màu (vd: "primary")
+        
+        Returns:
+            str: Màu dạng "#rrggbb"
+        """
+        return f"#{getattr(self, name):06x}"
+    
+    def ansi(self, name: str) -> str:
+        """
+        Lấy mã ANSI truecolor (màu chữ) của màu
+        
+        Args:
+            name: Tên màu (vd: "primary")
+        
+        Returns:
+            str: Escape code "\\033[38;2;R;G;Bm" dùng với Colors.colorize
+        """
+        value = getattr(self, name)
+        return f"\033[38;2;{value >> 16};{(value >> 8) & 0xff};{value & 0xff}m"
 
 
 class ThemeManager:
@@ -34,67 +81,71 @@ class ThemeManager:
     # Built-in themes
     THEMES = {
         'default': ThemeColors(
-            primary="#3498db",
-            success="#2ecc71",
-            warning="#f39c12",
-            error="#e74c3c",
-            info="#3498db",
-            secondary="#95a5a6",
-            muted="#7f8c8d",
-            background="#ffffff",
-            foreground="#000000",
-            border="#bdc3c7"
+            primary=0x3498db,
+            success=0x2ecc71,
+            warning=0xf39c12,
+            error=0xe74c3c,
+            info=0x3498db,
+            secondary=0x95a5a6,
+            muted=0x7f8c8d,
+            background=0xffffff,
+            foreground=0x000000,
+            border=0xbdc3c7
         ),
         'dark': ThemeColors(
-            primary="#5dade2",
-            success="#52b788",
-            warning="#f4a261",
-            error="#e76f51",
-            info="#5dade2",
-            secondary="#adb5bd",
-            muted="#6c757d",
-            background="#1a1a1a",
-            foreground="#e0e0e0",
-            border="#404040"
+            primary=0x5dade2,
+            success=0x52b788,
+            warning=0xf4a261,
+            error=0xe76f51,
+            info=0x5dade2,
+            secondary=0xadb5bd,
+            muted=0x6c757d,
+            background=0x1a1a1a,
+            foreground=0xe0e0e0,
+            border=0x404040
         ),
         'light': ThemeColors(
-            primary="#2980b9",
-            success="#27ae60",
-            warning="#d68910",
-            error="#c0392b",
-            info="#2980b9",
-            secondary="#7f8c8d",
-            muted="#95a5a6",
-            background="#ffffff",
-            foreground="#2c3e50",
-            border="#ecf0f1"
+            primary=0x2980b9,
+            success=0x27ae60,
+            warning=0xd68910,
+            error=0xc0392b,
+            info=0x2980b9,
+            secondary=0x7f8c8d,
+            muted=0x95a5a6,
+            background=0xffffff,
+            foreground=0x2c3e50,
+            border=0xecf0f1
         ),
         'blue': ThemeColors(
-            primary="#3498db",
-            success="#2ecc71",
-            warning="#f39c12",
-            error="#e74c3c",
-            info="#3498db",
-            secondary="#34495e",
-            muted="#7f8c8d",
-            background="#ecf0f1",
-            foreground="#2c3e50",
-            border="#bdc3c7"
+            primary=0x3498db,
+            success=0x2ecc71,
+            warning=0xf39c12,
+            error=0xe74c3c,
+            info=0x3498db,
+            secondary=0x34495e,
+            muted=0x7f8c8d,
+            background=0xecf0f1,
+            foreground=0x2c3e50,
+            border=0xbdc3c7
         ),
         'green': ThemeColors(
-            primary="#27ae60",
-            success="#2ecc71",
-            warning="#f39c12",
-            error="#e74c3c",
-            info="#16a085",
-            secondary="#7f8c8d",
-            muted="#95a5a6",
-            background="#ffffff",
-            foreground="#2c3e50",
-            border="#ecf0f1"
+            primary=0x27ae60,
+            success=0x2ecc71,
+            warning=0xf39c12,
+            error=0xe74c3c,
+            info=0x16a085,
+            secondary=0x7f8c8d,
+            muted=0x95a5a6,
+            background=0xffffff,
+            foreground=0x2c3e50,
+            border=0xecf0f1
         )
     }
     
+    # Cache theme đã load theo file config: path -> (mtime, theme_name)
+    # Dùng chung mọi instance, file không đổi thì không đọc/parse lại JSON
+    _theme_cache: Dict[str, Tuple[float, str]] = {}
+    
     def __init__(self, config_file: Optional[Path] = None):
         """
         Khởi tạo ThemeManager
@@ -109,26 +160,58 @@ class ThemeManager:
         self.current_theme = self._load_theme()
     
     def _load_theme(self) -> str:
-        """Load theme hiện tại từ config"""
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    theme_name = config.get('theme', 'default')
-                    if theme_name in self.THEMES:
-                        return theme_name
-            except Exception:
-                pass
-        
-        return 'default'
+        """
+        Load theme hiện tại từ config
+        
+        Giải thích:
+        - stat() file config rồi so mtime với lần load trước (_theme_cache)
+        - mtime không đổi thì dùng lại tên theme đã parse, không mở file
+        """
+        cache_key = str(self.config_file)
+        try:
+            mtime = self.config_file.stat().st_mtime
+        except OSError:
+            return 'default'
+        
+        cached = self._theme_cache.get(cache_key)
+        if cached is not None and cached[0] == mtime and cached[1] in self.THEMES:
+            return cached[1]
+        
+        theme_name = 'default'
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+                name = config.get('theme', 'default')
+                if name in self.THEMES:
+                    theme_name = name
+        except Exception:
+            pass
+        
+        self._theme_cache[cache_key] = (mtime, theme_name)
+        return theme_name
     
     def _save_theme(self, theme_name: str):
-        """Lưu theme vào config"""
+        """
+        Lưu theme vào config
+        
+        Giải thích:
+        - Theme không đổi thì không ghi lại file
+        - Ghi ra file tạm rồi os.replace: file config không bao giờ bị ghi dở
+          (vd: bị ngắt giữa chừng) khiến lần load sau về theme mặc định
+        """
+        if theme_name == self.current_theme and self.config_file.exists():
+            return
+        
+        tmp_file = self.config_file.with_name(f"{self.config_file.name}.tmp")
         try:
             config = {'theme': theme_name}
-            with open(self.config_file, 'w', encoding='utf-8') as f:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.config_file)
             self.current_theme = theme_name
+            
+            # Cập nhật cache để lần khởi tạo sau không phải parse lại file vừa ghi
+            self._theme_cache[str(self.config_file)] = (self.config_file.stat().st_mtime, theme_name)
         except Exception as e:
             print(f"Lỗi lưu theme: {e}")
     
@@ -163,9 +246,14 @@ class ThemeManager:
         self._save_theme(theme_name)
         return True
     
-    def list_themes(self) -> Dict[str, ThemeColors]:
-        """Liệt kê tất cả themes"""
-        return self.THEMES.copy()
+    def list_themes(self) -> Mapping[str, ThemeColors]:
+        """
+        Liệt kê tất cả themes
+        
+        Returns:
+            Mapping: View chỉ đọc của THEMES (không copy dict mỗi lần gọi)
+        """
+        return MappingProxyType(self.THEMES)
     
     def create_custom_theme(self, name: str, colors: Dict[str, str]) -> bool:
         """
@@ -179,13 +267,11 @@ class ThemeManager:
             bool: True nếu thành công
         """
         try:
-            # Validate colors
-            theme_colors = ThemeColors()
-            for key, value in colors.items():
-                if hasattr(theme_colors, key):
-                    setattr(theme_colors, key, value)
+            # Validate colors: chỉ nhận các field có trong ThemeColors
+            field_names = {f.name for f in fields(ThemeColors)}
+            theme_colors = {key: value for key, value in colors.items() if key in field_names}
             
-            self.THEMES[name] = theme_colors
+            self.THEMES[name] = ThemeColors(**theme_colors)
             return True
         except Exception:
             return False
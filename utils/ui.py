@@ -7,9 +7,15 @@ Mục đích: Tập trung các component UI tái sử dụng
 Lý do: Tách riêng logic UI để dễ maintain và mở rộng
 """
 
-from typing import Optional, List
+from __future__ import annotations
+
 from .colors import Colors
 
+# Chỉ dùng cho type hint
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional, List
+
 
 def print_success_box(message: str, title: Optional[str] = "Thành công"):
     """In thông báo thành công trong box đẹp"""
@@ -7,13 +7,26 @@ Mục đích: Tập trung các hàm validate và xử lý input từ người d
 Lý do: Tách riêng logic validation để dễ maintain và test
 """
 
+from __future__ import annotations
+
 import os
+import re
+import stat
 import sys
 import subprocess
-from pathlib import Path
-from typing import Optional, Tuple, List
+import importlib.util
+from functools import lru_cache
 from .colors import Colors
 
+# Chỉ dùng cho type hint
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional, Tuple, List
+
+
+# Khoảng trắng + dấu ngoặc kép/đơn (kéo thả file vào terminal thêm ngoặc)
+_STRIP_QUOTE_CHARS = ' \t\r\n\f\v"\''
+
 
 def get_user_input(prompt: str, default: Optional[str] = None, 
                    strip_quotes: bool = True, validator: Optional[callable] = None,
@@ -42,18 +55,19 @@ def get_user_input(prompt: str, default: Optional[str] = None,
     """
     retries = 0
     
+    # prompt và default không đổi giữa các lần retry
+    if default:
+        prompt_text = f"{prompt} (mặc định: {default}): "
+    else:
+        prompt_text = f"{prompt}: "
+    
     while retries < max_retries:
-        if default:
-            prompt_text = f"{prompt} (mặc định: {default}): "
-        else:
-            prompt_text = f"{prompt}: "
-        
         try:
-            user_input = input(prompt_text).strip()
-            
             if strip_quotes:
-                # Xóa dấu ngoặc kép và ngoặc đơn ở đầu/cuối
-                user_input = user_input.strip('"').strip("'").strip()
+                # Xóa khoảng trắng và dấu ngoặc kép/đơn ở đầu/cuối trong 1 lần strip
+                user_input = input(prompt_text).strip(_STRIP_QUOTE_CHARS)
+            else:
+                user_input = input(prompt_text).strip()
             
             if not user_input and default:
                 user_input = default
@@ -91,6 +105,12 @@ def get_user_input(prompt: str, default: Optional[str] = None,
     raise ValueError("Không thể lấy input hợp lệ sau nhiều lần thử")
 
 
+@lru_cache(maxsize=256)
+def _abspath_cached(path: str) -> str:
+    """abspath có cache - chỉ dùng cho đường dẫn đã tuyệt đối (không phụ thuộc cwd/HOME)"""
+    return os.path.abspath(path)
+
+
 def normalize_path(path: str) -> str:
     """
     Chuẩn hóa đường dẫn (xử lý kéo thả trên Windows)
@@ -106,6 +126,9 @@ def normalize_path(path: str) -> str:
     - Xử lý khoảng trắng thừa
     - Chuyển đổi về đường dẫn tuyệt đối
     - Xử lý backslash trên Windows
+    - Có cache cho đường dẫn tuyệt đối: tool gọi lại nhiều lần với cùng đường
+      dẫn (retry, xử lý hàng loạt). Đường dẫn tương đối và "~" không cache vì
+      kết quả phụ thuộc thư mục hiện tại và HOME lúc gọi
     
     Mục đích: 
     - Hỗ trợ kéo thả folder vào terminal
@@ -114,21 +137,21 @@ def normalize_path(path: str) -> str:
     # Bước 1: Xóa khoảng trắng ở đầu cuối
     path = path.strip()
     
-    # Bước 2: Xóa dấu ngoặc kép/đơn
-    if (path.startswith('"') and path.endswith('"')) or \
-       (path.startswith("'") and path.endswith("'")):
+    # Bước 2: Xóa dấu ngoặc kép/đơn (cùng loại ở cả 2 đầu)
+    if len(path) >= 2 and path[0] == path[-1] and path[0] in ('"', "'"):
         path = path[1:-1]
     
     # Bước 3: Xóa khoảng trắng thừa lần nữa sau khi xóa ngoặc
     path = path.strip()
     
     # Bước 4: Chuyển về đường dẫn tuyệt đối và chuẩn hóa
-    path = os.path.abspath(os.path.expanduser(path))
-    
-    # Bước 5: Chuẩn hóa separators (\ thành / hoặc ngược lại tùy OS)
-    path = os.path.normpath(path)
-    
-    return path
+    # abspath đã gọi normpath bên trong (chuẩn hóa separators, "..", "."
+    # trên cả POSIX lẫn Windows), không cần normpath lần nữa
+    if path.startswith('~'):
+        path = os.path.expanduser(path)
+    if os.path.isabs(path):
+        return _abspath_cached(path)
+    return os.path.abspath(path)
 
 
 def confirm_action(message: str, require_yes: bool = False) -> bool:
@@ -183,43 +206,72 @@ def validate_path(path: str, must_exist: bool = True,
     if not path:
         return False, "Đường dẫn không được để trống", None
     
-    path_obj = Path(path)
+    # Expand "~" giống normalize_path để validator và bước xử lý sau thống nhất
+    expanded = os.path.expanduser(path)
     
-    if must_exist and not path_obj.exists():
+    # 1 lần stat cho cả 3 kiểm tra tồn tại/thư mục/file (không tạo Path)
+    try:
+        mode = os.stat(expanded).st_mode
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        mode = None
+    except OSError as e:
+        # Không xác định được có tồn tại hay không (vd: không có quyền vào
+        # thư mục cha), báo đúng lỗi thay vì "không tồn tại" kèm gợi ý
+        if must_exist:
+            return False, f"Không truy cập được đường dẫn: {path} ({e.strerror})", None
+        mode = None
+    
+    if must_exist and mode is None:
         error_msg = f"Đường dẫn không tồn tại: {path}"
         
         # Gợi ý các đường dẫn tương tự
         if suggest_alternatives:
-            parent = path_obj.parent
-            if parent.exists():
-                # Tìm các file/thư mục tương tự trong parent
-                try:
-                    similar_paths = []
-                    path_name_lower = path_obj.name.lower()
-                    
-                    for item in parent.iterdir():
-                        if item.name.lower().startswith(path_name_lower[:3]) or path_name_lower[:3] in item.name.lower():
-                            similar_paths.append(str(item))
+            # Tách thư mục cha/tên (bỏ "/" cuối như Path.parent/Path.name)
+            parent, name = os.path.split(expanded.rstrip('/' + os.sep) or expanded)
+            # Tìm các file/thư mục tương tự trong parent
+            # scandir chỉ đọc tên entry (không stat từng item),
+            # parent không tồn tại thì scandir raise OSError
+            try:
+                similar_paths = []
+                # "startswith(prefix) or prefix in name" chỉ cần 1 phép "in"
+                prefix = name.lower()[:3]
+                
+                with os.scandir(parent or '.') as entries:
+                    for entry in entries:
+                        if prefix in entry.name.lower():
+                            similar_paths.append(os.path.join(parent, entry.name))
                             if len(similar_paths) >= 5:
                                 break
-                    
-                    if similar_paths:
-                        suggestions = similar_paths
-                        error_msg += f"\n💡 Gợi ý: {', '.join(similar_paths[:3])}"
-                except (PermissionError, OSError):
-                    pass
+                
+                if similar_paths:
+                    suggestions = similar_paths
+                    error_msg += f"\n💡 Gợi ý: {', '.join(similar_paths[:3])}"
+            except OSError:
+                pass
         
         return False, error_msg, suggestions
     
-    if must_be_dir and must_exist and not path_obj.is_dir():
+    if must_be_dir and must_exist and not stat.S_ISDIR(mode):
         return False, f"Đường dẫn không phải là thư mục: {path}", None
     
-    if must_be_file and must_exist and not path_obj.is_file():
+    if must_be_file and must_exist and not stat.S_ISREG(mode):
         return False, f"Đường dẫn không phải là file: {path}", None
     
     return True, "", None
 
 
+# Số + đơn vị tùy chọn (vd: "10MB", "1.5 gb", "500"), parse trong 1 lần match
+_SIZE_RE = re.compile(r'^\s*([0-9]+(?:\.[0-9]+)?)\s*([KMGT]?B)?\s*$', re.IGNORECASE)
+
+_SIZE_UNITS = {
+    'B': 1,
+    'KB': 1024,
+    'MB': 1024**2,
+    'GB': 1024**3,
+    'TB': 1024**4
+}
+
+
 def parse_size_string(size_str: str) -> int:
     """
     Parse chuỗi kích thước thành bytes
@@ -234,29 +286,44 @@ def parse_size_string(size_str: str) -> int:
         parse_size_string("10MB") -> 10485760
         parse_size_string("1.5GB") -> 1610612736
     """
-    size_str = size_str.upper().strip()
-    
-    units = {
-        'B': 1,
-        'KB': 1024,
-        'MB': 1024**2,
-        'GB': 1024**3,
-        'TB': 1024**4
-    }
-    
-    for unit, multiplier in units.items():
-        if size_str.endswith(unit):
-            try:
-                number = float(size_str[:-len(unit)])
-                return int(number * multiplier)
-            except ValueError:
-                return 0
+    match = _SIZE_RE.match(size_str)
+    if not match:
+        return 0
+    
+    number, unit = match.groups()
+    # Không có đơn vị thì coi như là bytes
+    return int(float(number) * _SIZE_UNITS[unit.upper() if unit else 'B'])
+
+
+@lru_cache(maxsize=None)
+def is_module_available(import_name: str) -> bool:
+    """
+    Kiểm tra module có cài không mà không import
     
-    # Nếu không có đơn vị, coi như là bytes
+    Args:
+        import_name: Tên module (vd: "PIL", "fontTools")
+    
+    Returns:
+        bool: True nếu tìm thấy module
+    
+    Giải thích:
+    - find_spec chỉ tìm loader, không chạy __init__.py của package và
+      không import các dependency kéo theo (import thử moviepy mất hàng giây)
+    - Tool tự import thư viện ở chỗ thực sự dùng
+    - Có cache: mỗi module chỉ dò 1 lần/process (find_spec stat() từng thư
+      mục trong sys.path), install_library xóa cache sau khi cài xong
+    """
     try:
-        return int(size_str)
-    except ValueError:
-        return 0
+        return importlib.util.find_spec(import_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# Lệnh pip của đúng interpreter đang chạy tool
+# --disable-pip-version-check: bỏ request kiểm tra phiên bản pip mới (chậm khi mạng yếu)
+# --no-input: pip không dừng chờ nhập khi cần xác nhận/mật khẩu
+_PIP_INSTALL = (sys.executable, "-m", "pip", "install",
+                "--disable-pip-version-check", "--no-input")
 
 
 def install_library(package_name: str, install_command: str, 
@@ -296,32 +363,29 @@ def install_library(package_name: str, install_command: str,
     if choice and choice not in ['y', 'yes']:
         return False
     
+    # Tách install_command để lấy package names
+    # Xử lý các trường hợp: "pip install package", "package", etc.
+    install_parts = install_command.split()
+    
+    # Tìm phần "install" để lấy các package sau đó
+    try:
+        packages = install_parts[install_parts.index("install") + 1:]
+    except ValueError:
+        # Nếu không có "install", coi toàn bộ là packages
+        packages = install_parts
+    
+    args = [*_PIP_INSTALL, *packages]
+    
     try:
         print()
         print(Colors.info(f"📦 Đang cài đặt {display_name}..."))
         
-        # Tách install_command để lấy package names
-        # Xử lý các trường hợp: "pip install package", "package", etc.
-        install_parts = install_command.split()
-        
-        # Tìm phần "install" để lấy các package sau đó
-        if "install" in install_parts:
-            install_idx = install_parts.index("install")
-            packages = install_parts[install_idx + 1:]
-        else:
-            # Nếu không có "install", coi toàn bộ là packages
-            packages = install_parts
-        
-        # Tạo command với sys.executable -m pip install
-        args = [sys.executable, "-m", "pip", "install"] + packages
+        # Chạy lệnh cài đặt: output của pip in thẳng ra terminal (thấy tiến
+        # trình tải), không gom vào bộ nhớ rồi mới in khi lỗi
+        subprocess.run(args, check=True)
         
-        # Chạy lệnh cài đặt
-        result = subprocess.run(
-            args,
-            check=True,
-            capture_output=True,
-            text=True
-        )
+        # Kết quả dò module cũ (chưa cài) không còn đúng
+        is_module_available.cache_clear()
         
         print(Colors.success(f"✅ Đã cài đặt {display_name} thành công!"))
         print(Colors.warning("💡 Tool cần restart để nhận package mới."))
@@ -329,11 +393,8 @@ def install_library(package_name: str, install_command: str,
         return True
         
     except subprocess.CalledProcessError as e:
+        # Chi tiết lỗi pip đã in ra terminal ở trên
         print(Colors.error(f"❌ Lỗi khi cài đặt: {e}"))
-        if e.stdout:
-            print(e.stdout)
-        if e.stderr:
-            print(e.stderr)
         print()
         return False
     except Exception as e: